@@ -1,11 +1,11 @@
 import streamlit as st
 from mindswitch_utils import (
     APP_TITLE, init_state, render_sidebar,
-    start_timer_minutes, reset_mind_anchors, go
+    start_timer_minutes, reset_mind_anchors, go, end_page
 )
 
 st.set_page_config(page_title=APP_TITLE, layout="centered")
-init_state()
+init_state("Home")
 render_sidebar()
 
 st.title(APP_TITLE)
@@ -89,3 +89,5 @@ if st.button("🚀 Work 모드 시작"):
     reset_mind_anchors()
     start_timer_minutes(st.session_state.work_min)
     go("pages/1_Work.py")
+
+end_page()
@@ -0,0 +1,92 @@
+"""
+append_log 저장 지연 벤치마크.
+
+기존 로그 길이(1k → 1M 행)를 늘려가며 한 행 저장에 걸리는 시간을 잰다.
+append-only 방식은 길이와 무관하게 평평해야 하고,
+비교용 legacy(read → concat → 전체 다시 쓰기)는 길이에 비례해 늘어난다.
+
+    python benchmarks/bench_append_log.py
+    python benchmarks/bench_append_log.py --sizes 1000 10000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import mindswitch_utils as mu  # noqa: E402
+
+LEGACY_MAX_ROWS = 100_000
+
+
+def make_row(i: int) -> dict:
+    stim = list(mu.STIMULI.keys())[i % len(mu.STIMULI)]
+    return {
+        "ts": int((datetime(2024, 1, 1) + timedelta(minutes=i)).timestamp()),
+        "work_min": 25, "rest_min": 3,
+        "recommended_stim": stim, "recommend_reason": "exploit(학습된 최선 추천)",
+        "chosen_stim": stim,
+        "pre_rt": 0.8, "post_rt": 0.7, "pre_err": 2, "post_err": 1,
+        "pre_idea": 1, "post_idea": 2,
+        "d_rt": 0.125, "d_err": 0.5, "d_idea": 1.0, "mwi": 0.0967,
+        "easy_pre_q1": 2, "easy_q1": 3, "easy_q2": 2, "easy_q3": 1, "easy_mwi": 2.0,
+    }
+
+
+def write_synthetic_log(path: str, n: int):
+    rng = np.random.default_rng(0)
+    keys = np.array(list(mu.STIMULI.keys()))
+    ts = 1_577_836_800 + 60 * np.arange(n, dtype=np.int64)
+    stim = keys[rng.integers(0, len(keys), n)]
+    df = pd.DataFrame({c: [v] * n for c, v in make_row(0).items()})
+    df["ts"] = ts
+    df["recommended_stim"] = stim
+    df["chosen_stim"] = stim
+    df["mwi"] = rng.normal(0.05, 0.02, n)
+    df.to_csv(path, index=False)
+
+
+def legacy_append_log(row: dict):
+    df = mu.load_log()
+    out = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    out.to_csv(mu.LOG_PATH, index=False)
+
+
+def time_appends(fn, repeat: int) -> float:
+    samples = []
+    for i in range(repeat):
+        row = make_row(i)
+        t0 = time.perf_counter()
+        fn(row)
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    ap.add_argument("--repeat", type=int, default=100)
+    args = ap.parse_args()
+
+    print(f"{'rows':>10} {'append-only(ms)':>16} {'legacy(ms)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            mu.LOG_PATH = os.path.join(tmp, f"log_{n}.csv")
+            write_synthetic_log(mu.LOG_PATH, n)
+            fast = time_appends(mu.append_log, args.repeat)
+
+            legacy = "-"
+            if n <= LEGACY_MAX_ROWS:
+                write_synthetic_log(mu.LOG_PATH, n)
+                legacy = f"{time_appends(legacy_append_log, min(args.repeat, 5)) * 1e3:.2f}"
+            print(f"{n:>10} {fast * 1e3:>16.3f} {legacy:>12}")
+
+
+if __name__ == "__main__":
+    main()
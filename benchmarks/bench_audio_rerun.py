@@ -0,0 +1,97 @@
+"""
+S2_AudioNoise 재실행 지연 벤치마크.
+
+Mind 화면이 다시 실행될 때 청각 자극 부분에 드는 시간을 비교한다.
+- legacy: 예전 방식. 휴식 길이 전체 WAV(3분, 5.8MB) bytes 를 매번 st.audio 에 넘김
+          (Streamlit 이 매번 해시하고 media 파일로 등록).
+- bytes : 정적 URL 을 쓸 수 없을 때. 8초 루프(256KB) bytes 를 넘김.
+- url   : 기본. static/noise 의 내용 해시 URL 만 넘김(내용은 건드리지 않음).
+WAV 생성 시간은 빼고(첫 실행에서 미리 만든다) 재실행 비용만 잰다.
+
+AppTest 에는 서버 런타임이 없어 st.audio 가 bytes 를 media 파일로 등록(해시)하는
+단계를 건너뛴다. 그래서 그 단계(MediaFileManager.add)는 따로 재서 더한다.
+
+    python benchmarks/bench_audio_rerun.py --runs 200
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)  # .streamlit/config.toml(enableStaticServing) 을 읽도록
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def legacy_script():
+    import numpy as np
+    import streamlit as st
+    import mindswitch_utils as mu
+    if "legacy_wav" not in st.session_state:
+        sr, n = 16000, 16000 * 180
+        pcm = (np.random.randn(n) * 0.12).clip(-1, 1)
+        pcm = (pcm * 32767).astype(np.int16)
+        st.session_state.legacy_wav = mu._wav_header(n, sr) + pcm.tobytes()
+    st.audio(st.session_state.legacy_wav, format="audio/wav")
+
+
+def stimulus_script():
+    import streamlit as st
+    import mindswitch_utils as mu
+    mu.NOISE_STATIC_URL = st.session_state.static_url
+    mu.init_state("3_Mind")
+    mu.stimulus_audio_noise(3)
+
+
+def median_media_add_ms(data: bytes, runs: int) -> float:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    mgr = MediaFileManager(MemoryMediaFileStorage("/media"))
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        mgr.add(data, "audio/wav", "1.(3.-14).5")
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples)) * 1e3
+
+
+def median_run_ms(script, runs: int, static_url=None) -> float:
+    at = AppTest.from_function(script, default_timeout=30)
+    at.session_state["static_url"] = static_url
+    at.run()  # 첫 실행(import, WAV 준비)은 제외
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - t0)
+    assert not at.exception, at.exception
+    return float(np.median(samples)) * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=100)
+    args = ap.parse_args()
+
+    import mindswitch_utils as mu
+    legacy_bytes = 16000 * 180 * 2 + 44
+    rows = [
+        ("legacy", median_run_ms(legacy_script, args.runs),
+         median_media_add_ms(os.urandom(legacy_bytes), args.runs)),
+        ("bytes", median_run_ms(stimulus_script, args.runs),
+         median_media_add_ms(mu.noise_wav("white").tobytes(), args.runs)),
+        ("url", median_run_ms(stimulus_script, args.runs, "http://localhost:8501/"), 0.0),
+    ]
+    print(f"median ms per rerun ({args.runs} runs)")
+    print(f"{'':>8} {'script':>8} {'media':>8} {'total':>8}")
+    for name, script_ms, media_ms in rows:
+        print(f"{name:>8} {script_ms:>8.2f} {media_ms:>8.2f} {script_ms + media_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+밴딧 상태 warm start 벤치마크.
+
+로그 길이(10k → 1M 행)마다 (chosen_stim, mwi) 로 밴딧 상태를 만드는 시간을 잰다.
+- loop  : 행마다 bandit_update 와 같은 증분 평균(파이썬 루프)
+- replay: bandit_replay(자극 코드별 bincount). load_log 결과(category) 그대로.
+- agg   : 누적 통계(mindwand_log.agg)가 있을 때의 warm start(로그를 읽지 않음)
+로그 파싱(load_log) 시간은 따로 표시한다.
+
+    python benchmarks/bench_bandit_warm_start.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import mindswitch_utils as mu  # noqa: E402
+from bench_append_log import write_synthetic_log  # noqa: E402
+
+
+def loop_replay(stims, rewards):
+    q = {k: 0.0 for k in mu.STIMULI}
+    n = {k: 0 for k in mu.STIMULI}
+    for s, r in zip(stims, rewards):
+        if s not in n or np.isnan(r):
+            continue
+        n[s] += 1
+        q[s] += (float(r) - q[s]) / n[s]
+    return q, n
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = ap.parse_args()
+
+    print(f"{'rows':>10} {'load_log ms':>12} {'loop ms':>10} {'replay ms':>10} {'agg ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for n in args.sizes:
+            mu.LOG_PATH = os.path.join(tmp, f"log_{n}.csv")
+            mu.LOG_AGG_DIR = os.path.join(tmp, f"agg_{n}")
+            write_synthetic_log(mu.LOG_PATH, n)
+
+            t0 = time.perf_counter()
+            df = mu.load_log()
+            load_ms = (time.perf_counter() - t0) * 1e3
+            loop_ms = timed(loop_replay, df["chosen_stim"].to_numpy(), df["mwi"].to_numpy())
+            replay_ms = timed(mu.bandit_replay, df["chosen_stim"], df["mwi"])
+
+            mu.rebuild_aggregates()
+            agg_ms = timed(mu._bandit_warm_start)
+            print(f"{n:>10} {load_ms:>12.1f} {loop_ms:>10.1f} {replay_ms:>10.2f} {agg_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
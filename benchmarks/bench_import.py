@@ -0,0 +1,141 @@
+"""
+로그 가져오기(mindswitch_import.py merge) 벤치마크.
+
+--files 개 파일에 합쳐 --rows 행을 만든다.
+- 4개 중 1개는 예전 형식(easy_* 컬럼 없음), 나머지는 지금 형식
+- 3개 중 1개는 다운로드 형식(ts 가 로컬 ISO 시각), 나머지는 서버 원본(epoch 초)
+- 5개 중 1개는 .csv.gz
+- 지금 형식 파일은 앞 파일 끝부분 --overlap 비율만큼을 다시 담는다(기간이 겹치게 내려받은 경우,
+  예전 형식 파일 뒤라면 easy_* 가 빈 행이 다른 스키마로 한 번 더 들어온다)
+빈 저장소에 한 번, 같은 파일을 다시 한 번(전부 중복이어야 함) 가져오며 단계별 시간을 잰다.
+비교용 naive 는 파일을 차례로 read_csv → concat → drop_duplicates 만 한 시간(쓰기 제외).
+
+    python benchmarks/bench_import.py --files 1000 --rows 5000000
+    python benchmarks/bench_import.py --files 100 --rows 200000 --backend sqlite --workers 1 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ["MINDSWITCH_METRICS"] = "0"
+
+SPAN_SEC = 10 * 365 * 86400
+EASY_COLS = ["easy_pre_q1", "easy_q1", "easy_q2", "easy_q3", "easy_mwi"]
+
+
+def make_frame(rng, start: int, n: int, stims: list, gap: int = 3600) -> pd.DataFrame:
+    ts = start + np.cumsum(rng.integers(1, 2 * gap, n))
+    stim = np.array(stims)[rng.integers(0, len(stims), n)]
+    pre_rt, post_rt = rng.uniform(0.4, 1.2, n).round(3), rng.uniform(0.4, 1.2, n).round(3)
+    pre_err, post_err = rng.integers(0, 5, n), rng.integers(0, 5, n)
+    pre_idea, post_idea = rng.integers(0, 6, n), rng.integers(0, 6, n)
+    d_rt = ((pre_rt - post_rt) / pre_rt).round(4)
+    d_err = ((pre_err - post_err) / np.maximum(pre_err, 1)).round(4)
+    d_idea = ((post_idea - pre_idea) / np.maximum(pre_idea, 1)).round(4)
+    easy = rng.integers(1, 6, (n, 4))
+    return pd.DataFrame({
+        "ts": ts,
+        "work_min": rng.choice([15, 25, 50], n), "rest_min": rng.choice([3, 5, 10], n),
+        "recommended_stim": stim, "recommend_reason": "exploit(학습된 최선 추천)", "chosen_stim": stim,
+        "pre_rt": pre_rt, "post_rt": post_rt, "pre_err": pre_err, "post_err": post_err,
+        "pre_idea": pre_idea, "post_idea": post_idea,
+        "d_rt": d_rt, "d_err": d_err, "d_idea": d_idea,
+        "mwi": (0.4 * d_rt + 0.3 * d_err + 0.3 * d_idea).round(4),
+        "easy_pre_q1": easy[:, 0], "easy_q1": easy[:, 1], "easy_q2": easy[:, 2], "easy_q3": easy[:, 3],
+        "easy_mwi": easy[:, 1:].mean(axis=1).round(4),
+    })
+
+
+def write_files(out_dir: str, files: int, rows: int, overlap: float, seed: int = 0) -> int:
+    """out_dir 에 파일을 만든다. 서로 다른 행 수(겹침 제외)를 돌려준다."""
+    import mindswitch_utils as mu
+    rng = np.random.default_rng(seed)
+    per = max(1, rows // files)
+    fresh = max(1, int(round(per * (1 - overlap))))
+    stims = list(mu.STIMULI)
+    gap = max(1, SPAN_SEC // rows)  # 행 수와 상관없이 SPAN_SEC 안에 들어가게
+    start, prev, distinct = int(time.time()) - SPAN_SEC, None, 0
+    for i in range(files):
+        df = make_frame(rng, start, fresh, stims, gap)
+        if i % 4 == 0:
+            df[EASY_COLS] = np.nan  # easy_* 가 생기기 전 기록
+        start = int(df["ts"].iloc[-1])
+        distinct += len(df)
+        if prev is not None and per > fresh and i % 4:
+            df = pd.concat([prev.tail(per - fresh), df], ignore_index=True)
+        prev = df
+        out = df
+        if i % 4 == 0:
+            out = out.drop(columns=EASY_COLS)
+        if i % 3 == 0:
+            out = out.assign(ts=mu._epoch_to_local(out["ts"]).dt.strftime("%Y-%m-%dT%H:%M:%S"))
+        name = os.path.join(out_dir, f"log_{i:04d}.csv" + (".gz" if i % 5 == 0 else ""))
+        out.to_csv(name, index=False)
+    return distinct
+
+
+def naive(paths: list) -> float:
+    t0 = time.perf_counter()
+    df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+    df.drop_duplicates()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=1000)
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    ap.add_argument("--overlap", type=float, default=0.1, help="앞 파일과 겹치는 행 비율")
+    ap.add_argument("--backend", choices=["csv", "sqlite", "segments"], default="csv")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    ap.add_argument("--naive", action="store_true", help="비교용 naive 읽기+중복 제거도 잰다")
+    args = ap.parse_args()
+
+    os.environ["MINDSWITCH_LOG_BACKEND"] = args.backend
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "exports")
+        os.makedirs(src)
+        import mindswitch_import
+        import mindswitch_utils as mu
+
+        t0 = time.perf_counter()
+        distinct = write_files(src, args.files, args.rows, args.overlap)
+        paths = mindswitch_import.expand_paths([src])
+        mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"{len(paths)} files, {mb:.0f} MB, {distinct} distinct rows "
+              f"(generated in {time.perf_counter() - t0:.1f}s), backend {args.backend}")
+        if args.naive:
+            print(f"naive read+drop_duplicates: {naive(paths):.2f}s")
+
+        print(f"{'workers':>7} {'run':>6} {'read':>8} {'dup':>8} {'added':>8} "
+              f"{'header s':>9} {'store s':>8} {'read s':>8} {'dedup s':>8} {'write s':>8} {'total s':>8}")
+        for w in dict.fromkeys(args.workers):
+            store = os.path.join(tmp, f"store_{w}")  # workers 마다 빈 저장소에서
+            os.makedirs(store)
+            os.chdir(store)
+            for run in ("first", "again"):
+                r = mindswitch_import.import_logs([src], workers=w)
+                assert not r["failed"], r["failed"][:3]
+                s = r["seconds"]
+                print(f"{w:>7} {run:>6} {r['rows_read']:>8} {r['duplicates']:>8} {r['rows_added']:>8} "
+                      f"{s['header']:>9.2f} {s['store']:>8.2f} {s['read']:>8.2f} {s['dedup']:>8.2f} {s['write']:>8.2f} "
+                      f"{sum(s.values()):>8.2f}")
+            df = mu.load_log()
+            assert len(df) == distinct, f"중복 제거 후 {len(df)} 행, 기대 {distinct}"
+            assert mu.rebuild_aggregates(check=True) == [], "누적 통계가 로그와 다름"
+            q, n = mu.bandit_replay(df["chosen_stim"], df["mwi"])
+            state = mu.bandit_state()
+            assert state["n"] == n and all(abs(state["q"][k] - q[k]) < 1e-9 for k in q), "밴딧 상태가 로그와 다름"
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
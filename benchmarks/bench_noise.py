@@ -0,0 +1,54 @@
+"""
+화이트노이즈 생성 벤치마크.
+
+휴식 길이(REST_CHOICES)마다 예전 방식(전체 길이 float64 randn → int16 WAV)과
+짧은 루프 방식(make_noise_loop_pcm)의 생성 시간, 최대 메모리, 보내는 바이트를 비교한다.
+루프 방식은 휴식 길이와 무관하게 같은 값이어야 한다.
+
+    python benchmarks/bench_noise.py
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import mindswitch_utils as mu  # noqa: E402
+
+
+def legacy_wav(seconds: int, sr: int = 16000, amp: float = 0.12) -> bytes:
+    noise = (np.random.randn(int(sr * seconds)) * amp).clip(-1, 1)
+    pcm = (noise * 32767).astype(np.int16)
+    return mu._wav_header(len(pcm), sr) + pcm.tobytes()
+
+
+def loop_wav(seconds: int) -> bytes:
+    # rest 길이와 관계없이 같은 루프 (cache_data 를 거치지 않고 직접 생성)
+    pcm = mu.make_noise_loop_pcm()
+    return mu._wav_header(len(pcm), 16000) + pcm.tobytes()
+
+
+def measure(fn, seconds: int):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    wav = fn(seconds)
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dt, peak, len(wav)
+
+
+def main():
+    print(f"{'rest_min':>8} {'legacy ms':>10} {'legacy MB':>10} {'legacy bytes':>13}"
+          f" {'loop ms':>8} {'loop MB':>8} {'loop bytes':>11}")
+    for rest_min in mu.REST_CHOICES:
+        lt, lp, lb = measure(legacy_wav, rest_min * 60)
+        nt, np_, nb = measure(loop_wav, rest_min * 60)
+        print(f"{rest_min:>8} {lt * 1e3:>10.1f} {lp / 1e6:>10.1f} {lb:>13,}"
+              f" {nt * 1e3:>8.1f} {np_ / 1e6:>8.2f} {nb:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+페이지 스크립트 벤치마크(AppTest, 서버 없이).
+
+Home.py 와 pages/ 의 모든 페이지를 streamlit.testing.v1.AppTest 로 실행해
+로그 길이(0 / 10k / 100k / 1M 행)마다 재실행 비용을 잰다.
+- cold    : 로그 캐시를 비운 첫 실행(load_log 파싱 포함)
+- warm    : 같은 세션에서 다시 실행(--runs 번의 중앙값 / p95)
+- peak    : tracemalloc 으로 잰 실행 중 최대 추가 메모리(cold / warm)
+- retained: 실행 후 남은 메모리와 블록 수(warm, 캐시/세션 상태로 남는 양)
+페이지와 별도로 load_log, today_df, load_today, append_log, 노이즈 루프 생성,
+누적 통계 rebuild 도 직접 잰다.
+
+페이지마다 그 화면에 들어갈 때의 세션 상태(타이머, 측정값, 자극 등)를 고정값으로
+넣어 두므로 결과는 같은 기계에서 실행끼리 비교할 수 있다. 합성 로그는 1분 간격이고
+마지막 행이 지금이라 오늘 행도 들어 있다.
+
+    python benchmarks/bench_pages.py
+    python benchmarks/bench_pages.py --sizes 0 10000 --runs 10 --out new.json --baseline old.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)  # .streamlit/config.toml 을 읽도록
+
+import streamlit as st  # noqa: E402
+from streamlit import logger as st_logger  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import mindswitch_agg  # noqa: E402
+import mindswitch_utils as mu  # noqa: E402
+from bench_append_log import make_row  # noqa: E402
+
+SIZES = [0, 10_000, 100_000, 1_000_000]
+
+PRE_METRICS = {"rt": 0.8, "err": 2, "idea": 1}
+LAST_RESULT = {**make_row(0), "ts": None}
+
+
+def page_states(now: float) -> dict:
+    """페이지 → 그 화면에 들어갈 때의 세션 상태."""
+    timer = {"running": True, "timer_start": now, "timer_total": 25 * 60}
+    chosen = {"recommended_stim": "S2_AudioNoise", "recommend_reason": "exploit(학습된 최선 추천)",
+              "chosen_stim": "S2_AudioNoise", "rest_min": 3}
+    return {
+        "Home.py": {},
+        "pages/1_Work.py": {**timer},
+        "pages/2_Choose.py": {"pre_metrics": PRE_METRICS, "work_remaining_sec": 600},
+        "pages/3_Mind.py": {**timer, **chosen, "timer_total": 3 * 60,
+                            "pre_metrics": PRE_METRICS, "work_remaining_sec": 600},
+        "pages/4_Post.py": {**chosen, "pre_metrics": PRE_METRICS, "pre_easy": {"q1_pre": 2}},
+        "pages/5_Results.py": {"last_result": LAST_RESULT},
+    }
+
+
+def write_log(path: str, n: int, now: float):
+    """1분 간격, 마지막 행이 now 인 합성 로그(측정값/자극은 seed 고정 난수)."""
+    if n == 0:
+        return
+    rng = np.random.default_rng(0)
+    keys = np.array(list(mu.STIMULI))
+    df = pd.DataFrame({c: np.repeat(np.array([v], dtype=object), n) for c, v in make_row(0).items()})
+    df["ts"] = int(now) - 60 * np.arange(n - 1, -1, -1, dtype=np.int64)
+    df["recommended_stim"] = keys[rng.integers(0, len(keys), n)]
+    df["chosen_stim"] = np.where(rng.random(n) < 0.8, df["recommended_stim"], keys[rng.integers(0, len(keys), n)])
+    df["post_rt"] = np.round(rng.normal(0.7, 0.05, n), 3)
+    df["post_err"] = rng.integers(0, 4, n)
+    df["post_idea"] = rng.integers(0, 5, n)
+    mwi, d_rt, d_err, d_idea = mu.compute_mwi_batch(
+        df["pre_rt"], df["post_rt"], df["pre_err"], df["post_err"],
+        df["pre_idea"], df["post_idea"], df["rest_min"],
+    )
+    df["mwi"], df["d_rt"], df["d_err"], df["d_idea"] = mwi, d_rt, d_err, d_idea
+    df["easy_mwi"] = np.round(rng.normal(1.0, 0.8, n), 3)
+    df.to_csv(path, index=False)
+
+
+def clear_caches():
+    """프로세스 안의 로그 파생 캐시를 비운다(다음 실행이 cold 가 되도록)."""
+    with mu._log_cache_lock:
+        mu._log_cache.clear()
+    mindswitch_agg._file_cache.clear()
+    st.cache_data.clear()
+
+
+def open_page(page: str, state: dict) -> AppTest:
+    at = AppTest.from_file(str(ROOT / "Home.py"), default_timeout=600)
+    for k, v in state.items():
+        at.session_state[k] = v
+    return at.switch_page(page)
+
+
+def run_checked(at: AppTest):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def timed_ms(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1e3
+
+
+def traced(fn, *args) -> dict:
+    """fn 실행 중 최대 추가 메모리와 실행 후 남은 메모리/블록 수."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        blocks = sys.getallocatedblocks()
+        fn(*args)
+        current, peak = tracemalloc.get_traced_memory()
+        return {"peak_kib": (peak - base) / 1024, "retained_kib": (current - base) / 1024,
+                "retained_blocks": sys.getallocatedblocks() - blocks}
+    finally:
+        tracemalloc.stop()
+
+
+def bench_page(page: str, state: dict, runs: int) -> dict:
+    clear_caches()
+    at = open_page(page, state)
+    cold_ms = timed_ms(run_checked, at)
+    warm = [timed_ms(run_checked, at) for _ in range(runs)]
+    warm_mem = traced(run_checked, at)
+
+    clear_caches()
+    cold_mem = traced(run_checked, open_page(page, state))
+    return {
+        "cold_ms": cold_ms,
+        "warm_ms_median": float(np.median(warm)),
+        "warm_ms_p95": float(np.percentile(warm, 95)),
+        "cold_peak_kib": cold_mem["peak_kib"],
+        "warm_peak_kib": warm_mem["peak_kib"],
+        "warm_retained_kib": warm_mem["retained_kib"],
+        "warm_retained_blocks": warm_mem["retained_blocks"],
+    }
+
+
+def bench_functions(runs: int) -> dict:
+    clear_caches()
+    out = {"load_log_cold_ms": timed_ms(mu.load_log)}
+    out["load_log_warm_ms"] = float(np.median([timed_ms(mu.load_log) for _ in range(runs)]))
+    df = mu.load_log()
+    out["today_df_ms"] = float(np.median([timed_ms(mu.today_df, df) for _ in range(runs)]))
+    out["load_today_ms"] = float(np.median([timed_ms(mu.load_today) for _ in range(runs)]))
+    out["rebuild_aggregates_ms"] = timed_ms(mu.rebuild_aggregates)
+
+    def append_one():
+        mu.append_log({**make_row(0), "ts": int(time.time())})
+        mu.flush_log()
+    out["append_log_ms"] = float(np.median([timed_ms(append_one) for _ in range(runs)]))
+    out["load_log_peak_kib"] = traced(lambda: (clear_caches(), mu.load_log()))["peak_kib"]
+    return out
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def print_baseline(results: dict, baseline_path: str):
+    base = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    old = {(r["rows"], r["page"]): r for r in base["pages"]}
+    print(f"\nvs {baseline_path} (warm median / cold, new ÷ old)")
+    for r in results["pages"]:
+        o = old.get((r["rows"], r["page"]))
+        if o is None:
+            continue
+        print(f"{r['rows']:>9} {r['page']:<20} warm x{r['warm_ms_median'] / max(o['warm_ms_median'], 1e-9):.2f}"
+              f"  cold x{r['cold_ms'] / max(o['cold_ms'], 1e-9):.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    ap.add_argument("--pages", nargs="+", default=None, help="기본: Home.py 와 pages/ 전부")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--out", default="bench_pages.json")
+    ap.add_argument("--baseline", default=None, help="이전 결과 JSON 과 비교해 출력")
+    args = ap.parse_args()
+    st_logger.set_log_level("error")  # AppTest 마다 나오는 "No runtime found" 경고
+
+    pages = args.pages or ["Home.py"] + sorted(f"pages/{p.name}" for p in (ROOT / "pages").glob("*.py"))
+    results = {
+        "meta": {
+            "git": git_rev(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "streamlit": st.__version__, "pandas": pd.__version__, "numpy": np.__version__,
+            "log_backend": mu.LOG_BACKEND, "runs": args.runs,
+        },
+        "functions": {"render_noise_loop_white_ms": timed_ms(mu.render_noise_loop, "white")},
+        "pages": [],
+    }
+    mu.noise_wav("white")  # 노이즈 묶음은 배포 때 만들어 두는 것이라 미리 준비
+
+    print(f"{'rows':>9} {'page':<20} {'cold ms':>9} {'warm ms':>9} {'p95 ms':>9} {'peak KiB':>10} {'warm KiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            now = time.time()
+            mu.LOG_PATH = os.path.join(tmp, f"log_{n}.csv")
+            mu.LOG_AGG_DIR = os.path.join(tmp, f"agg_{n}")
+            mu.BANDIT_STATE_PATH = os.path.join(tmp, f"bandit_{n}.json")
+            write_log(mu.LOG_PATH, n, now)
+            mu.rebuild_aggregates()
+
+            states = page_states(now)
+            for page in pages:
+                r = {"rows": n, "page": page, **bench_page(page, states.get(page, {}), args.runs)}
+                results["pages"].append(r)
+                print(f"{n:>9} {page:<20} {r['cold_ms']:>9.1f} {r['warm_ms_median']:>9.1f} "
+                      f"{r['warm_ms_p95']:>9.1f} {r['cold_peak_kib']:>10.0f} {r['warm_peak_kib']:>9.0f}")
+            # append_log 이 로그를 늘리므로 페이지 측정 뒤에
+            results["functions"][str(n)] = bench_functions(args.runs)
+
+    print("\nfunctions")
+    print(json.dumps(results["functions"], indent=1))
+    Path(args.out).write_text(json.dumps(results, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(f"\nwrote {args.out}")
+    if args.baseline:
+        print_baseline(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
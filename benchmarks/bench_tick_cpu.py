@@ -0,0 +1,88 @@
+"""
+Work/Mind 화면의 1초 갱신 비용(서버 CPU) 벤치마크.
+
+N 개 세션이 T 초 동안 머무는 상황을 흉내 내어 세션-초당 CPU 시간을 잰다.
+- full    : 예전 방식. 매초 페이지 스크립트 전체(init_state, 사이드바, 버튼, 자극)를 다시 실행.
+- fragment: MINDSWITCH_CLIENT_TIMER=0 방식. 매초 countdown / 시간형 자극 fragment 영역만 다시 실행.
+기본(CLIENT_TIMER) 방식은 세션 중 서버 재실행이 없어 세션-초당 CPU 가 0 에 가깝다.
+
+AppTest 는 fragment 만 골라 다시 실행하는 API 가 없어서, fragment 쪽은
+fragment 본문만 담은 스크립트를 AppTest.from_function 으로 돌려 잰다.
+
+    python benchmarks/bench_tick_cpu.py --sessions 50 --ticks 10
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ["MINDSWITCH_CLIENT_TIMER"] = "0"
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+PAGES = {
+    "work": ("pages/1_Work.py", "S1_VisualPulse"),
+    "mind-breath": ("pages/3_Mind.py", "S3_BreathGuide"),
+    "mind-prompt": ("pages/3_Mind.py", "S4_ThoughtPrompt"),
+}
+
+
+def work_tick():
+    import mindswitch_utils as mu
+    mu.CLIENT_TIMER = False
+    mu.init_state("1_Work")
+    mu._countdown_fragment("남은 작업 시간", lambda: None)
+
+
+def mind_tick():
+    import streamlit as st
+    import mindswitch_utils as mu
+    mu.CLIENT_TIMER = False
+    mu.init_state("3_Mind")
+    mu._countdown_fragment("남은 멍때림 시간", lambda: None)
+    mu._timed_stimulus_fragment(st.session_state.chosen_stim)
+
+
+def seed(at: AppTest, stim: str) -> AppTest:
+    at.session_state["running"] = True
+    at.session_state["timer_start"] = time.time()
+    at.session_state["timer_total"] = 3600
+    at.session_state["chosen_stim"] = stim
+    at.session_state["rest_min"] = 3
+    return at
+
+
+def cpu_per_session_second(make, stim: str, sessions: int, ticks: int) -> float:
+    apps = [seed(make(), stim) for _ in range(sessions)]
+    for at in apps:
+        at.run()  # 첫 렌더(모듈 import 등)는 제외
+    t0 = time.process_time()
+    for _ in range(ticks):
+        for at in apps:
+            at.run()
+    return (time.process_time() - t0) / (sessions * ticks)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=50)
+    ap.add_argument("--ticks", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"{args.sessions} sessions x {args.ticks} ticks, CPU ms per session-second")
+    print(f"{'page':>12} {'full':>10} {'fragment':>10} {'ratio':>7}")
+    for name, (page, stim) in PAGES.items():
+        tick = work_tick if name == "work" else mind_tick
+        full = cpu_per_session_second(lambda: AppTest.from_file(str(ROOT / page), default_timeout=30),
+                                      stim, args.sessions, args.ticks)
+        frag = cpu_per_session_second(lambda: AppTest.from_function(tick, default_timeout=30),
+                                      stim, args.sessions, args.ticks)
+        print(f"{name:>12} {full * 1e3:>10.2f} {frag * 1e3:>10.2f} {full / frag:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
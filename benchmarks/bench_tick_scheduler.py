@@ -0,0 +1,123 @@
+"""
+초 단위 tick 방식 비교: 세션마다 잠자는 스레드 vs 프로세스 공용 스케줄러(mindswitch_ticks).
+
+N 개 세션이 각자 다른 시각(anchor)에 타이머를 시작했다고 보고 T 초 동안 초마다
+"화면 갱신(render, --render-ms 만큼 걸림)" 을 한다.
+- sleep    : 세션마다 스레드 하나가 render → time.sleep(1) 반복(예전 1_Work / 3_Mind 방식).
+             주기가 1초 + render 라 경계에서 점점 밀린다.
+- scheduler: TickScheduler 스레드 하나가 anchor + k초 경계마다 깨워 render 를
+             --workers 개짜리 풀(Streamlit 의 스크립트 실행 스레드 역할)에 넘긴다.
+잰 값:
+- threads       : 실행 중 최대 스레드 수
+- drift p50/p99 : 경계 시각 → render 시작(ms)
+- end drift     : 마지막 tick 의 밀림(ms, 누적되는지)
+- skipped       : 표시 값(남은 초)이 한 번에 2초 이상 줄어든 횟수
+
+    python benchmarks/bench_tick_scheduler.py --sessions 10 100 1000 --seconds 10
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ["MINDSWITCH_METRICS"] = "0"
+
+from mindswitch_ticks import TickScheduler  # noqa: E402
+
+
+class Recorder:
+    """세션별 (경계 대비 지연, 표시한 남은 초) 기록과 최대 스레드 수."""
+
+    def __init__(self, sessions: int):
+        self.lock = threading.Lock()
+        self.lags = [[] for _ in range(sessions)]
+        self.shown = [[] for _ in range(sessions)]
+        self.threads = threading.active_count()
+
+    def render(self, i: int, anchor: float, render_sec: float):
+        now = time.monotonic()
+        elapsed = now - anchor
+        with self.lock:
+            self.lags[i].append(elapsed - int(elapsed))  # 지난 초 경계로부터 얼마나 늦었나
+            self.shown[i].append(int(elapsed))
+            self.threads = max(self.threads, threading.active_count())
+        time.sleep(render_sec)
+
+    def summary(self) -> dict:
+        lags = np.concatenate([np.asarray(x) for x in self.lags if x]) * 1e3
+        end = [x[-1] * 1e3 for x in self.lags if x]
+        skipped = sum(int((np.diff(s) > 1).sum()) for s in self.shown if len(s) > 1)
+        return {"threads": self.threads, "p50": float(np.percentile(lags, 50)),
+                "p99": float(np.percentile(lags, 99)), "end": float(np.mean(end)), "skipped": skipped}
+
+
+def run_sleep(sessions: int, seconds: float, render_sec: float) -> dict:
+    rec = Recorder(sessions)
+    start = time.monotonic() + 0.5
+    anchors = [start + random.random() for _ in range(sessions)]
+    stop = start + 1 + seconds
+
+    def loop(i):
+        time.sleep(max(0.0, anchors[i] - time.monotonic()))
+        while time.monotonic() < stop:
+            rec.render(i, anchors[i], render_sec)
+            time.sleep(1)
+
+    threads = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return rec.summary()
+
+
+def run_scheduler(sessions: int, seconds: float, render_sec: float, workers: int) -> dict:
+    rec = Recorder(sessions)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    start = time.monotonic() + 0.5
+    anchors = [start + random.random() for _ in range(sessions)]
+
+    def fire(key, due):
+        pool.submit(rec.render, key, anchors[key], render_sec)
+        return True
+
+    ticks = TickScheduler(fire, name="bench-ticks")
+    for i, a in enumerate(anchors):
+        ticks.schedule(i, a - 1, a + seconds)  # a 에서 첫 tick
+    time.sleep(start + 1 + seconds - time.monotonic())
+    pool.shutdown(wait=True)
+    return rec.summary()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--render-ms", type=float, default=20, help="한 번 다시 그리는 데 걸리는 시간")
+    ap.add_argument("--workers", type=int, default=32, help="scheduler 쪽 render 스레드 수")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    random.seed(args.seed)
+
+    print(f"{args.seconds:g}s, render {args.render_ms:g} ms")
+    print(f"{'mode':>10} {'sessions':>8} {'threads':>8} {'p50 ms':>8} {'p99 ms':>8} {'end ms':>8} {'skipped':>8}")
+    for n in args.sessions:
+        for mode in ("sleep", "scheduler"):
+            if mode == "sleep":
+                r = run_sleep(n, args.seconds, args.render_ms / 1e3)
+            else:
+                r = run_scheduler(n, args.seconds, args.render_ms / 1e3, args.workers)
+            print(f"{mode:>10} {n:>8} {r['threads']:>8} {r['p50']:>8.1f} {r['p99']:>8.1f} "
+                  f"{r['end']:>8.1f} {r['skipped']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+동시 세션 부하 생성기.
+
+서버 하나가 Work/Mind 세션을 몇 개까지 1초 tick 이 밀리지 않고 버티는지 본다.
+가상 사용자 N 명이 Setup → Work → Choose → Mind → Post → Results 를 끝까지 진행한다.
+사용자들은 AppTest 세션이다.
+
+- 프로세스 하나 = 서버 하나. AppTest 는 전역 Runtime 을 바꿔 쓰므로 한 프로세스에서
+  실행은 한 번에 하나뿐이다(Streamlit 서버도 GIL 때문에 사실상 CPU 하나).
+  그 프로세스에 배정된 세션들은 마감 시각 순 스케줄러가 차례로 재실행한다.
+- --procs P 면 P 개 서버로 나눈다(로그/밴딧 상태 파일은 모두 공유).
+- tick:
+  - server: MINDSWITCH_CLIENT_TIMER=0 처럼 1초 경계마다 재실행한다.
+    AppTest 는 fragment 만 따로 돌릴 수 없어 페이지 전체를 재실행하므로 실제보다 비싸다(상한).
+  - client: 기본 설정처럼 마감 때만 재실행한다.
+
+재는 것:
+- 재실행 지연 p50/p90/p99/max (페이지별, 전체)
+- tick 지연(lag): 예정된 1초 경계(timer_start + k초)보다 재실행이 늦게 끝난 시간.
+  화면의 남은 시간(remaining_seconds())이 그만큼 늦게 바뀐다. 건너뛴 초 수도 센다.
+- 전환 지연: 타이머 마감 → 다음 페이지가 그려질 때까지
+- 프로세스별 CPU 시간, 최대 RSS(세션당 값은 프로세스 값 / 세션 수)
+
+    python benchmarks/load_sessions.py --users 1 5 10 20 --work-sec 10 --rest-sec 10
+    python benchmarks/load_sessions.py --users 40 --procs 2 --tick client --out load.json
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+HOME = str(ROOT / "Home.py")
+
+
+# ---------------------------
+# Worker (서버 하나)
+# ---------------------------
+def _init_worker(tmp: str, tick: str):
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+    # 설정 파일을 읽을 때 로그 레벨이 다시 정해지므로 환경 변수로(bare mode 경고 숨김)
+    os.environ["STREAMLIT_LOGGER_LEVEL"] = "error"
+    import mindswitch_utils as mu
+    mu.LOG_PATH = os.path.join(tmp, "log.csv")
+    mu.LOG_AGG_DIR = os.path.join(tmp, "agg")
+    mu.BANDIT_STATE_PATH = os.path.join(tmp, "bandit.json")
+    mu.CLIENT_TIMER = tick == "client"
+    mu.noise_wav("white")  # 노이즈 묶음은 배포 때 만들어 둔다
+
+
+def _rss_kib() -> int:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _shown_remaining(at):
+    """server tick 화면의 '⏱️ ...: **mm:ss**' 에서 남은 초. 없으면 None."""
+    for el in at.info:
+        text = el.value
+        if text.startswith("⏱️") and "**" in text:
+            mm, ss = text.split("**")[1].split(":")
+            return int(mm) * 60 + int(ss)
+    return None
+
+
+class _Recorder:
+    def __init__(self):
+        self.reruns = []   # (page, ms)
+        self.lags = []     # tick 지연 ms
+        self.transitions = []  # 마감 → 다음 페이지 ms
+        self.skipped = 0
+
+    def run(self, page: str, fn) -> float:
+        t0 = time.time()
+        at = fn().run()  # AppTest 나 위젯(click/set_value 결과). 둘 다 run() 은 AppTest 를 돌려준다
+        t1 = time.time()
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].message}")
+        self.reruns.append((page, (t1 - t0) * 1e3))
+        return t1
+
+
+def _countdown(at, rec: _Recorder, page: str, seconds: int, tick: str):
+    """
+    타이머 화면(Work/Mind). timer_total 을 seconds 로 줄여 두고, server tick 이면
+    1초 경계마다, client 면 마감 때만 재실행한다. 마감 재실행에서 다음 페이지로 넘어간다.
+    """
+    at.session_state["timer_total"] = seconds
+    start = at.session_state["timer_start"]
+    deadline = start + seconds
+    k, last_shown = 1, seconds
+    while True:
+        due = start + k if tick == "server" else deadline
+        yield due
+        done = rec.run(page, lambda: at)
+        if not at.session_state["running"]:
+            rec.transitions.append((done - deadline) * 1e3)
+            return
+        rec.lags.append((done - due) * 1e3)
+        shown = _shown_remaining(at)
+        if shown is not None:
+            rec.skipped += max(0, last_shown - shown - 1)
+            last_shown = shown
+        k = max(k + 1, int(time.time() - start) + 1)
+
+
+def session_flow(uid: int, cfg: dict, rec: _Recorder):
+    """가상 사용자 한 명. 다음에 깨울 시각(time.time())을 yield 한다."""
+    from streamlit.testing.v1 import AppTest
+    import mindswitch_utils as mu
+    rng = random.Random(cfg["seed"] * 100_003 + uid)
+    think = cfg["think_sec"]
+
+    at = AppTest.from_file(HOME, default_timeout=120)
+    rec.run("Home", lambda: at)
+    yield time.time() + think * rng.random()
+
+    at.number_input[0].set_value(round(rng.uniform(0.5, 1.0), 2))
+    at.number_input[1].set_value(rng.randint(0, 4))
+    at.number_input[2].set_value(rng.randint(0, 4))
+    rec.run("Home", lambda: _button(at, "🚀 Work 모드 시작"))
+    yield from _countdown(at, rec, "Work", cfg["work_sec"], cfg["tick"])
+
+    yield time.time() + think
+    at.selectbox[0].set_value(rng.choice(list(mu.STIMULI)))
+    rec.run("Choose", lambda: at)
+    yield time.time() + think
+    rec.run("Choose", lambda: _button(at, "😶‍🌫️ 멍때림 시작"))
+    yield from _countdown(at, rec, "Mind", cfg["rest_sec"], cfg["tick"])
+
+    yield time.time() + think
+    at.number_input[0].set_value(round(rng.uniform(0.4, 1.0), 2))
+    at.number_input[1].set_value(rng.randint(0, 4))
+    at.number_input[2].set_value(rng.randint(0, 6))
+    rec.run("Post", lambda: _button(at, "💾 저장하고 결과 보기"))
+
+
+def _button(at, label: str):
+    for b in at.button:
+        if b.label == label:
+            return b.click()
+    raise LookupError(label)
+
+
+def run_server(uids: list, cfg: dict) -> dict:
+    """한 프로세스(서버)에서 uids 세션들을 마감 시각 순으로 돌린다."""
+    rec = _Recorder()
+    cpu0, wall0 = os.times(), time.time()
+    rss0 = _rss_kib()
+    rss_peak = rss0
+
+    heap = []
+    for i, uid in enumerate(uids):
+        gen = session_flow(uid, cfg, rec)
+        heapq.heappush(heap, (cfg["start_at"] + cfg["ramp_sec"] * uid / max(1, cfg["users"]), i, gen))
+    while heap:
+        due, i, gen = heapq.heappop(heap)
+        wait = due - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            heapq.heappush(heap, (next(gen), i, gen))
+        except StopIteration:
+            pass
+        rss_peak = max(rss_peak, _rss_kib())
+
+    cpu1 = os.times()
+    return {
+        "sessions": len(uids),
+        "reruns": rec.reruns, "lags": rec.lags, "transitions": rec.transitions, "skipped": rec.skipped,
+        "cpu_sec": (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system),
+        "wall_sec": time.time() - wall0,
+        "rss_start_kib": rss0, "rss_peak_kib": rss_peak,
+    }
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def _pct(values) -> dict:
+    if not len(values):
+        return {}
+    v = np.asarray(values, dtype=np.float64)
+    return {"n": int(v.size), "p50": float(np.percentile(v, 50)), "p90": float(np.percentile(v, 90)),
+            "p99": float(np.percentile(v, 99)), "max": float(v.max())}
+
+
+def run_level(users: int, args) -> dict:
+    procs = max(1, min(args.procs, users))
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.log_rows:
+            sys.path.insert(0, str(ROOT / "benchmarks"))
+            from bench_pages import write_log
+            write_log(os.path.join(tmp, "log.csv"), args.log_rows, time.time())
+        cfg = {
+            "users": users, "tick": args.tick, "work_sec": args.work_sec, "rest_sec": args.rest_sec,
+            "think_sec": args.think_sec, "ramp_sec": args.ramp_sec, "seed": args.seed,
+            # 워커 import 가 끝난 뒤 다 같이 시작
+            "start_at": time.time() + args.warmup_sec,
+        }
+        shards = [list(range(users))[p::procs] for p in range(procs)]
+        with ProcessPoolExecutor(procs, initializer=_init_worker, initargs=(tmp, args.tick)) as ex:
+            servers = list(ex.map(run_server, shards, [cfg] * procs))
+
+    reruns = [r for s in servers for r in s["reruns"]]
+    by_page = {}
+    for page, ms in reruns:
+        by_page.setdefault(page, []).append(ms)
+    return {
+        "users": users, "procs": procs, "tick": args.tick,
+        "rerun_ms": _pct([ms for _, ms in reruns]),
+        "rerun_ms_by_page": {p: _pct(v) for p, v in sorted(by_page.items())},
+        "tick_lag_ms": _pct([x for s in servers for x in s["lags"]]),
+        "transition_ms": _pct([x for s in servers for x in s["transitions"]]),
+        "skipped_seconds": sum(s["skipped"] for s in servers),
+        "servers": [{k: v for k, v in s.items() if k not in ("reruns", "lags", "transitions")}
+                    | {"cpu_sec_per_session": s["cpu_sec"] / max(1, s["sessions"]),
+                       "cpu_util": s["cpu_sec"] / max(s["wall_sec"], 1e-9),
+                       "rss_kib_per_session": (s["rss_peak_kib"] - s["rss_start_kib"]) / max(1, s["sessions"])}
+                    for s in servers],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 동시 세션 부하 생성기")
+    ap.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 20], help="동시 사용자 수(여러 개면 차례로)")
+    ap.add_argument("--procs", type=int, default=1, help="서버 프로세스 수")
+    ap.add_argument("--tick", choices=["server", "client"], default="server")
+    ap.add_argument("--work-sec", type=int, default=10)
+    ap.add_argument("--rest-sec", type=int, default=10)
+    ap.add_argument("--think-sec", type=float, default=1.0, help="버튼/입력 사이 대기")
+    ap.add_argument("--ramp-sec", type=float, default=2.0, help="사용자 시작 시각을 이 구간에 흩뿌린다")
+    ap.add_argument("--warmup-sec", type=float, default=5.0)
+    ap.add_argument("--log-rows", type=int, default=0, help="미리 채워 둘 합성 로그 행 수")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="결과 JSON 경로")
+    args = ap.parse_args()
+
+    print(f"tick={args.tick} procs={args.procs} work={args.work_sec}s rest={args.rest_sec}s")
+    print(f"{'users':>6} {'rerun p50':>10} {'p99':>8} {'lag p50':>8} {'lag p99':>8} {'lag max':>8} "
+          f"{'skip':>5} {'trans p99':>10} {'cpu/sess s':>11} {'cpu%':>5} {'rss/sess MiB':>13}")
+    levels = []
+    for users in args.users:
+        r = run_level(users, args)
+        levels.append(r)
+        lag, rr, tr = r["tick_lag_ms"], r["rerun_ms"], r["transition_ms"]
+        cpu = np.mean([s["cpu_sec_per_session"] for s in r["servers"]])
+        util = max(s["cpu_util"] for s in r["servers"])
+        rss = np.mean([s["rss_kib_per_session"] for s in r["servers"]]) / 1024
+        print(f"{users:>6} {rr.get('p50', 0):>10.1f} {rr.get('p99', 0):>8.1f} {lag.get('p50', 0):>8.1f} "
+              f"{lag.get('p99', 0):>8.1f} {lag.get('max', 0):>8.1f} {r['skipped_seconds']:>5} "
+              f"{tr.get('p99', 0):>10.1f} {cpu:>11.2f} {util * 100:>5.0f} {rss:>13.1f}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"args": vars(args), "levels": levels}, ensure_ascii=False, indent=1),
+                                  encoding="utf-8")
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
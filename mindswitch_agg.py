@@ -0,0 +1,364 @@
+"""
+자극별 누적 통계(저장 시점에 갱신).
+
+append_log 가 커밋할 때마다 AGG_SPECS 의 (지표, 묶는 컬럼) 별로
+count / sum / 평균 / M2(Welford)를 전체(overall), 날짜별(day), 주별(week, 월요일 시작),
+달별(month)로 갱신해 LOG_AGG_DIR 에 저장한다.
+
+    LOG_AGG_DIR/overall.json
+    LOG_AGG_DIR/day-YYYY-MM-DD.json
+    LOG_AGG_DIR/week-YYYY-MM-DD.json   (그 주 월요일)
+    LOG_AGG_DIR/month-YYYY-MM.json
+
+파일 하나는 {name: {group: {"n", "sum", "mean", "m2"}}} 모양이다. name 은 chosen_stim 으로
+묶으면 지표 이름 그대로("mwi"), 다른 컬럼이면 "mwi@rest_min" 처럼 붙인다.
+오늘 자극별 평균은 로그를 읽지 않고 O(#자극)으로, 기간별 추이는 주/달 파일 수만큼 읽어 나온다.
+MWI 가중치 바꿔보기(mwi_what_if)도 자극별 MWI 항(MWI_TERMS)의 합만 읽는다.
+AGG_VERSION 이 바뀌면(항목 추가) exists() 가 False 가 되어 다음 저장 때 한 번 다시 만든다.
+
+원본 로그에서 다시 계산하고 저장된 값과 맞는지 확인:
+    python mindswitch_agg.py rebuild --check
+"""
+import argparse
+import glob
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+AGG_METRICS = ["mwi", "easy_mwi"]
+# 로그 컬럼이 아니라 행에서 만드는 항: 이름 → 변화량 컬럼. 값은 변화량 / max(1, rest_min).
+# MWI 는 가중치에 대해 선형이라(mwi = w · (d_rt, d_err, d_idea) / rest) 자극별 항의 합만 있으면
+# 다른 가중치의 평균을 로그 없이 계산할 수 있다. 정량 MWI 가 있는 행만, 빈 변화량은 0(compute_mwi 와 같게).
+MWI_TERMS = {"mwi_term_rt": "d_rt", "mwi_term_err": "d_err", "mwi_term_idea": "d_idea"}
+# (지표, 묶는 컬럼). 작업/휴식 시간은 자극별 합(분)과 세션 수, MWI 는 시간 설정별로도 본다.
+AGG_SPECS = [(m, "chosen_stim") for m in AGG_METRICS] + [
+    ("work_min", "chosen_stim"), ("rest_min", "chosen_stim"),
+    ("mwi", "work_min"), ("mwi", "rest_min"),
+] + [(t, "chosen_stim") for t in MWI_TERMS]
+AGG_VERSION = 3
+OVERALL = "overall"
+PERIODS = ("day", "week", "month")
+_VERSION_FILE = "VERSION"
+
+
+def _path(root: str, scope: str) -> str:
+    return os.path.join(root, f"{scope}.json")
+
+
+def spec_name(metric: str, by: str) -> str:
+    return metric if by == "chosen_stim" else f"{metric}@{by}"
+
+
+def day_scope(day: date) -> str:
+    return f"day-{day.isoformat()}"
+
+
+def week_scope(day: date) -> str:
+    return f"week-{(day - timedelta(days=day.weekday())).isoformat()}"
+
+
+def month_scope(day: date) -> str:
+    return f"month-{day:%Y-%m}"
+
+
+def row_scopes(day: date) -> list:
+    """그 날짜의 행이 더해지는 기간 scope(day, week, month)."""
+    return [day_scope(day), week_scope(day), month_scope(day)]
+
+
+def scope_start(scope: str) -> date:
+    """"week-2026-10-12" → 2026-10-12, "month-2026-10" → 2026-10-01."""
+    period, _, rest = scope.partition("-")
+    return date.fromisoformat(rest + "-01" if period == "month" else rest)
+
+
+def load(root: str, scope: str) -> dict:
+    path = _path(root, scope)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(root: str, scope: str, agg: dict):
+    os.makedirs(root, exist_ok=True)
+    path = _path(root, scope)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # json.dump 는 순수 파이썬 인코더를 쓴다. dumps(C 인코더)가 몇 배 빠르다.
+        f.write(json.dumps(agg, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def exists(root: str) -> bool:
+    """지금 버전(AGG_VERSION)으로 만든 누적 통계가 있나."""
+    if not os.path.exists(_path(root, OVERALL)):
+        return False
+    try:
+        with open(os.path.join(root, _VERSION_FILE), "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0) == AGG_VERSION
+    except (OSError, ValueError):
+        return False
+
+
+def invalidate(root: str):
+    """누적 통계를 낡은 것으로 표시한다(VERSION 을 지워 exists() 가 False → 다음에 rebuild)."""
+    try:
+        os.remove(os.path.join(root, _VERSION_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def _save_version(root: str):
+    with open(os.path.join(root, _VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(str(AGG_VERSION))
+
+
+def scopes(root: str, prefix: str = "") -> list:
+    pattern = os.path.join(root, f"{prefix}*.json")
+    return sorted(os.path.basename(p)[:-5] for p in glob.glob(pattern))
+
+
+def _welford(cell: dict, x: float):
+    n = cell["n"] + 1
+    delta = x - cell["mean"]
+    mean = cell["mean"] + delta / n
+    cell["m2"] += delta * (x - mean)
+    cell["n"], cell["mean"] = n, mean
+    cell["sum"] += x
+
+
+def _label(v):
+    """묶는 컬럼 값 → 문자열 키(25.0 → "25"). 결측이면 None."""
+    if v is None:
+        return None
+    if isinstance(v, (float, np.floating)):
+        if np.isnan(v):
+            return None
+        if float(v).is_integer():
+            return str(int(v))
+    if isinstance(v, np.integer):
+        return str(int(v))
+    return str(v)
+
+
+def _number(v):
+    """숫자면 float, 비었거나 숫자가 아니면 None."""
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(x) else x
+
+
+def row_mwi_terms(row: dict) -> dict:
+    """행 하나의 MWI_TERMS 값(정량 MWI 가 없으면 빈 dict)."""
+    if _number(row.get("mwi")) is None:
+        return {}
+    rest = max(1.0, _number(row.get("rest_min")) or 1.0)
+    return {t: (_number(row.get(d)) or 0.0) / rest for t, d in MWI_TERMS.items()}
+
+
+def with_mwi_terms(df: pd.DataFrame) -> pd.DataFrame:
+    """df 에 MWI_TERMS 컬럼을 붙인 것(정량 MWI 가 없는 행은 NaN)."""
+    if df.empty or "mwi" not in df.columns:
+        return df
+    has = pd.to_numeric(df["mwi"], errors="coerce").astype("float64").notna().to_numpy()
+    rest = np.ones(len(df))
+    if "rest_min" in df.columns:
+        rest = np.fmax(1.0, pd.to_numeric(df["rest_min"], errors="coerce").astype("float64").to_numpy())
+    terms = {}
+    for t, d in MWI_TERMS.items():
+        v = np.zeros(len(df))
+        if d in df.columns:
+            v = np.nan_to_num(pd.to_numeric(df[d], errors="coerce").astype("float64").to_numpy())
+        terms[t] = np.where(has, v / rest, np.nan)
+    return df.assign(**terms)
+
+
+def update(agg: dict, rows: list) -> dict:
+    """rows(로그 행 dict 목록)를 agg 에 더한다(Welford)."""
+    for row in rows:
+        terms = row_mwi_terms(row)
+        for metric, by in AGG_SPECS:
+            group = _label(row.get(by))
+            x = terms.get(metric) if metric in MWI_TERMS else row.get(metric)
+            if group is None or x is None:
+                continue
+            try:
+                x = float(x)
+            except (TypeError, ValueError):
+                continue
+            if np.isnan(x):
+                continue
+            cell = agg.setdefault(spec_name(metric, by), {}).setdefault(
+                group, {"n": 0, "sum": 0.0, "mean": 0.0, "m2": 0.0}
+            )
+            _welford(cell, x)
+    return agg
+
+
+def _grouped(df: pd.DataFrame, scope: np.ndarray, scope_names: list) -> dict:
+    """
+    scope(행마다 scope_names 의 번호)별 agg 를 한 번에 계산한다.
+    spec 마다 (scope, group) 번호로 bincount 해서 n / sum 을 구하고 m2 는 평균을 뺀 두 번째 합.
+    """
+    out = {}
+    if df.empty:
+        return out
+    for metric, by in AGG_SPECS:
+        if metric not in df.columns or by not in df.columns:
+            continue
+        vals = pd.to_numeric(df[metric], errors="coerce").astype("float64").to_numpy()
+        codes, uniques = pd.factorize(df[by])
+        ok = ~np.isnan(vals) & (codes >= 0)
+        if not ok.any():
+            continue
+        groups = [_label(u) for u in uniques]
+        key = scope[ok] * len(groups) + codes[ok]
+        x = vals[ok]
+        size = len(scope_names) * len(groups)
+        n = np.bincount(key, minlength=size)
+        total = np.bincount(key, weights=x, minlength=size)
+        mean = np.divide(total, n, out=np.zeros(size), where=n > 0)
+        m2 = np.bincount(key, weights=(x - mean[key]) ** 2, minlength=size)
+        name = spec_name(metric, by)
+        for k in np.flatnonzero(n):
+            sc, g = divmod(int(k), len(groups))
+            out.setdefault(scope_names[sc], {}).setdefault(name, {})[groups[g]] = {
+                "n": int(n[k]), "sum": float(total[k]), "mean": float(mean[k]), "m2": float(m2[k]),
+            }
+    return out
+
+
+def diff(a: dict, b: dict, rtol: float = 1e-4, atol: float = 1e-6) -> list:
+    """두 agg 가 다른 항목 목록(빈 목록이면 일치). 로그가 float32 라 허용오차를 둔다."""
+    out = []
+    for metric in sorted(set(a) | set(b)):
+        sa, sb = a.get(metric, {}), b.get(metric, {})
+        for stim in sorted(set(sa) | set(sb)):
+            ca, cb = sa.get(stim), sb.get(stim)
+            if ca is None or cb is None or ca["n"] != cb["n"]:
+                out.append(f"{metric}/{stim}: n {ca and ca['n']} != {cb and cb['n']}")
+                continue
+            for k in ("sum", "mean", "m2"):
+                if not np.isclose(ca[k], cb[k], rtol=rtol, atol=atol):
+                    out.append(f"{metric}/{stim}: {k} {ca[k]:.6g} != {cb[k]:.6g}")
+    return out
+
+
+def _scoped(df: pd.DataFrame, day_of) -> dict:
+    """df 의 전체/날짜별/주별/달별 agg {scope: agg}."""
+    df = with_mwi_terms(df)
+    fresh = {OVERALL: _grouped(df, np.zeros(len(df), dtype=np.int64), [OVERALL]).get(OVERALL, {})}
+    if not df.empty and "ts" in df.columns:
+        day_codes, days = pd.factorize(day_of(df["ts"]))
+        for to_scope in (day_scope, week_scope, month_scope):
+            names, inverse = np.unique([to_scope(d) for d in days], return_inverse=True)
+            fresh.update(_grouped(df, inverse[day_codes], list(names)))
+    return fresh
+
+
+def merge(agg: dict, other: dict) -> dict:
+    """other 의 셀을 agg 에 합친다(두 묶음의 n / mean / M2 를 한 번에 합치는 Chan 공식)."""
+    for name, cells in other.items():
+        dst = agg.setdefault(name, {})
+        for group, b in cells.items():
+            a = dst.get(group)
+            if a is None or a["n"] == 0:
+                dst[group] = dict(b)
+                continue
+            n = a["n"] + b["n"]
+            delta = b["mean"] - a["mean"]
+            a["m2"] += b["m2"] + delta * delta * a["n"] * b["n"] / n
+            a["mean"] += delta * b["n"] / n
+            a["sum"] += b["sum"]
+            a["n"] = n
+    return agg
+
+
+def add_frame(root: str, df: pd.DataFrame, day_of):
+    """새로 들어온 행 df 를 저장된 agg 에 더한다(행 단위 update 대신 scope 별로 한 번에)."""
+    for scope, agg in _scoped(df, day_of).items():
+        save(root, scope, merge(load(root, scope), agg))
+
+
+def rebuild(root: str, df: pd.DataFrame, day_of, check: bool = False) -> list:
+    """
+    원본 로그 df 로 전체/날짜별 agg 를 다시 계산해 저장한다.
+    check=True 면 저장하기 전에 기존 파일과 비교한 불일치 목록을 돌려준다.
+    day_of: ts(epoch 초) Series → 로컬 date Series.
+    """
+    fresh = _scoped(df, day_of)
+
+    problems = []
+    if check:
+        for scope in sorted(set(fresh) | set(scopes(root))):
+            for p in diff(load(root, scope), fresh.get(scope, {})):
+                problems.append(f"{scope}: {p}")
+
+    for scope in scopes(root):
+        if scope not in fresh:
+            os.remove(_path(root, scope))
+    for scope, agg in fresh.items():
+        save(root, scope, agg)
+    _save_version(root)
+    return problems
+
+
+# ---------------------------
+# 기간별 추이
+# ---------------------------
+_file_cache = {}  # path -> ((mtime_ns, size), agg)
+
+
+def load_cached(root: str, scope: str) -> dict:
+    """load 와 같지만 파일이 그대로면 지난번 읽은 값을 쓴다(돌려준 값은 고치지 않는다)."""
+    path = _path(root, scope)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _file_cache.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    agg = load(root, scope)
+    _file_cache[path] = (key, agg)
+    return agg
+
+
+def history(root: str, period: str) -> pd.DataFrame:
+    """
+    period("day" / "week" / "month") scope 전부를 긴 표로:
+    start(기간 첫 날), name, group, n, sum, mean, m2. 바뀐 파일만 다시 읽는다.
+    """
+    rows = []
+    for scope in scopes(root, f"{period}-"):
+        start = scope_start(scope)
+        for name, cells in load_cached(root, scope).items():
+            for group, c in cells.items():
+                rows.append((start, name, group, c["n"], c["sum"], c["mean"], c["m2"]))
+    return pd.DataFrame(rows, columns=["start", "name", "group", "n", "sum", "mean", "m2"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 자극별 누적 통계")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rebuild", help="원본 로그에서 다시 계산해 저장")
+    r.add_argument("--check", action="store_true", help="기존 값과 비교해 불일치를 출력")
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        import mindswitch_utils
+        problems = mindswitch_utils.rebuild_aggregates(check=args.check)
+        if args.check:
+            print("\n".join(problems) if problems else "aggregates match the log")
+        raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+여러 기기/서버에서 내려받은 로그 CSV 를 한 저장소로 합친다.
+
+"⬇️ 전체 로그 CSV 다운로드" 로 받은 파일(ts 가 로컬 ISO 시각, .csv.gz 도 가능)과
+서버의 mindwand_log.csv 원본(ts 가 epoch 초) 모두 받는다.
+
+1. 헤더만 먼저 읽어 컬럼 합집합을 만든다(예전 파일에는 easy_* 가 없다).
+2. 파일을 묶음으로 나눠 프로세스 여러 개에서 load_log 와 같은 타입(LOG_SCHEMA)으로 읽고,
+   없는 컬럼은 결측으로 채워 같은 모양으로 맞춘다.
+3. ts + 나머지 전체 내용의 행 해시(pandas.util.hash_pandas_object, 64bit)로
+   파일끼리, 그리고 이미 저장소에 있는 행과 겹치는 것을 뺀다.
+4. 남은 행을 ts 순으로 정렬해 append_log_frame 으로 한 번에 쓴다
+   (누적 통계와 밴딧 상태도 한 번에 더한다).
+
+    python mindswitch_import.py merge exports/ other_server/mindwand_log.csv
+    python mindswitch_import.py merge --workers 4 --dry-run exports/*.csv.gz
+"""
+import argparse
+import csv
+import glob
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+PATTERNS = ("*.csv", "*.csv.gz")
+
+
+def expand_paths(paths: list) -> list:
+    """파일은 그대로, 디렉터리는 그 아래(하위 포함)의 *.csv / *.csv.gz 로 바꾼다(정렬, 중복 제거)."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            for pattern in PATTERNS:
+                out.extend(glob.glob(os.path.join(p, "**", pattern), recursive=True))
+        else:
+            out.append(p)
+    return sorted(dict.fromkeys(os.path.abspath(p) for p in out))
+
+
+def read_header(path: str) -> list:
+    """첫 줄만 읽은 컬럼 목록(파일마다 read_csv 를 띄우지 않는다)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8-sig", newline="") as f:
+        return next(csv.reader([f.readline()]), [])
+
+
+def union_columns(headers) -> list:
+    """LOG_SCHEMA 순서를 먼저, 그 밖의 컬럼은 처음 나온 순서로."""
+    import mindswitch_utils
+    seen = dict.fromkeys(c for h in headers for c in h)
+    return [c for c in mindswitch_utils.LOG_SCHEMA if c in seen] + \
+        [c for c in seen if c not in mindswitch_utils.LOG_SCHEMA and c != "ts_dt"]
+
+
+def _log_headers(files: list) -> tuple:
+    """({path: 컬럼}, 실패 목록). ts 컬럼이 없는 파일은 로그가 아니므로 뺀다(컬럼 합집합에도 안 넣는다)."""
+    headers, failed = {}, []
+    for p in files:
+        try:
+            h = read_header(p)
+        except Exception as e:
+            failed.append((p, f"{type(e).__name__}: {e}"))
+            continue
+        if "ts" in h:
+            headers[p] = h
+        else:
+            failed.append((p, "ts 컬럼 없음"))
+    return headers, failed
+
+
+# ---------------------------
+# 읽기 / 맞추기
+# ---------------------------
+def _missing(column: str, n: int) -> pd.Series:
+    """길이 n 의 결측 컬럼(LOG_SCHEMA 타입으로, 모르는 컬럼은 object)."""
+    import mindswitch_utils
+    dtype = mindswitch_utils.LOG_SCHEMA.get(column, "object")
+    if dtype == "category":
+        return pd.Series(pd.Categorical.from_codes(np.full(n, -1), categories=[]))
+    return pd.Series(pd.NA if dtype != "float32" else np.nan, index=range(n), dtype=dtype)
+
+
+def align(frames: list, columns: list) -> pd.DataFrame:
+    """frames 를 columns 모양으로 맞춰 이어 붙인다. category 컬럼은 범주를 합쳐 category 로 유지."""
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    cats = {}
+    for c in columns:
+        parts = [f[c] for f in frames if c in f.columns and isinstance(f[c].dtype, pd.CategoricalDtype)]
+        if parts:
+            cats[c] = union_categoricals([p.cat.remove_unused_categories() for p in parts]).categories
+    out = []
+    for f in frames:
+        cols = {}
+        for c in columns:
+            if c in cats:
+                s = f[c] if c in f.columns else _missing(c, len(f))
+                cols[c] = pd.Categorical(s.astype("category"), categories=cats[c])
+            elif c in f.columns:
+                cols[c] = f[c].to_numpy() if f[c].dtype == object else f[c].array
+            else:
+                cols[c] = _missing(c, len(f)).array
+        out.append(pd.DataFrame(cols))
+    import mindswitch_utils
+    return mindswitch_utils._apply_log_schema(pd.concat(out, ignore_index=True))
+
+
+def _read_raw(path: str, columns: list) -> pd.DataFrame:
+    """로그 CSV 하나를 읽어 ts 만 epoch 초로 바꾸고 columns 모양으로(없는 컬럼은 NaN)."""
+    import mindswitch_utils
+    df = pd.read_csv(path, dtype=mindswitch_utils._LOG_READ_DTYPES)
+    if "ts" not in df.columns:
+        raise ValueError("ts 컬럼 없음")
+    df["ts"] = mindswitch_utils._ts_to_epoch(df["ts"])
+    return df.reindex(columns=columns)
+
+
+def _read_batch(paths: list, columns: list) -> tuple:
+    """
+    (LOG_SCHEMA 타입으로 맞춘 표, 실패한 파일 [(path, 오류)]). 프로세스 풀 작업 단위.
+    작은 파일이 많으므로 타입 변환은 파일마다 하지 않고 이어 붙인 뒤 한 번만 한다.
+    """
+    import mindswitch_utils
+    frames, failed = [], []
+    for p in paths:
+        try:
+            frames.append(_read_raw(p, columns))
+        except Exception as e:
+            failed.append((p, f"{type(e).__name__}: {e}"))
+    if not frames:
+        return pd.DataFrame(columns=columns), failed
+    return mindswitch_utils._apply_log_schema(pd.concat(frames, ignore_index=True)), failed
+
+
+def read_logs(paths: list, workers: int = None, columns: list = None) -> tuple:
+    """
+    paths 를 workers 개 프로세스에서 나눠 읽어 하나의 표로. (표, 실패 목록).
+    workers 가 1 이면(또는 파일이 하나면) 이 프로세스에서 읽는다.
+    """
+    workers = workers or os.cpu_count() or 1
+    if columns is None:
+        columns = union_columns(read_header(p) for p in paths)
+    if workers <= 1 or len(paths) <= 1:
+        return _read_batch(paths, columns)
+    # 한 프로세스에 여러 파일씩(작은 파일이 많을 때 주고받는 횟수를 줄인다)
+    batches = [b for b in np.array_split(np.array(paths, dtype=object), workers * 4) if len(b)]
+    frames, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for df, bad in pool.map(_read_batch, [list(b) for b in batches], [columns] * len(batches)):
+            frames.append(df)
+            failed.extend(bad)
+    return align(frames, columns), failed
+
+
+# ---------------------------
+# 중복 제거
+# ---------------------------
+def row_hashes(df: pd.DataFrame, columns: list) -> np.ndarray:
+    """ts + 내용 전체의 행 해시(uint64). category 는 코드가 아니라 값으로 해시한다."""
+    return pd.util.hash_pandas_object(df[columns], index=False, categorize=True).to_numpy()
+
+
+def _store_frame() -> pd.DataFrame:
+    import mindswitch_utils
+    df = mindswitch_utils.load_log()
+    return df.drop(columns=["ts_dt"], errors="ignore")
+
+
+def import_logs(paths: list, workers: int = None, dry_run: bool = False) -> dict:
+    """
+    paths(파일/디렉터리)의 로그를 저장소에 합친다. 이미 있는 행과 파일끼리 겹치는 행은 뺀다.
+    돌려주는 값: files, failed, rows_read, duplicates, rows_added, 단계별 초(seconds).
+    """
+    import mindswitch_utils
+    t0 = time.perf_counter()
+    files = expand_paths(paths)
+    headers, failed = _log_headers(files)
+    t_header = time.perf_counter()
+    store = _store_frame()
+    columns = union_columns(list(headers.values()) + [list(store.columns)])
+    t_store = time.perf_counter()
+
+    incoming, bad = read_logs(list(headers), workers, columns)
+    failed += bad
+    t_read = time.perf_counter()
+
+    # 저장소 행을 앞에 두고 처음 나온 것만 남기면 저장소에 이미 있는 행과 파일끼리 겹치는 행이 함께 빠진다
+    both = align([store, incoming], columns)
+    h = row_hashes(both, columns)
+    first = ~pd.Series(h).duplicated(keep="first").to_numpy()
+    keep = first[len(store):]
+    new_rows = both.iloc[len(store):][keep]
+    new_rows = new_rows.sort_values("ts", kind="stable").reset_index(drop=True)
+    t_dedup = time.perf_counter()
+
+    if not dry_run:
+        mindswitch_utils.append_log_frame(new_rows)
+    t_write = time.perf_counter()
+    return {
+        "files": len(files), "failed": failed, "rows_read": len(incoming),
+        "duplicates": len(incoming) - len(new_rows), "rows_added": 0 if dry_run else len(new_rows),
+        "seconds": {"header": t_header - t0, "store": t_store - t_header, "read": t_read - t_store,
+                    "dedup": t_dedup - t_read, "write": t_write - t_dedup},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 로그 CSV 가져오기/합치기")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("merge", help="여러 로그 CSV(또는 디렉터리)를 지금 저장소에 합친다")
+    m.add_argument("paths", nargs="+")
+    m.add_argument("--workers", type=int, default=None, help="읽기 프로세스 수(기본: CPU 수)")
+    m.add_argument("--dry-run", action="store_true", help="쓰지 않고 몇 행이 더해질지만 출력")
+    args = ap.parse_args()
+
+    if args.cmd == "merge":
+        r = import_logs(args.paths, workers=args.workers, dry_run=args.dry_run)
+        for path, err in r["failed"]:
+            print(f"skipped {path}: {err}")
+        secs = " ".join(f"{k} {v:.2f}s" for k, v in r["seconds"].items())
+        new = r["rows_read"] - r["duplicates"]
+        verb = "would add" if args.dry_run else "added"
+        print(f"{r['files']} files, {r['rows_read']} rows read, {r['duplicates']} duplicates, "
+              f"{verb} {new} rows ({secs})")
+        raise SystemExit(1 if r["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
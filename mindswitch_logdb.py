@@ -0,0 +1,264 @@
+"""
+SQLite 로그 저장소 (선택 백엔드).
+
+MINDSWITCH_LOG_BACKEND=sqlite 로 실행하면 mindswitch_utils 의
+load_log / append_log / load_today 가 이 모듈을 쓴다.
+
+- WAL 모드: 여러 세션이 동시에 읽는 동안에도 저장이 막히지 않는다.
+- ts, chosen_stim 인덱스: 오늘/기간 필터와 자극별 조회가 전체 스캔 없이 끝난다.
+- 컬럼은 row 에 새 키가 생길 때 ALTER TABLE 로 늘어난다(easy_* 등).
+- ts 는 epoch 초(INTEGER 컬럼). 예전 ISO 문자열 행과 ts TEXT 로 만든 예전 테이블은
+  처음 열 때(user_version < SCHEMA_VERSION) 한 번 변환한다.
+
+기존 CSV 이전(한 번만):
+    python mindswitch_logdb.py migrate --csv mindwand_log.csv --db mindwand_log.sqlite
+"""
+import argparse
+import csv
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+TABLE = "log"
+# 1: ISO 문자열 ts → epoch 초, 2: ts 컬럼 TEXT → INTEGER(숫자로 비교/정렬)
+SCHEMA_VERSION = 2
+
+
+def _q(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _py(v):
+    """numpy 스칼라/NaN 을 sqlite 가 받는 값으로."""
+    if v is None:
+        return None
+    if hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+
+@contextmanager
+def connect(db_path: str):
+    con = sqlite3.connect(db_path, timeout=30)
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        _ensure_schema(con)
+        yield con
+        con.commit()
+    finally:
+        con.close()
+
+
+def _create_table(con: sqlite3.Connection, name: str, extra_cols=()):
+    cols = "".join(f", {_q(c)}" for c in extra_cols)
+    con.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} ("
+        f"id INTEGER PRIMARY KEY AUTOINCREMENT, ts INTEGER, chosen_stim TEXT{cols})"
+    )
+
+
+def _create_indexes(con: sqlite3.Connection):
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_ts ON {TABLE}(ts)")
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_chosen_stim ON {TABLE}(chosen_stim, ts)")
+
+
+def _ensure_schema(con: sqlite3.Connection):
+    _create_table(con, TABLE)
+    _create_indexes(con)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS migrations ("
+        "source TEXT PRIMARY KEY, rows INTEGER, migrated_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+    )
+    if con.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        _ts_text_to_epoch(con)
+        _ts_column_to_integer(con)
+        con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _ts_column_to_integer(con: sqlite3.Connection):
+    """
+    ts TEXT 로 만든 예전 테이블을 ts INTEGER 로 다시 만든다(sqlite 는 컬럼 타입을 못 바꾼다).
+    TEXT 컬럼에서는 epoch 초도 문자열로 저장돼 MIN/MAX 와 범위 조회가 문자열 비교가 된다.
+    INTEGER 컬럼으로 옮기면 숫자 문자열은 정수로 바뀐다. id 는 그대로 둔다.
+    """
+    types = {r[1]: (r[2] or "").upper() for r in con.execute(f"PRAGMA table_info({TABLE})")}
+    if types.get("ts") == "INTEGER":
+        return
+    extra = [c for c in types if c not in ("id", "ts", "chosen_stim")]
+    cols = ", ".join(_q(c) for c in ["id", "ts", "chosen_stim"] + extra)
+    tmp = f"{TABLE}_migrate"
+    con.execute(f"DROP TABLE IF EXISTS {tmp}")
+    _create_table(con, tmp, extra)
+    con.execute(f"INSERT INTO {tmp} ({cols}) SELECT {cols} FROM {TABLE} ORDER BY id")
+    con.execute(f"DROP TABLE {TABLE}")
+    con.execute(f"ALTER TABLE {tmp} RENAME TO {TABLE}")
+    _create_indexes(con)
+
+
+def _ts_text_to_epoch(con: sqlite3.Connection):
+    """
+    예전 로그의 ISO 로컬 시각 문자열 ts 를 epoch 초로(sqlite 'utc' 수식어가 로컬→UTC 변환).
+    숫자 ts 는 그대로 둔다.
+    """
+    con.execute(
+        f"UPDATE {TABLE} SET ts = CAST(strftime('%s', ts, 'utc') AS INTEGER) "
+        "WHERE typeof(ts) = 'text' AND ts GLOB '*[^0-9]*' AND strftime('%s', ts, 'utc') IS NOT NULL"
+    )
+
+
+def _columns(con: sqlite3.Connection) -> list:
+    return [r[1] for r in con.execute(f"PRAGMA table_info({TABLE})")]
+
+
+def _ensure_columns(con: sqlite3.Connection, cols):
+    have = set(_columns(con))
+    for c in cols:
+        if c not in have:
+            con.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_q(c)}")
+            have.add(c)
+
+
+def _insert_many(con: sqlite3.Connection, cols: list, rows):
+    _ensure_columns(con, cols)
+    sql = (
+        f"INSERT INTO {TABLE} ({', '.join(_q(c) for c in cols)}) "
+        f"VALUES ({', '.join('?' for _ in cols)})"
+    )
+    con.executemany(sql, rows)
+
+
+def _frame(con: sqlite3.Connection, where: str = "", params=()) -> pd.DataFrame:
+    df = pd.read_sql_query(f"SELECT * FROM {TABLE} {where} ORDER BY id", con, params=params)
+    df = df.drop(columns=["id"])
+    return df if len(df) else pd.DataFrame()
+
+
+# ---------------------------
+# mindswitch_utils 인터페이스
+# ---------------------------
+def append_row(db_path: str, row: dict):
+    append_rows(db_path, [row])
+
+
+def append_rows(db_path: str, rows: list):
+    """여러 행을 한 트랜잭션으로 넣는다(키가 다른 행은 없는 칸을 NULL 로)."""
+    cols = list(dict.fromkeys(k for row in rows for k in row.keys()))
+    with connect(db_path) as con:
+        _insert_many(con, cols, [tuple(_py(row.get(c)) for c in cols) for row in rows])
+
+
+def append_frame(db_path: str, df: pd.DataFrame):
+    """DataFrame 의 행을 한 트랜잭션으로 넣는다(결측 → NULL). astype(object) 가 파이썬 값으로 바꾼다."""
+    cols = list(df.columns)
+    obj = df.astype(object).where(df.notna().to_numpy(), None)
+    with connect(db_path) as con:
+        _insert_many(con, cols, obj.itertuples(index=False, name=None))
+
+
+def load_all(db_path: str) -> pd.DataFrame:
+    with connect(db_path) as con:
+        return _frame(con)
+
+
+def load_range(db_path: str, start: int, end: int) -> pd.DataFrame:
+    """start <= ts < end (epoch 초) 행만. ts 인덱스 범위 조회."""
+    with connect(db_path) as con:
+        return _frame(con, "WHERE ts >= ? AND ts < ?", (int(start), int(end)))
+
+
+def iter_frames(db_path: str, start: int = None, end: int = None, chunksize: int = 50_000):
+    """start <= ts < end 행을 chunksize 행씩 DataFrame 으로(id 순). start 가 None 이면 전체."""
+    where, params = "", ()
+    if start is not None:
+        where, params = "WHERE ts >= ? AND ts < ?", (int(start), int(end))
+    with connect(db_path) as con:
+        sql = f"SELECT * FROM {TABLE} {where} ORDER BY id"
+        for df in pd.read_sql_query(sql, con, params=params, chunksize=chunksize):
+            yield df.drop(columns=["id"])
+
+
+def ts_bounds(db_path: str):
+    """(가장 이른 ts, 가장 늦은 ts) epoch 초. 행이 없으면 None."""
+    with connect(db_path) as con:
+        lo, hi = con.execute(f"SELECT MIN(ts), MAX(ts) FROM {TABLE}").fetchone()
+    return None if lo is None else (int(lo), int(hi))
+
+
+# ---------------------------
+# CSV → SQLite 이전
+# ---------------------------
+def migrate_csv(csv_path: str, db_path: str, force: bool = False) -> int:
+    """
+    기존 mindwand_log.csv 를 그대로 옮긴다. 같은 CSV 는 한 번만 옮긴다
+    (migrations 테이블에 기록). 옮긴 행 수를 돌려준다.
+    """
+    source = os.path.abspath(csv_path)
+    if not os.path.exists(csv_path):
+        return 0
+    with connect(db_path) as con:
+        done = con.execute("SELECT rows FROM migrations WHERE source = ?", (source,)).fetchone()
+        if done is not None and not force:
+            return 0
+
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return 0
+            n = 0
+            batch = []
+            for rec in reader:
+                if not rec:
+                    continue
+                rec = (rec + [""] * len(header))[:len(header)]
+                batch.append(tuple(_coerce(v) for v in rec))
+                if len(batch) >= 10_000:
+                    _insert_many(con, header, batch)
+                    n += len(batch)
+                    batch = []
+            if batch:
+                _insert_many(con, header, batch)
+                n += len(batch)
+
+        _ts_text_to_epoch(con)
+        con.execute(
+            "INSERT OR REPLACE INTO migrations(source, rows) VALUES (?, ?)", (source, n)
+        )
+    return n
+
+
+def _coerce(v: str):
+    """CSV 문자열을 pandas 가 읽던 것과 같은 타입으로(빈 칸 → NULL, 숫자 → 숫자)."""
+    if v == "":
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        pass
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch SQLite 로그 저장소")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="CSV 로그를 SQLite 로 한 번 옮긴다")
+    m.add_argument("--csv", default="mindwand_log.csv")
+    m.add_argument("--db", default="mindwand_log.sqlite")
+    m.add_argument("--force", action="store_true", help="이미 옮긴 CSV 라도 다시 옮긴다")
+    args = ap.parse_args()
+
+    if args.cmd == "migrate":
+        n = migrate_csv(args.csv, args.db, force=args.force)
+        print(f"migrated {n} rows: {args.csv} -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+프로세스 안 성능 지표(카운터 / 히스토그램).
+
+자주 불리는 함수(load_log, append_log, today_df, 노이즈 루프, render_stimulus,
+페이지 재실행 등)의 소요 시간을 고정 버킷 히스토그램에 모은다. 한 번 재는 데
+perf_counter 두 번 + bisect + 잠금 한 번이라 켜 둔 채로 운영해도 된다.
+
+    MINDSWITCH_METRICS=0            # 끄기: timed 는 함수를 그대로 돌려주고 timer 는 빈 context
+    MINDSWITCH_METRICS_PORT=9464    # 127.0.0.1:9464/metrics 로 Prometheus 텍스트 제공
+    MINDSWITCH_METRICS_FILE=path    # 페이지 재실행 끝에 Prometheus 텍스트를 파일로(최대 10초에 한 번)
+
+이름은 Prometheus 규칙을 따른다: mindswitch_<name>_seconds(히스토그램),
+mindswitch_<name>_total(카운터). 라벨은 timer/observe/count 의 키워드 인자.
+"""
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("MINDSWITCH_METRICS", "1") != "0"
+PREFIX = "mindswitch_"
+# 초 단위 버킷 상한(마지막 +Inf 는 암묵)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FILE_INTERVAL_SEC = 10.0
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_hists = {}     # (name, labels) -> [bucket counts..., +Inf count], sum
+_counters = {}  # (name, labels) -> value
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items())) if labels else ()
+
+
+# ---------------------------
+# 기록
+# ---------------------------
+def observe(name: str, seconds: float, **labels):
+    if ENABLED:
+        _observe(_key(name, labels), seconds)
+
+
+def _observe(key: tuple, seconds: float):
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        h = _hists.get(key)
+        if h is None:
+            h = _hists[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+        h[0][i] += 1
+        h[1] += seconds
+
+
+def count(name: str, n: int = 1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+@contextmanager
+def _timer(key: tuple):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observe(key, time.perf_counter() - t0)
+
+
+def timer(name: str, **labels):
+    """with timer("name"): ... 의 소요 시간을 기록. 꺼져 있으면 아무것도 하지 않는다."""
+    if not ENABLED:
+        return nullcontext()
+    return _timer(_key(name, labels))
+
+
+def timed(name: str, **labels):
+    """함수 데코레이터. 꺼져 있으면 함수를 그대로 돌려준다(오버헤드 0)."""
+    def deco(fn):
+        if not ENABLED:
+            return fn
+        key = _key(name, labels)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _observe(key, time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+
+def reset():
+    with _lock:
+        _hists.clear()
+        _counters.clear()
+
+
+# ---------------------------
+# 페이지 재실행
+# ---------------------------
+# 스크립트 스레드마다 지금 실행 중인 페이지와 시작 시각. 끝은 page_end(go() 또는 페이지 마지막 줄).
+_page = threading.local()
+
+
+def page_start(page: str):
+    if ENABLED:
+        _page.name, _page.t0 = page, time.perf_counter()
+
+
+def page_end():
+    if not ENABLED or getattr(_page, "t0", None) is None:
+        return
+    observe("page_rerun", time.perf_counter() - _page.t0, page=_page.name)
+    _page.t0 = None
+    _export_file()
+
+
+# ---------------------------
+# 조회 / 내보내기
+# ---------------------------
+def _quantile(counts: list, q: float) -> float:
+    """버킷 안 선형 보간으로 분위수(초). +Inf 버킷이면 마지막 상한."""
+    total = sum(counts)
+    if total == 0:
+        return float("nan")
+    rank, seen = q * total, 0
+    for i, c in enumerate(counts):
+        if seen + c >= rank and c:
+            if i == len(BUCKETS):
+                return BUCKETS[-1]
+            lo = BUCKETS[i - 1] if i else 0.0
+            return lo + (BUCKETS[i] - lo) * (rank - seen) / c
+        seen += c
+    return BUCKETS[-1]
+
+
+def snapshot() -> list:
+    """[{name, labels, count, mean_ms, p50_ms, p95_ms, total_s}] (히스토그램) + 카운터."""
+    with _lock:
+        hists = {k: (list(v[0]), v[1]) for k, v in _hists.items()}
+        counters = dict(_counters)
+    rows = []
+    for (name, labels), (counts, total) in sorted(hists.items()):
+        n = sum(counts)
+        rows.append({
+            "name": name, "labels": ",".join(f"{k}={v}" for k, v in labels), "count": n,
+            "mean_ms": total / n * 1e3 if n else float("nan"),
+            "p50_ms": _quantile(counts, 0.5) * 1e3, "p95_ms": _quantile(counts, 0.95) * 1e3,
+            "total_s": total,
+        })
+    for (name, labels), value in sorted(counters.items()):
+        rows.append({"name": name, "labels": ",".join(f"{k}={v}" for k, v in labels), "count": value})
+    return rows
+
+
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def prometheus_text() -> str:
+    """Prometheus text exposition format(0.0.4)."""
+    with _lock:
+        hists = {k: (list(v[0]), v[1]) for k, v in _hists.items()}
+        counters = dict(_counters)
+    lines, typed = [], set()
+    for (name, labels), (counts, total) in sorted(hists.items()):
+        metric = f"{PREFIX}{name}_seconds"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} histogram")
+            typed.add(metric)
+        cum = 0
+        for le, c in zip(BUCKETS + ("+Inf",), counts):
+            cum += c
+            lines.append(f"{metric}_bucket{_fmt_labels(labels, (('le', le),))} {cum}")
+        lines.append(f"{metric}_sum{_fmt_labels(labels)} {total!r}")
+        lines.append(f"{metric}_count{_fmt_labels(labels)} {cum}")
+    for (name, labels), value in sorted(counters.items()):
+        metric = f"{PREFIX}{name}_total"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_file_written = [0.0]
+
+
+def _export_file():
+    path = os.environ.get("MINDSWITCH_METRICS_FILE")
+    now = time.monotonic()
+    if not path or now - _file_written[0] < FILE_INTERVAL_SEC:
+        return
+    _file_written[0] = now
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = []
+_server_failed = set()  # 띄우지 못한 (host, port). 페이지마다 다시 시도하지 않는다.
+_server_lock = threading.Lock()
+
+
+def serve(port: int = None, host: str = "127.0.0.1"):
+    """
+    /metrics HTTP 엔드포인트를 데몬 스레드로 한 번만 띄운다. 포트가 없으면 아무것도 안 한다.
+    포트를 이미 다른 프로세스(다른 Streamlit 워커 등)가 쓰고 있으면 한 번만 기록하고 None
+    (엔드포인트 없이 계속 돌고, 이 프로세스의 지표는 MINDSWITCH_METRICS_FILE 이나 관리자 화면으로 본다).
+    """
+    port = port or int(os.environ.get("MINDSWITCH_METRICS_PORT", "0") or 0)
+    if not ENABLED or not port:
+        return None
+    with _server_lock:
+        if not _server:
+            if (host, port) in _server_failed:
+                return None
+            try:
+                httpd = ThreadingHTTPServer((host, port), _Handler)
+            except OSError as e:
+                _server_failed.add((host, port))
+                log.warning("성능 지표 엔드포인트를 띄우지 못했다(%s:%s, pid %s): %s", host, port, os.getpid(), e)
+                return None
+            threading.Thread(target=httpd.serve_forever, name="mindswitch-metrics", daemon=True).start()
+            _server.append(httpd)
+        return _server[0]
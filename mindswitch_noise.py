@@ -0,0 +1,118 @@
+"""
+미리 만들어 둔 노이즈 루프 묶음(noise bank).
+
+청각 자극의 노이즈(화이트/핑크/브라운)는 요청 때마다 만들지 않고, 빌드 단계에서
+NOISE_BANK_DIR(static/noise) 아래 WAV 파일로 한 번 써 둔다. 브라우저는 Streamlit
+정적 서빙 URL(/app/static/noise/...)로 받고, URL 을 쓸 수 없을 때 앱은 파일을
+np.memmap 으로 열어 memoryview 로 넘긴다(워커 프로세스끼리 페이지 캐시 한 벌 공유).
+
+    NOISE_BANK_DIR/manifest.json          # 생성 파라미터, 파일별 이름/sha256/크기
+    NOISE_BANK_DIR/<color>-<sha256 16자>.wav
+
+파일 이름에 내용 해시가 들어 있어 내용이 바뀌면 URL 도 바뀐다(브라우저 캐시가 낡지 않음).
+
+핑크/브라운은 FFT 영역에서 1/f^alpha 로 모양을 낸다(colored_loop). irfft 결과는
+원래 주기적이라 끝 → 처음 이음매가 자연스럽게 이어진다.
+
+빌드(배포 때 한 번, 없으면 앱이 처음 쓸 때 만든다):
+    python mindswitch_noise.py build
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+# 이 아래 주파수(Hz)는 들리지 않고 RMS 만 차지하므로 비운다
+F_LOW = 20.0
+
+
+def colored_loop(alpha: float, n: int, sr: int, amp: float, seed: int = 0) -> np.ndarray:
+    """
+    파워 스펙트럼이 1/f^alpha 인 int16 루프(alpha=1 핑크, 2 브라운).
+    복소 가우시안 스펙트럼에 f^(-alpha/2) 를 곱하고 irfft 한 뒤 RMS 를 amp 로 맞춘다.
+    """
+    rng = np.random.default_rng(seed)
+    m = n // 2 + 1
+    spec = rng.standard_normal(m, dtype=np.float32) + 1j * rng.standard_normal(m, dtype=np.float32)
+    f = np.fft.rfftfreq(n, 1.0 / sr).astype(np.float32)
+    w = np.zeros(m, dtype=np.float32)
+    ok = f >= F_LOW
+    w[ok] = f[ok] ** (-alpha / 2)
+    spec *= w
+
+    x = np.fft.irfft(spec, n).astype(np.float32)
+    x *= amp / max(float(np.sqrt(np.mean(x * x))), 1e-12)
+    np.clip(x, -1, 1, out=x)
+    x *= 32767
+    return x.astype(np.int16)
+
+
+def load_manifest(root: str) -> dict:
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_bank(root: str, files: dict, params: dict) -> dict:
+    """
+    files: {color: [bytes-like, ...]} (WAV 헤더, PCM 순서대로 이어 쓴다).
+    파일을 먼저 모두 쓴 뒤 manifest 를 바꾸므로, 읽는 쪽은 항상 완성된 묶음만 본다.
+    이전 manifest 에만 있던 파일은 마지막에 지운다.
+    """
+    os.makedirs(root, exist_ok=True)
+    old = load_manifest(root).get("files", {})
+    entries = {}
+    for color, parts in files.items():
+        tmp = os.path.join(root, f"{color}.wav.tmp")
+        h = hashlib.sha256()
+        size = 0
+        with open(tmp, "wb") as f:
+            for part in parts:
+                part = memoryview(part).cast("B")
+                f.write(part)
+                h.update(part)
+                size += len(part)
+        name = f"{color}-{h.hexdigest()[:16]}.wav"
+        os.replace(tmp, os.path.join(root, name))
+        entries[color] = {"name": name, "sha256": h.hexdigest(), "bytes": size}
+
+    manifest = {"version": 1, "params": params, "files": entries}
+    path = os.path.join(root, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+    keep = {e["name"] for e in entries.values()}
+    for e in old.values():
+        if e["name"] not in keep and os.path.exists(os.path.join(root, e["name"])):
+            os.remove(os.path.join(root, e["name"]))
+    return manifest
+
+
+def open_wav(root: str, entry: dict) -> np.memmap:
+    """WAV 파일 전체를 읽기 전용 uint8 memmap 으로(복사 없음)."""
+    return np.memmap(os.path.join(root, entry["name"]), dtype=np.uint8, mode="r")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 노이즈 루프 묶음")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="노이즈 루프 WAV 파일들을 만든다")
+    b.add_argument("--dir", default=None, help="기본값: 앱 폴더의 static/noise")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        import mindswitch_utils
+        manifest = mindswitch_utils.build_noise_bank(args.dir)
+        for color, e in manifest["files"].items():
+            print(f"{color:>6}: {e['name']} {e['bytes']:,} bytes sha256={e['sha256'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
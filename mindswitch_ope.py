@@ -0,0 +1,329 @@
+"""
+추천기 오프라인 평가(off-policy evaluation).
+
+로그에는 추천(recommended_stim), 추천 사유(explore/exploit), 실제 선택(chosen_stim),
+보상(mwi, easy_mwi)이 같이 남는다. 이것으로 다른 추천 정책을 실제로 돌려 보지 않고
+"그 정책이었다면 평균 보상이 얼마였을까"를 추정한다.
+
+- 행동(action) = 추천한 자극. 보상은 그 세션에서 관측된 값(사용자가 다른 자극을
+  고른 경우도 포함한 추천의 결과).
+- 기록 정책의 propensity 는 EPSILON 으로 되살린다(K = STIMULI 의 자극 수. 짧거나 걸러낸 로그에
+  한 번도 안 나온 자극도 기록 정책의 팔이다. 팔 집합이 달랐던 로그는 --logged-arms 로
+  로그에 나온 자극만 쓴다):
+    행동이 그때의 최선 자극 → 1 - ε + ε/K,  아니면 → ε/K
+  explore 행의 "그때의 최선"은 직전 exploit 행의 추천으로 본다(최선은 천천히 바뀐다).
+- 대상 정책은 각 시점 t 이전의 로그 전체(chosen_stim 별 누적 평균)로 학습한 상태에서
+  행동 분포 π_t 를 낸다. 누적합으로 한 번에 계산한다(행마다 도는 루프 없음).
+- 추정량: IPS, SNIPS(self-normalized), replay(explore 행 = 균등 무작위 기록만 쓰고,
+  π_t 에서 뽑은 행동이 기록과 같은 행의 보상을 평균).
+- 신뢰구간: Poisson bootstrap. 정책별 π_t 계산과 bootstrap 묶음을 프로세스 풀에 나눠 돌리고,
+  한 묶음의 재표본 가중치는 모든 정책의 행별 항에 행렬곱 한 번으로 곱한다.
+
+    python mindswitch_ope.py --metric mwi --boot 200 --workers 4
+    python mindswitch_ope.py --metric easy_mwi --learn-on easy_mwi
+    python mindswitch_ope.py --logged-arms
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ESTIMATORS = ["ips", "snips", "replay"]
+
+# 대상 정책 예시. kind: "epsilon_greedy" | "ucb" | "thompson" | "uniform"
+# learn_on: 정책이 학습에 쓰는 보상 컬럼(None 이면 평가 지표와 같음)
+DEFAULT_POLICIES = [
+    {"name": "eps-greedy 0.20", "kind": "epsilon_greedy", "epsilon": 0.20},
+    {"name": "eps-greedy 0.05", "kind": "epsilon_greedy", "epsilon": 0.05},
+    {"name": "eps-greedy 0.50", "kind": "epsilon_greedy", "epsilon": 0.50},
+    {"name": "ucb c=1", "kind": "ucb", "c": 1.0},
+    {"name": "thompson", "kind": "thompson"},
+    {"name": "uniform", "kind": "uniform"},
+    {"name": "eps-greedy 0.20 (easy_mwi)", "kind": "epsilon_greedy", "epsilon": 0.20,
+     "learn_on": "easy_mwi"},
+]
+
+# 평가에 꼭 필요한 로그 컬럼(recommended_stim / recommend_reason 이 없는 예전 로그는 평가할 수 없다)
+REQUIRED_COLS = ["ts", "recommended_stim", "recommend_reason", "chosen_stim"]
+
+THOMPSON_DRAWS = 128
+THOMPSON_CHUNK = 8192
+
+
+# ---------------------------
+# 로그 → 배열
+# ---------------------------
+def _codes(s: pd.Series, keys: list) -> np.ndarray:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.set_categories(keys).cat.codes.to_numpy()
+    return pd.Categorical(s, categories=keys).codes
+
+
+def missing_columns(df: pd.DataFrame, metric: str = "mwi") -> list:
+    """평가에 필요한데 로그에 없는 컬럼."""
+    return [c for c in REQUIRED_COLS + [metric] if c not in df.columns]
+
+
+def logged_arms(df: pd.DataFrame) -> list:
+    """로그에 추천/선택으로 나온 자극(기록 정책의 팔 집합). 처음 나온 순서."""
+    seen = {}
+    for c in ("recommended_stim", "chosen_stim"):
+        if c in df.columns:
+            seen.update(dict.fromkeys(str(v) for v in pd.unique(df[c].dropna())))
+    return list(seen)
+
+
+def _empty(keys: list, metric: str, missing: list) -> dict:
+    none = np.empty(0)
+    return {"keys": keys, "metric": metric, "missing": missing, "action": none.astype(np.int64),
+            "reward": none, "prop": none, "explore": none.astype(bool), "stats": {}}
+
+
+def prepare(df: pd.DataFrame, keys: list, epsilon: float, metric: str = "mwi",
+            learn_metrics=("mwi", "easy_mwi")) -> dict:
+    """
+    평가에 쓸 배열들. 학습용 누적 통계는 모든 행에서, 평가는 추천/사유/보상이 있는 행에서.
+    keys 가 None 이면 지금 STIMULI 를 팔 집합으로 쓴다(로그에 나온 자극만 쓰려면 logged_arms(df)).
+    필요한 컬럼이 없으면 빈 배열과 missing(없는 컬럼 목록)을 돌려준다.
+    """
+    missing = missing_columns(df, metric) if len(df) else []
+    if keys is None:
+        import mindswitch_utils
+        keys = list(mindswitch_utils.STIMULI)
+    if missing or not keys:
+        return _empty(keys, metric, missing)
+    df = df.sort_values("ts", kind="stable")
+    k = len(keys)
+    chosen = _codes(df["chosen_stim"], keys)
+    action = _codes(df["recommended_stim"], keys)
+    reason = df["recommend_reason"].astype(str)
+    exploit = reason.str.startswith("exploit").to_numpy()
+    explore = reason.str.startswith("explore").to_numpy()
+
+    # 시점 t 직전까지의 chosen_stim 별 (횟수, 합) — 지표마다
+    stats = {}
+    for m in learn_metrics:
+        if m not in df.columns:
+            continue
+        r = pd.to_numeric(df[m], errors="coerce").to_numpy(dtype=np.float64)
+        ok = (chosen >= 0) & np.isfinite(r)
+        onehot = np.zeros((len(df), k), dtype=np.float64)
+        onehot[np.flatnonzero(ok), chosen[ok]] = 1.0
+        contrib = onehot * np.where(ok, r, 0.0)[:, None]
+        # cumsum 에서 자기 행을 빼면 "직전까지"
+        n = np.cumsum(onehot, axis=0) - onehot
+        total = np.cumsum(contrib, axis=0) - contrib
+        sq = float(np.var(r[ok])) if ok.any() else 1.0
+        stats[m] = {"n": n, "sum": total, "var": max(sq, 1e-12)}
+
+    reward = pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype=np.float64)
+    keep = (action >= 0) & (exploit | explore) & np.isfinite(reward)
+    # 각 시점의 최선 자극 = 가장 최근 exploit 행의 추천
+    greedy = pd.Series(np.where(exploit, action, np.nan)).ffill().to_numpy()
+    prop = np.where(action == greedy, 1 - epsilon + epsilon / k, epsilon / k)
+
+    return {
+        "keys": keys,
+        "metric": metric,
+        "missing": [],
+        "action": action[keep],
+        "reward": reward[keep],
+        "prop": prop[keep],
+        "explore": explore[keep],
+        "stats": {m: {"n": v["n"][keep], "sum": v["sum"][keep], "var": v["var"]}
+                  for m, v in stats.items()},
+    }
+
+
+# ---------------------------
+# 대상 정책 π_t
+# ---------------------------
+def _argmax_onehot(score: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(score)
+    out[np.arange(len(score)), np.argmax(score, axis=1)] = 1.0
+    return out
+
+
+def policy_probs(data: dict, policy: dict, seed: int = 0) -> np.ndarray:
+    """(행 수, K) 행동 분포. 각 행은 그 시점 이전 로그만 보고 정한다."""
+    k = len(data["keys"])
+    rows = len(data["action"])
+    kind = policy["kind"]
+    if kind == "uniform":
+        return np.full((rows, k), 1.0 / k)
+
+    st = data["stats"][policy.get("learn_on") or data["metric"]]
+    n, total = st["n"], st["sum"]
+    # bandit_update 와 같은 평균(한 번도 안 고른 자극은 0)
+    q = np.divide(total, n, out=np.zeros_like(total), where=n > 0)
+
+    if kind == "epsilon_greedy":
+        eps = float(policy["epsilon"])
+        return eps / k + (1 - eps) * _argmax_onehot(q)
+    if kind == "ucb":
+        c = float(policy.get("c", 1.0))
+        t = n.sum(axis=1, keepdims=True)
+        bonus = c * np.sqrt(np.log(t + 1) / np.maximum(n, 1))
+        return _argmax_onehot(np.where(n > 0, q + bonus, np.inf))
+    if kind == "thompson":
+        # 정규 사후분포 N(q, var/(n+1)) 에서 뽑아 최선이 될 확률(몬테카를로, 행 묶음 단위)
+        rng = np.random.default_rng(seed)
+        sd = np.sqrt(st["var"] / (n + 1))
+        out = np.empty((rows, k))
+        for i in range(0, rows, THOMPSON_CHUNK):
+            j = min(i + THOMPSON_CHUNK, rows)
+            draw = q[i:j, None, :] + sd[i:j, None, :] * rng.standard_normal((j - i, THOMPSON_DRAWS, k))
+            best = np.argmax(draw, axis=2)
+            out[i:j] = np.stack([(best == a).mean(axis=1) for a in range(k)], axis=1)
+        return out
+    raise ValueError(f"unknown policy kind: {kind}")
+
+
+# ---------------------------
+# 추정량
+# ---------------------------
+# 정책마다 행별 항 4개: IPS 비율, 비율×보상, replay 일치 여부, 일치×보상
+TERM_COLS = ["ratio", "wr", "match", "mr"]
+
+
+def policy_terms(data: dict, probs: np.ndarray, seed: int) -> np.ndarray:
+    """(행 수, 4) 행별 항. 추정치는 모두 이 열들의 (가중) 합의 비율이다."""
+    rows = np.arange(len(data["action"]))
+    ratio = probs[rows, data["action"]] / data["prop"]
+    # replay: 균등 무작위로 기록된(explore) 행에서 π_t 가 뽑은 행동이 기록과 같은 행만 쓴다
+    rng = np.random.default_rng(seed)
+    u = rng.random(len(rows))[:, None]
+    sampled = (np.cumsum(probs, axis=1) < u).sum(axis=1)
+    match = ((sampled == data["action"]) & data["explore"]).astype(np.float64)
+    return np.column_stack([ratio, ratio * data["reward"], match, match * data["reward"]])
+
+
+def _estimates(sums: np.ndarray, wsum) -> dict:
+    """sums: (..., 4) 열 합, wsum: 가중치 합 → 추정량별 값(0 으로 나누면 NaN)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "ips": sums[..., 1] / wsum,
+            "snips": sums[..., 1] / sums[..., 0],
+            "replay": sums[..., 3] / sums[..., 2],
+        }
+
+
+# 워커 프로세스가 한 번만 받아 두는 배열(1단계: prepare 결과, 2단계: 모든 정책의 항)
+_DATA = None
+_TERMS = None
+# bootstrap 한 묶음의 Poisson 가중치 행렬 크기 상한(원소 수)
+BOOT_CELLS = 1 << 24
+
+
+def _init_worker(data=None, terms=None):
+    global _DATA, _TERMS
+    _DATA, _TERMS = data, terms
+
+
+def _policy_task(policy: dict, seed: int) -> np.ndarray:
+    return policy_terms(_DATA, policy_probs(_DATA, policy, seed=seed), seed + 1)
+
+
+def _boot_task(n_boot: int, seed: int) -> tuple:
+    """
+    Poisson(1) bootstrap n_boot 번. 가중치 행렬 (n_boot, 행 수) 하나를 모든 정책의 항에
+    행렬곱으로 한 번에 곱한다(정책끼리 같은 재표본을 쓴다).
+    """
+    rng = np.random.default_rng(seed)
+    w = rng.poisson(1.0, (n_boot, _TERMS.shape[0])).astype(np.float32)
+    return w @ _TERMS, w.sum(axis=1, dtype=np.float64)
+
+
+def _pool_map(fn, args: list, workers: int, **init):
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args)), initializer=_init_worker,
+                                 initargs=(init.get("data"), init.get("terms"))) as ex:
+            return list(ex.map(fn, *zip(*args)))
+    _init_worker(init.get("data"), init.get("terms"))
+    return [fn(*a) for a in args]
+
+
+def evaluate(df: pd.DataFrame, keys: list, epsilon: float, policies=None, metric: str = "mwi",
+             n_boot: int = 200, workers: int = None, alpha: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """
+    policies 각각의 IPS / SNIPS / replay 추정치와 (1-alpha) bootstrap 신뢰구간.
+    정책별 π_t 계산과 bootstrap 묶음을 각각 프로세스 풀에 나눈다(workers=1 이면 이 프로세스에서).
+    logged 행은 기록 정책의 실제 평균 보상(비교 기준).
+    평가할 행이 없으면 빈 표. 필요한 컬럼이 없어서라면 표의 attrs["missing"] 에 그 목록이 있다.
+    """
+    policies = policies or DEFAULT_POLICIES
+    cols = ["policy", "estimator", "value", "ci_low", "ci_high", "n", "matches"]
+    data = prepare(df, keys, epsilon, metric)
+    n = len(data["action"])
+    if n == 0:
+        empty = pd.DataFrame(columns=cols)
+        empty.attrs["missing"] = data["missing"]
+        return empty
+    # 학습 보상 컬럼이 로그에 없는 정책(easy_* 가 생기기 전 로그의 easy_mwi 등)은 뺀다
+    policies = [p for p in policies
+                if p["kind"] == "uniform" or (p.get("learn_on") or metric) in data["stats"]]
+    workers = workers or os.cpu_count() or 1
+
+    blocks = _pool_map(_policy_task, [(p, seed + 10 * i) for i, p in enumerate(policies)],
+                       workers, data=data)
+    terms = np.hstack(blocks)  # (행 수, 4 × 정책 수)
+    point = _estimates(terms.sum(axis=0).reshape(len(policies), 4), float(n))
+
+    per_chunk = max(1, min(n_boot, BOOT_CELLS // n))
+    sizes = [min(per_chunk, n_boot - s) for s in range(0, n_boot, per_chunk)]
+    parts = _pool_map(_boot_task, [(k, seed + 1000 + c) for c, k in enumerate(sizes)],
+                      workers, terms=terms.astype(np.float32))
+    boots = {}
+    if parts:
+        sums = np.vstack([p[0] for p in parts]).reshape(-1, len(policies), 4)
+        wsum = np.concatenate([p[1] for p in parts])[:, None]
+        boots = _estimates(sums, wsum)
+
+    out = [{"policy": "logged", "estimator": "on-policy", "value": float(data["reward"].mean()),
+            "ci_low": np.nan, "ci_high": np.nan, "n": n, "matches": n}]
+    for i, p in enumerate(policies):
+        matches = int(blocks[i][:, 2].sum())
+        for e in ESTIMATORS:
+            b = boots[e][:, i] if boots else np.empty(0)
+            b = b[np.isfinite(b)]
+            lo, hi = np.quantile(b, [alpha / 2, 1 - alpha / 2]) if len(b) else (np.nan, np.nan)
+            out.append({"policy": p["name"], "estimator": e, "value": float(point[e][i]),
+                        "ci_low": float(lo), "ci_high": float(hi), "n": n, "matches": matches})
+    return pd.DataFrame(out, columns=cols)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 추천기 오프라인 평가")
+    ap.add_argument("--metric", default="mwi", help="평가 보상 컬럼(mwi | easy_mwi)")
+    ap.add_argument("--learn-on", default=None, help="모든 대상 정책의 학습 보상을 이 컬럼으로")
+    ap.add_argument("--boot", type=int, default=200, help="bootstrap 반복 수")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--logged-arms", action="store_true",
+                    help="K 를 STIMULI 대신 로그에 나온 자극으로(팔 집합이 지금과 달랐던 로그용)")
+    args = ap.parse_args()
+
+    import mindswitch_utils
+    policies = DEFAULT_POLICIES
+    if args.learn_on:
+        policies = [dict(p, learn_on=args.learn_on) for p in policies]
+    df = mindswitch_utils.load_log()
+    table = evaluate(df, logged_arms(df) if args.logged_arms else None,
+                     mindswitch_utils.EPSILON, policies, metric=args.metric,
+                     n_boot=args.boot, workers=args.workers, seed=args.seed)
+    if table.empty:
+        missing = table.attrs.get("missing")
+        if missing:
+            print(f"로그에 {', '.join(missing)} 컬럼이 없어 평가할 수 없습니다"
+                  f"(추천 기록이 생기기 전의 로그).")
+        else:
+            print("평가할 행이 없습니다(추천/사유/보상이 모두 있는 행이 필요).")
+        raise SystemExit(1)
+    with pd.option_context("display.width", 160, "display.max_rows", 200):
+        print(table.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+날짜별로 나뉜 로그 저장소 (선택 백엔드).
+
+MINDSWITCH_LOG_BACKEND=segments 로 실행하면 로그가 LOG_SEGMENTS_DIR 아래에
+하루 단위 CSV(YYYY-MM-DD.csv)로 쌓이고, manifest.json 이 어떤 파일에 어느
+날짜 범위가 들어 있는지 기록한다. 오늘 화면은 오늘 파일 하나만 읽으므로
+로그가 몇 년 쌓여도 비용이 같다.
+
+지난 달의 하루 파일들은 새 날짜의 첫 저장 때 YYYY-MM.csv.gz 하나로 합쳐
+압축된다(compact). 파일 내용(CSV 문자열)은 손대지 않고 컬럼만 맞춰 합친다.
+
+CSV 파싱/타입 변환은 mindswitch_utils 가 맡고, 이 모듈은 파일 배치와
+manifest 만 다룬다.
+
+    python mindswitch_segments.py compact --dir mindwand_log
+    python mindswitch_segments.py split --csv mindwand_log.csv --dir mindwand_log
+"""
+import argparse
+import io
+import json
+import os
+from datetime import date
+
+import pandas as pd
+
+MANIFEST = "manifest.json"
+
+
+def _manifest_path(root: str) -> str:
+    return os.path.join(root, MANIFEST)
+
+
+def load_manifest(root: str) -> dict:
+    path = _manifest_path(root)
+    if not os.path.exists(path):
+        return {"version": 1, "segments": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(root: str, manifest: dict):
+    manifest["segments"].sort(key=lambda s: (s["first_day"], s["name"]))
+    path = _manifest_path(root)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def day_segment_path(root: str, day: date) -> str:
+    os.makedirs(root, exist_ok=True)
+    return os.path.join(root, f"{day.isoformat()}.csv")
+
+
+def record_append(root: str, day: date, rows: int, columns: list) -> bool:
+    """
+    day 파일에 rows 행이 추가됐음을 manifest 에 반영한다.
+    새 하루 파일이 생겼으면 True(→ 호출 쪽이 compact 를 돌린다).
+    """
+    return record_appends(root, [(day, rows, columns)])
+
+
+def record_appends(root: str, appends: list) -> bool:
+    """record_append 여러 개[(day, rows, columns)]를 manifest 한 번 읽고 한 번 써서 반영한다."""
+    manifest = load_manifest(root)
+    by_name = {seg["name"]: seg for seg in manifest["segments"]}
+    created = False
+    for day, rows, columns in appends:
+        name = os.path.basename(day_segment_path(root, day))
+        seg = by_name.get(name)
+        if seg is not None:
+            seg["rows"] += rows
+            seg["columns"] = list(columns)
+            continue
+        seg = by_name[name] = {
+            "name": name,
+            "first_day": day.isoformat(),
+            "last_day": day.isoformat(),
+            "rows": rows,
+            "columns": list(columns),
+            "compressed": False,
+        }
+        manifest["segments"].append(seg)
+        created = True
+    _save_manifest(root, manifest)
+    return created
+
+
+def segments(root: str, first: date = None, last: date = None) -> list:
+    """[first, last] 날짜 범위와 겹치는 세그먼트(시간 순). None 이면 제한 없음."""
+    out = []
+    for seg in load_manifest(root)["segments"]:
+        if first is not None and seg["last_day"] < first.isoformat():
+            continue
+        if last is not None and seg["first_day"] > last.isoformat():
+            continue
+        out.append(seg)
+    return out
+
+
+def segment_paths(root: str, first: date = None, last: date = None) -> list:
+    return [os.path.join(root, seg["name"]) for seg in segments(root, first, last)]
+
+
+def columns(root: str) -> list:
+    """모든 세그먼트 컬럼의 합집합(처음 나온 순서)."""
+    cols = {}
+    for seg in load_manifest(root)["segments"]:
+        for c in seg["columns"]:
+            cols.setdefault(c, None)
+    return list(cols)
+
+
+def _read_raw(path: str) -> pd.DataFrame:
+    """값을 문자열 그대로 읽는다(합칠 때 숫자 표기가 바뀌지 않게)."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def compact(root: str, today: date = None, extra: dict = None) -> int:
+    """
+    이번 달 이전의 하루 파일들을 달별 YYYY-MM.csv.gz 로 합친다.
+    이미 있는 달 파일에는 이어 붙인다. 합친 하루 파일 수를 돌려준다.
+    extra = {"YYYY-MM": (csv 문자열, first_day, last_day)} 는 하루 파일을 거치지 않고
+    같은 달 파일에 바로 합칠 행(지난 달 기록을 한꺼번에 가져올 때).
+    """
+    today = today or date.today()
+    this_month = today.isoformat()[:7]
+    manifest = load_manifest(root)
+    extra = extra or {}
+
+    by_month = {month: [] for month in extra}
+    for seg in manifest["segments"]:
+        if not seg["compressed"] and seg["first_day"][:7] < this_month:
+            by_month.setdefault(seg["first_day"][:7], []).append(seg)
+
+    merged = 0
+    for month, days in sorted(by_month.items()):
+        name = f"{month}.csv.gz"
+        path = os.path.join(root, name)
+        old = next((s for s in manifest["segments"] if s["name"] == name), None)
+
+        frames = [_read_raw(path)] if old is not None else []
+        frames += [_read_raw(os.path.join(root, s["name"])) for s in days]
+        firsts = [s["first_day"] for s in days] + ([old["first_day"]] if old else [])
+        lasts = [s["last_day"] for s in days] + ([old["last_day"]] if old else [])
+        if month in extra:
+            text, first_day, last_day = extra[month]
+            frames.append(_read_raw(io.StringIO(text)))
+            firsts.append(first_day.isoformat())
+            lasts.append(last_day.isoformat())
+        out = pd.concat(frames, ignore_index=True).fillna("")
+
+        tmp = path + ".tmp"
+        out.to_csv(tmp, index=False, compression="gzip")
+        os.replace(tmp, path)
+
+        drop = {s["name"] for s in days} | {name}
+        manifest["segments"] = [s for s in manifest["segments"] if s["name"] not in drop]
+        manifest["segments"].append({
+            "name": name,
+            "first_day": min(firsts),
+            "last_day": max(lasts),
+            "rows": len(out),
+            "columns": list(out.columns),
+            "compressed": True,
+        })
+        _save_manifest(root, manifest)
+        for s in days:
+            os.remove(os.path.join(root, s["name"]))
+        merged += len(days)
+    return merged
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 날짜별 로그 세그먼트")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compact", help="지난 달 하루 파일들을 달별 gzip 으로 합친다")
+    c.add_argument("--dir", default="mindwand_log")
+    s = sub.add_parser("split", help="기존 단일 CSV 로그를 날짜별 세그먼트로 옮긴다")
+    s.add_argument("--csv", default="mindwand_log.csv")
+    s.add_argument("--dir", default="mindwand_log")
+    args = ap.parse_args()
+
+    if args.cmd == "compact":
+        print(f"compacted {compact(args.dir)} day segments in {args.dir}")
+    elif args.cmd == "split":
+        import mindswitch_utils
+        n = mindswitch_utils.split_csv_into_segments(args.csv, args.dir)
+        print(f"split {n} rows: {args.csv} -> {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+추천 루프 가상 사용자 시뮬레이터(Streamlit 없이).
+
+화면을 눌러 보지 않고 bandit_recommend → (휴식) → 측정 → compute_mwi → bandit_update
+흐름을 가상 사용자 수만 명에게 돌려 regret 과 수렴 속도를 본다.
+
+- 사용자 모델(UserModel)은 갈아 끼울 수 있다. 모델은 사용자 × 자극별 잠재 효과 b 를 갖고,
+  효과에 맞춰 휴식 전/후 측정값(rt, err, idea)을 만든다.
+    StaticUsers   : 효과가 고정
+    DriftingUsers : 효과가 세션마다 조금씩 움직인다(선호 변화)
+- 한 샤드 = 앱 인스턴스 하나. 샤드 안의 사용자들은 배열 한 벌로 한 걸음씩 같이 진행한다.
+  shared=True 면 앱처럼 모든 사용자가 밴딧 상태 하나를 같이 쓰고(BANDIT_STATE_PATH),
+  False 면 예전처럼 사용자마다 따로 학습한다.
+- 샤드는 프로세스 풀에 나눠 돌린다.
+- regret 은 잠재 효과 기준: 그 시점 그 사용자에게 최선인 자극의 b - 추천 자극의 b.
+- best% 는 그 정책이 닿을 수 있는 최선과 비교한다: 공유 상태면 전체 평균 효과가 가장 큰
+  자극, 사용자별이면 각자 최선 자극.
+
+밴딧 규칙과 MWI 는 mindswitch_utils 의 것(EPSILON, 첫 최댓값 우선, 증분 평균,
+compute_mwi_batch)을 그대로 따른다. --check 는 실제 compute_mwi / bandit_update 와
+결과가 같은지 확인한다.
+
+    python mindswitch_sim.py --users 20000 --sessions 10 --shards 8
+    python mindswitch_sim.py --model drifting --per-user
+    python mindswitch_sim.py --check
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import mindswitch_utils as mu
+
+
+# ---------------------------
+# 사용자 모델
+# ---------------------------
+class StaticUsers:
+    """자극별 평균 효과(means) + 사용자별 편차(spread). 효과는 시간에 따라 변하지 않는다."""
+
+    def __init__(self, means=None, spread: float = 0.15, noise: float = 0.10):
+        self.means = means
+        self.spread = spread
+        self.noise = noise
+
+    def init(self, rng: np.random.Generator, users: int, k: int):
+        means = np.asarray(self.means if self.means is not None else np.linspace(0.0, 0.3, k))
+        self.b = means[None, :] + self.spread * rng.standard_normal((users, k))
+
+    def step(self, rng: np.random.Generator, t: int):
+        """세션 t 가 끝난 뒤 효과 변화(고정 모델은 없음)."""
+
+    def effect(self) -> np.ndarray:
+        return self.b
+
+    def measure(self, rng: np.random.Generator, arms: np.ndarray) -> dict:
+        """추천 자극 arms(사용자별)로 쉰 뒤의 전/후 측정값."""
+        u = len(arms)
+        b = self.b[np.arange(u), arms] + self.noise * rng.standard_normal(u)
+        pre_rt = rng.lognormal(np.log(0.8), 0.15, u)
+        pre_err = rng.poisson(3.0, u).astype(np.float64)
+        pre_idea = rng.poisson(1.0, u).astype(np.float64)
+        return {
+            "pre_rt": pre_rt,
+            "post_rt": pre_rt * (1 - 0.2 * b) * rng.lognormal(0, 0.05, u),
+            "pre_err": pre_err,
+            "post_err": rng.poisson(np.clip(3.0 * (1 - 0.5 * b), 0.05, None)).astype(np.float64),
+            "pre_idea": pre_idea,
+            "post_idea": rng.poisson(np.clip(1.0 * (1 + b), 0.05, None)).astype(np.float64),
+            "rest_min": rng.choice(mu.REST_CHOICES, u).astype(np.float64),
+        }
+
+
+class DriftingUsers(StaticUsers):
+    """StaticUsers + 세션마다 효과가 random walk(drift 표준편차)로 움직인다."""
+
+    def __init__(self, means=None, spread: float = 0.15, noise: float = 0.10, drift: float = 0.02):
+        super().__init__(means, spread, noise)
+        self.drift = drift
+
+    def step(self, rng: np.random.Generator, t: int):
+        self.b += self.drift * rng.standard_normal(self.b.shape)
+
+
+MODELS = {"static": StaticUsers, "drifting": DriftingUsers}
+
+
+# ---------------------------
+# 추천 루프(배열)
+# ---------------------------
+def _recommend(rng: np.random.Generator, q: np.ndarray, epsilon: float) -> np.ndarray:
+    """bandit_recommend 와 같은 규칙. q: (사용자, K). 동점이면 앞 자극(np.argmax = max(keys))."""
+    u, k = q.shape
+    explore = rng.random(u) < epsilon
+    return np.where(explore, rng.integers(0, k, u), np.argmax(q, axis=1))
+
+
+def _update_per_user(q: np.ndarray, n: np.ndarray, arms: np.ndarray, reward: np.ndarray):
+    """사용자마다 bandit_update 한 번(결측 보상은 건너뜀)."""
+    ok = np.isfinite(reward)
+    rows, a = np.flatnonzero(ok), arms[ok]
+    n[rows, a] += 1
+    q[rows, a] += (reward[ok] - q[rows, a]) / n[rows, a]
+
+
+def _update_shared(q: np.ndarray, n: np.ndarray, arms: np.ndarray, reward: np.ndarray):
+    """
+    모든 사용자가 상태 하나(q, n: (K,))를 같이 쓸 때 한 걸음의 bandit_update 들.
+    증분 평균을 차례로 적용한 것과 같다: q' = (q·n + Σr) / (n + m).
+    """
+    ok = np.isfinite(reward)
+    k = len(q)
+    m = np.bincount(arms[ok], minlength=k)
+    total = np.bincount(arms[ok], weights=reward[ok], minlength=k)
+    seen = m > 0
+    q[seen] = (q[seen] * n[seen] + total[seen]) / (n[seen] + m[seen])
+    n += m
+
+
+def simulate_shard(model, users: int, sessions: int, epsilon: float = mu.EPSILON,
+                   shared: bool = True, seed: int = 0) -> dict:
+    """
+    사용자 users 명이 sessions 번씩 쉬는 앱 인스턴스 하나. 세션 단계별 평균 regret,
+    최선 자극 추천 비율, 평균 mwi 를 돌려준다.
+    """
+    rng = np.random.default_rng(seed)
+    k = len(mu.STIMULI)
+    model.init(rng, users, k)
+    q = np.zeros(k) if shared else np.zeros((users, k))
+    n = np.zeros(k, dtype=np.int64) if shared else np.zeros((users, k), dtype=np.int64)
+
+    regret = np.empty(sessions)
+    best_rate = np.empty(sessions)
+    mwi_mean = np.empty(sessions)
+    for t in range(sessions):
+        qs = np.broadcast_to(q, (users, k)) if shared else q
+        arms = _recommend(rng, qs, epsilon)
+        mwi, _, _, _ = mu.compute_mwi_batch(**model.measure(rng, arms))
+        if shared:
+            _update_shared(q, n, arms, mwi)
+        else:
+            _update_per_user(q, n, arms, mwi)
+
+        b = model.effect()
+        picked = b[np.arange(users), arms]
+        regret[t] = float(np.mean(b.max(axis=1) - picked))
+        best = np.argmax(b.mean(axis=0)) if shared else np.argmax(b, axis=1)
+        best_rate[t] = float(np.mean(arms == best))
+        mwi_mean[t] = float(np.mean(mwi))
+        model.step(rng, t)
+    return {"users": users, "regret": regret, "best_rate": best_rate, "mwi": mwi_mean}
+
+
+def _shard_task(model_name: str, model_kwargs: dict, users: int, sessions: int,
+                epsilon: float, shared: bool, seed: int) -> dict:
+    return simulate_shard(MODELS[model_name](**model_kwargs), users, sessions, epsilon, shared, seed)
+
+
+def simulate(model_name: str = "static", users: int = 10_000, sessions: int = 10, shards: int = None,
+             epsilon: float = mu.EPSILON, shared: bool = True, seed: int = 0, **model_kwargs) -> dict:
+    """
+    users 명을 shards 개 앱 인스턴스로 나눠 프로세스 풀에서 돌리고 사용자 가중 평균을 낸다.
+    """
+    shards = shards or os.cpu_count() or 1
+    sizes = [users // shards + (1 if i < users % shards else 0) for i in range(shards)]
+    args = [(model_name, model_kwargs, s, sessions, epsilon, shared, seed + i)
+            for i, s in enumerate(sizes) if s > 0]
+    if len(args) > 1:
+        with ProcessPoolExecutor(max_workers=len(args)) as ex:
+            parts = list(ex.map(_shard_task, *zip(*args)))
+    else:
+        parts = [_shard_task(*a) for a in args]
+
+    w = np.array([p["users"] for p in parts], dtype=np.float64)[:, None]
+    out = {key: (np.vstack([p[key] for p in parts]) * w).sum(axis=0) / w.sum()
+           for key in ("regret", "best_rate", "mwi")}
+    out["cum_regret"] = np.cumsum(out["regret"])
+    # 수렴: 최선 자극 추천 비율이 (1-ε+ε/K) 의 90% 에 처음 닿는 세션(없으면 None)
+    k = len(mu.STIMULI)
+    target = 0.9 * (1 - epsilon + epsilon / k)
+    hit = np.flatnonzero(out["best_rate"] >= target)
+    out["converged_at"] = int(hit[0]) + 1 if len(hit) else None
+    return out
+
+
+# ---------------------------
+# 앱 함수와 맞는지 확인
+# ---------------------------
+def check(sessions: int = 2000, seed: int = 0) -> list:
+    """
+    같은 입력으로 compute_mwi(스칼라) == compute_mwi_batch, 그리고
+    bandit_update 를 차례로 부른 결과 == _update_shared 인지 확인한다. 불일치 목록을 돌려준다.
+    """
+    rng = np.random.default_rng(seed)
+    k = len(mu.STIMULI)
+    keys = list(mu.STIMULI)
+    model = StaticUsers()
+    model.init(rng, sessions, k)
+    arms = rng.integers(0, k, sessions)
+    m = model.measure(rng, arms)
+    # compute_mwi 의 None 처리도 확인하도록 일부를 비운다
+    for c in ("pre_rt", "post_rt", "pre_err", "pre_idea"):
+        m[c][rng.random(sessions) < 0.1] = np.nan
+    m["pre_rt"][rng.random(sessions) < 0.05] = 0.0
+
+    problems = []
+    batch = np.column_stack(mu.compute_mwi_batch(**m))
+    def none(x):
+        return None if np.isnan(x) else float(x)
+
+    for i in range(sessions):
+        scalar = mu.compute_mwi(none(m["pre_rt"][i]), none(m["post_rt"][i]), none(m["pre_err"][i]),
+                                none(m["post_err"][i]), none(m["pre_idea"][i]), none(m["post_idea"][i]),
+                                int(m["rest_min"][i]))
+        if not np.allclose(scalar, batch[i], rtol=1e-12, atol=1e-12):
+            problems.append(f"compute_mwi row {i}: {scalar} != {tuple(batch[i])}")
+
+    q, n = np.zeros(k), np.zeros(k, dtype=np.int64)
+    _update_shared(q, n, arms, batch[:, 0])
+    with tempfile.TemporaryDirectory() as tmp:
+        old = mu.BANDIT_STATE_PATH, mu.LOG_AGG_DIR, mu.LOG_PATH
+        mu.BANDIT_STATE_PATH = os.path.join(tmp, "bandit.json")
+        mu.LOG_AGG_DIR, mu.LOG_PATH = os.path.join(tmp, "agg"), os.path.join(tmp, "log.csv")
+        try:
+            for a, r in zip(arms, batch[:, 0]):
+                mu.bandit_update(keys[a], float(r))
+            state = mu.bandit_state()
+        finally:
+            mu.BANDIT_STATE_PATH, mu.LOG_AGG_DIR, mu.LOG_PATH = old
+    for i, key in enumerate(keys):
+        if state["n"][key] != n[i] or not np.isclose(state["q"][key], q[i], rtol=1e-9):
+            problems.append(f"bandit {key}: app q={state['q'][key]:.6g} n={state['n'][key]} "
+                            f"!= sim q={q[i]:.6g} n={n[i]}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 추천 루프 가상 사용자 시뮬레이터")
+    ap.add_argument("--model", choices=sorted(MODELS), default="static")
+    ap.add_argument("--users", type=int, default=10_000)
+    ap.add_argument("--sessions", type=int, default=10, help="사용자당 휴식 세션 수")
+    ap.add_argument("--shards", type=int, default=None, help="앱 인스턴스(프로세스) 수")
+    ap.add_argument("--epsilon", type=float, default=mu.EPSILON)
+    ap.add_argument("--per-user", action="store_true", help="사용자마다 따로 학습(공유 상태 없이)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--check", action="store_true", help="앱의 compute_mwi / bandit_update 와 비교")
+    args = ap.parse_args()
+
+    if args.check:
+        problems = check(seed=args.seed)
+        print("\n".join(problems) if problems else "simulator matches compute_mwi / bandit_update")
+        raise SystemExit(1 if problems else 0)
+
+    t0 = time.perf_counter()
+    out = simulate(args.model, args.users, args.sessions, args.shards, args.epsilon,
+                   shared=not args.per_user, seed=args.seed)
+    dt = time.perf_counter() - t0
+    print(f"{args.users * args.sessions:,} sessions ({args.users:,} users x {args.sessions}) "
+          f"in {dt:.2f}s, converged at session {out['converged_at']}")
+    print(f"{'session':>7} {'regret':>8} {'cum':>8} {'best%':>6} {'mwi':>8}")
+    for t in range(args.sessions):
+        print(f"{t + 1:>7} {out['regret'][t]:>8.4f} {out['cum_regret'][t]:>8.3f} "
+              f"{out['best_rate'][t] * 100:>6.1f} {out['mwi'][t]:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
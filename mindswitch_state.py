@@ -0,0 +1,382 @@
+"""
+세션 상태 저장소 (선택 백엔드).
+
+MINDSWITCH_STATE_BACKEND=sqlite 또는 redis 로 실행하면 mindswitch_utils 가
+타이머(timer_start, timer_total, running, work_remaining_sec), 측정값(pre_metrics,
+pre_easy), last_result 같은 세션 값을 st.session_state 밖에 저장한다.
+재접속하거나 로드밸런서가 다른 워커 프로세스로 보내도 URL 의 ?sid= 로 이어서 진행한다.
+밴딧 상태는 원래 BANDIT_STATE_PATH 파일로 프로세스끼리 공유한다.
+
+- sqlite: STATE_DB_PATH 한 파일(WAL). 한 기계의 여러 워커용.
+- redis : Redis 프로토콜(RESP) 서버. 외부 라이브러리 없이 소켓으로 말한다.
+          테스트용 로컬 대역 서버: python mindswitch_state.py standin --port 6390
+
+쓰기는 write-behind: 세션 값이 바뀌면 프로세스 버퍼에 넣고, 백그라운드 스레드가
+FLUSH_SEC 마다 모인 세션들을 한 번에(sqlite 트랜잭션 하나 / redis 파이프라인 하나) 쓴다.
+같은 프로세스는 버퍼를 먼저 보므로 바로 읽히고, 다른 프로세스에는 최대 FLUSH_SEC 늦게 보인다.
+
+동작 확인(두 워커가 같은 저장소를 보는 것처럼 왕복):
+    python mindswitch_state.py check --backend sqlite
+    python mindswitch_state.py check --backend redis --url redis://127.0.0.1:6390/0
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+TABLE = "session_state"
+TTL_SEC = 7 * 24 * 3600
+FLUSH_SEC = 0.2
+REDIS_PREFIX = "mindswitch:session:"
+
+
+def dumps(data: dict) -> str:
+    """세션 값 → JSON. numpy 스칼라는 파이썬 값으로."""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True,
+                      default=lambda o: o.item() if hasattr(o, "item") else str(o))
+
+
+# ---------------------------
+# SQLite
+# ---------------------------
+class SqliteStore:
+    def __init__(self, path: str, ttl: int = TTL_SEC):
+        self.path, self.ttl = path, ttl
+        with self._connect() as con:
+            con.execute(f"DELETE FROM {TABLE} WHERE updated < ?", (time.time() - ttl,))
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+                "sid TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            yield con
+            con.commit()
+        finally:
+            con.close()
+
+    def get_many(self, sids: list) -> dict:
+        if not sids:
+            return {}
+        marks = ",".join("?" * len(sids))
+        with self._connect() as con:
+            rows = con.execute(
+                f"SELECT sid, data FROM {TABLE} WHERE sid IN ({marks}) AND updated >= ?",
+                (*sids, time.time() - self.ttl),
+            ).fetchall()
+        return dict(rows)
+
+    def put_many(self, items: dict):
+        now = time.time()
+        with self._connect() as con:
+            con.executemany(
+                f"INSERT INTO {TABLE}(sid, data, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                [(sid, blob, now) for sid, blob in items.items()],
+            )
+
+    def delete(self, sid: str):
+        with self._connect() as con:
+            con.execute(f"DELETE FROM {TABLE} WHERE sid = ?", (sid,))
+
+
+# ---------------------------
+# Redis (RESP2)
+# ---------------------------
+class RedisError(Exception):
+    pass
+
+
+def _encode(args) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for a in args:
+        b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+    return b"".join(out)
+
+
+def _read(rf):
+    line = rf.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        return RedisError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        n = int(rest)
+        return None if n < 0 else rf.read(n + 2)[:-2]
+    if kind == b"*":
+        n = int(rest)
+        return None if n < 0 else [_read(rf) for _ in range(n)]
+    raise RedisError(f"bad reply {line!r}")
+
+
+class RedisStore:
+    """redis://[:password@]host[:port][/db]. 명령은 파이프라인으로 묶어 보낸다."""
+
+    def __init__(self, url: str, ttl: int = TTL_SEC, prefix: str = REDIS_PREFIX):
+        u = urlparse(url)
+        self.host, self.port = u.hostname or "127.0.0.1", u.port or 6379
+        self.password, self.db = u.password, int(u.path.strip("/") or 0)
+        self.ttl, self.prefix = ttl, prefix
+        self._sock = self._rf = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=5)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rf = self._sock.makefile("rb")
+        setup = ([["AUTH", self.password]] if self.password else []) + ([["SELECT", self.db]] if self.db else [])
+        if setup:
+            self._send(setup)
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._rf = None
+
+    def _send(self, cmds: list) -> list:
+        self._sock.sendall(b"".join(_encode(c) for c in cmds))
+        replies = [_read(self._rf) for _ in cmds]
+        for r in replies:
+            if isinstance(r, RedisError):
+                raise r
+        return replies
+
+    def pipeline(self, cmds: list) -> list:
+        """명령 목록을 한 번에 보내고 응답 목록을 받는다. 연결이 끊겼으면 한 번 다시 연결."""
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(cmds)
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        raise
+
+    def get_many(self, sids: list) -> dict:
+        if not sids:
+            return {}
+        values = self.pipeline([["MGET", *(self.prefix + s for s in sids)]])[0]
+        return {s: v.decode("utf-8") for s, v in zip(sids, values) if v is not None}
+
+    def put_many(self, items: dict):
+        if items:
+            self.pipeline([["SET", self.prefix + sid, blob, "EX", self.ttl] for sid, blob in items.items()])
+
+    def delete(self, sid: str):
+        self.pipeline([["DEL", self.prefix + sid]])
+
+
+class _StandinHandler(socketserver.StreamRequestHandler):
+    """테스트용 Redis 대역: PING / SELECT / AUTH / GET / SET [EX] / MGET / DEL / DBSIZE / FLUSHDB."""
+
+    def handle(self):
+        data, lock = self.server.data, self.server.lock
+        while True:
+            try:
+                cmd = _read(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(cmd, list) or not cmd:
+                self.wfile.write(b"-ERR protocol\r\n")
+                continue
+            name, args = cmd[0].decode().upper(), cmd[1:]
+            now = time.time()
+            with lock:
+                live = lambda k: k in data and (data[k][1] is None or data[k][1] > now)  # noqa: E731
+                if name in ("PING", "SELECT", "AUTH"):
+                    out = b"+PONG\r\n" if name == "PING" else b"+OK\r\n"
+                elif name == "SET":
+                    ttl = int(args[3]) if len(args) >= 4 and args[2].upper() == b"EX" else None
+                    data[args[0]] = (args[1], now + ttl if ttl else None)
+                    out = b"+OK\r\n"
+                elif name in ("GET", "MGET"):
+                    vals = [data[k][0] if live(k) else None for k in args]
+                    enc = [b"$-1\r\n" if v is None else b"$%d\r\n%s\r\n" % (len(v), v) for v in vals]
+                    out = enc[0] if name == "GET" else b"*%d\r\n" % len(enc) + b"".join(enc)
+                elif name == "DEL":
+                    n = sum(data.pop(k, None) is not None for k in args)
+                    out = b":%d\r\n" % n
+                elif name == "DBSIZE":
+                    out = b":%d\r\n" % sum(live(k) for k in list(data))
+                elif name == "FLUSHDB":
+                    data.clear()
+                    out = b"+OK\r\n"
+                else:
+                    out = b"-ERR unknown command '%s'\r\n" % name.encode()
+            self.wfile.write(out)
+
+
+class RedisStandin(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, host: str = "127.0.0.1"):
+        super().__init__((host, port), _StandinHandler)
+        self.data, self.lock = {}, threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.server_address[0]}:{self.server_address[1]}/0"
+
+    def start(self) -> "RedisStandin":
+        threading.Thread(target=self.serve_forever, name="redis-standin", daemon=True).start()
+        return self
+
+
+# ---------------------------
+# Write-behind
+# ---------------------------
+class WriteBehind:
+    """
+    store 앞의 프로세스 버퍼. put 은 버퍼에만 넣고 바로 돌아온다.
+    백그라운드 스레드가 FLUSH_SEC 마다 버퍼를 비워 store.put_many 로 한 번에 쓴다
+    (같은 세션이 그 사이 여러 번 바뀌면 마지막 값만 쓴다).
+    """
+
+    def __init__(self, store, flush_sec: float = FLUSH_SEC):
+        self.store, self.flush_sec = store, flush_sec
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self.stats = {"puts": 0, "flushes": 0, "written": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="mindswitch-state-writer", daemon=True)
+        self._thread.start()
+
+    def get(self, sid: str):
+        """세션 값(dict) 또는 None. 아직 쓰지 않은 버퍼를 먼저 본다."""
+        with self._lock:
+            blob = self._pending.get(sid)
+        if blob is None:
+            blob = self.store.get_many([sid]).get(sid)
+        return None if blob is None else json.loads(blob)
+
+    def put(self, sid: str, blob: str):
+        with self._lock:
+            self._pending[sid] = blob
+            self.stats["puts"] += 1
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self.store.put_many(batch)
+                self.stats["flushes"] += 1
+                self.stats["written"] += len(batch)
+            except Exception:
+                # 못 쓴 값은 더 새 값이 없을 때만 되돌려 다음에 다시 쓴다
+                with self._lock:
+                    for sid, blob in batch.items():
+                        self._pending.setdefault(sid, blob)
+                    self.stats["errors"] += 1
+
+    def close(self):
+        """남은 버퍼를 쓰고 스레드를 끝낸다(atexit)."""
+        self._stop = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(self.flush_sec)
+            self.flush()
+
+
+def open_store(backend: str, db_path: str = None, url: str = None):
+    if backend == "sqlite":
+        return SqliteStore(db_path)
+    if backend == "redis":
+        return RedisStore(url)
+    raise ValueError(f"unknown state backend: {backend}")
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def _check(backend: str, db_path: str, url: str, sessions: int):
+    """워커 두 개가 같은 저장소를 쓰는 상황: A 가 쓰고(write-behind) B 가 읽는다."""
+    standin = None
+    if backend == "redis" and url is None:
+        standin = RedisStandin().start()
+        url = standin.url
+    a = WriteBehind(open_store(backend, db_path, url))
+    b = WriteBehind(open_store(backend, db_path, url))
+    sids = [f"check-{os.getpid()}-{i}" for i in range(sessions)]
+    values = {sid: {"running": True, "timer_start": time.time(), "timer_total": 1500 + i,
+                    "pre_metrics": {"rt": 0.8, "err": 2, "idea": 1}}
+              for i, sid in enumerate(sids)}
+
+    t0 = time.perf_counter()
+    for sid, v in values.items():
+        a.put(sid, dumps(v))
+    put_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    a.flush()
+    flush_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    got = b.store.get_many(sids)
+    get_ms = (time.perf_counter() - t0) * 1e3
+
+    bad = [sid for sid in sids if json.loads(got.get(sid, "null")) != values[sid]]
+    for sid in sids:
+        a.store.delete(sid)
+    a.close()
+    b.close()
+    if standin is not None:
+        standin.shutdown()
+    print(f"{backend}: {sessions} sessions  put {put_ms:.2f} ms  flush {flush_ms:.2f} ms  "
+          f"read(other worker) {get_ms:.2f} ms  mismatches {len(bad)}")
+    return not bad
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MindSwitch 세션 상태 저장소")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("standin", help="테스트용 Redis 프로토콜 대역 서버")
+    s.add_argument("--port", type=int, default=6390)
+    c = sub.add_parser("check", help="두 저장소 인스턴스 사이 왕복 확인")
+    c.add_argument("--backend", choices=["sqlite", "redis"], default="sqlite")
+    c.add_argument("--db", default=None, help="기본값: mindswitch_utils.STATE_DB_PATH")
+    c.add_argument("--url", default=None, help="redis URL. 없으면 대역 서버를 잠깐 띄운다")
+    c.add_argument("--sessions", type=int, default=1000)
+    args = ap.parse_args()
+
+    if args.cmd == "standin":
+        server = RedisStandin(args.port)
+        print(f"listening on {server.url}")
+        server.serve_forever()
+    elif args.cmd == "check":
+        db = args.db
+        if db is None:
+            import mindswitch_utils
+            db = mindswitch_utils.STATE_DB_PATH
+        raise SystemExit(0 if _check(args.backend, db, args.url, args.sessions) else 1)
+
+
+if __name__ == "__main__":
+    main()
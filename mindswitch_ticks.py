@@ -0,0 +1,284 @@
+"""
+프로세스 하나에 스레드 하나인 초 단위 tick 스케줄러(MINDSWITCH_CLIENT_TIMER=0 일 때).
+
+Work/Mind 화면의 카운트다운 / 시간형 자극 fragment 를 run_every 로 돌리면
+브라우저가 "마지막 실행이 끝난 뒤 1초" 마다 다시 실행을 요청하므로, 실행 시간과
+왕복 시간만큼 초마다 밀리고(표시가 한 초씩 건너뛰거나 rem == 0 전환이 늦어짐)
+세션 수만큼 타이머가 따로 돈다.
+
+여기서는 세션마다 (anchor, until) 만 등록하고, 스레드 하나가 heap 에서 가장 가까운
+경계(anchor + k초, monotonic 시계)를 기다렸다가 그 세션의 fragment 재실행을
+세션 이벤트 루프에 넣는다. 다음 경계는 "이번 경계 + 1초" 로 잡으므로 늦어져도
+누적되지 않고, 스레드 수는 세션 수와 무관하게 하나다.
+
+    MINDSWITCH_TICKS=0   # 끄기: fragment 의 run_every(브라우저 주기)로 돌아간다
+
+재실행 요청은 streamlit 의 공개되지 않은 내부(Runtime._session_mgr, AppSession 의
+_fragment_storage / _client_state / _event_loop)를 쓴다. 처음 쓸 때 세션에서 한 번 확인하고,
+streamlit 버전이 바뀌어 없으면 경고를 한 번 남기고 run_every 로 돌아간다.
+
+측정(mindswitch_metrics):
+- tick_wake_late : 경계 시각 → 스케줄러가 깨어 재실행을 요청한 시각
+- tick_drift     : 경계 시각 → fragment 가 실제로 다시 그려지기 시작한 시각
+- tick_skipped   : 밀려서 건너뛴 경계 수(카운터)
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+import mindswitch_metrics as metrics
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("MINDSWITCH_TICKS", "1") != "0"
+PERIOD_SEC = 1.0
+# 경계 바로 앞에서 깨어나 같은 초를 다시 그리지 않도록 다음 경계를 잡을 때 두는 여유
+_EPS = 1e-3
+
+
+def _wall_to_mono(t: float) -> float:
+    return t + (time.monotonic() - time.time())
+
+
+def _next_boundary(anchor: float, period: float, after: float) -> float:
+    """anchor + k*period 중 after 보다 뒤인 첫 값."""
+    k = int((after - anchor) // period) + 1
+    return anchor + k * period
+
+
+class TickScheduler:
+    """
+    fire(key, due) 를 등록된 키마다 anchor + k*period 경계에서 부른다(단일 데몬 스레드).
+    fire 가 False 를 돌려주면 그 키는 해제한다. 시각은 모두 monotonic 초.
+    """
+
+    def __init__(self, fire, name: str = "mindswitch-ticks"):
+        self._fire = fire
+        self._name = name
+        self._cv = threading.Condition()
+        self._heap = []       # (due, seq, key)
+        self._entries = {}    # key -> [anchor, until, period, seq, due]
+        self._fired = {}      # key -> 마지막으로 요청한 경계(ran() 이 drift 를 잴 때 쓴다)
+        self._seq = itertools.count()
+        self._thread = None
+
+    def schedule(self, key, anchor: float, until: float, period: float = PERIOD_SEC):
+        """key 를 (anchor, until, period) 로 등록/갱신. 같은 값이면 기존 예약을 그대로 둔다."""
+        now = time.monotonic()
+        with self._cv:
+            e = self._entries.get(key)
+            if e is not None and abs(e[0] - anchor) < _EPS and abs(e[1] - until) < _EPS \
+                    and e[2] == period and e[4] > now:
+                return
+            if until <= now:
+                self._entries.pop(key, None)
+                return
+            due = min(_next_boundary(anchor, period, now + _EPS), until)
+            seq = next(self._seq)
+            self._entries[key] = [anchor, until, period, seq, due]
+            heapq.heappush(self._heap, (due, seq, key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            if self._heap[0][1] == seq:
+                self._cv.notify()
+
+    def cancel(self, match):
+        """match(key) 가 참인 키를 모두 해제."""
+        with self._cv:
+            for key in [k for k in self._entries if match(k)]:
+                del self._entries[key]
+                self._fired.pop(key, None)
+
+    def ran(self, key):
+        """key 의 재실행이 시작됐다고 알린다. 요청한 경계가 있으면 그 지연(초)을 돌려준다."""
+        with self._cv:
+            due = self._fired.pop(key, None)
+        return None if due is None else time.monotonic() - due
+
+    def __len__(self):
+        with self._cv:
+            return len(self._entries)
+
+    def _pop_due(self):
+        """다음 경계까지 기다렸다가 (key, due) 를 꺼내고 그 키의 다음 경계를 예약."""
+        with self._cv:
+            while True:
+                if not self._heap:
+                    self._cv.wait()
+                    continue
+                due, seq, key = self._heap[0]
+                e = self._entries.get(key)
+                if e is None or e[3] != seq:
+                    heapq.heappop(self._heap)  # 갱신/해제된 예전 예약
+                    continue
+                now = time.monotonic()
+                if due > now:
+                    self._cv.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+                anchor, until, period = e[0], e[1], e[2]
+                if due >= until:
+                    del self._entries[key]
+                else:
+                    nxt = _next_boundary(anchor, period, due + _EPS)
+                    if nxt <= now:  # 한 주기 넘게 밀렸으면 지난 경계는 건너뛴다
+                        skip = _next_boundary(anchor, period, now)
+                        metrics.count("tick_skipped", int(round((skip - nxt) / period)))
+                        nxt = skip
+                    e[3], e[4] = next(self._seq), min(nxt, until)
+                    heapq.heappush(self._heap, (e[4], e[3], key))
+                self._fired[key] = due
+                return key, due
+
+    def _run(self):
+        while True:
+            key, due = self._pop_due()
+            metrics.observe("tick_wake_late", time.monotonic() - due)
+            try:
+                alive = self._fire(key, due)
+            except Exception:
+                alive = False
+            if not alive:
+                self.cancel(lambda k: k == key)
+
+
+# ---------------------------
+# Streamlit 세션에 붙이기
+# ---------------------------
+# _request_fragment_rerun 이 쓰는 AppSession 의 내부 속성
+_SESSION_ATTRS = ("_fragment_storage", "_client_state", "_event_loop", "request_rerun")
+_internals = {}  # "ok": 내부를 쓸 수 있나(프로세스에서 한 번 확인)
+
+
+def _active_session(session_id):
+    """session_id 의 AppSession(끝난 세션이면 None)."""
+    from streamlit.runtime import Runtime
+
+    info = Runtime.instance()._session_mgr.get_active_session_info(session_id)
+    return None if info is None else info.session
+
+
+def _give_up(e: Exception):
+    """내부를 쓸 수 없다. 경고는 한 번만 남기고 이후 available() 은 False(run_every 로)."""
+    first = _internals.get("ok") is not False
+    _internals["ok"] = False
+    if first:
+        import streamlit
+        log.warning("streamlit %s 내부 API 가 달라 tick 스케줄러를 끄고 run_every 로 돌아간다: %r",
+                    streamlit.__version__, e)
+
+
+def _check_internals(session_id) -> bool:
+    """처음 한 번, 지금 세션에서 _request_fragment_rerun 이 쓰는 내부가 있는지 확인한다."""
+    if "ok" in _internals:
+        return _internals["ok"]
+    try:
+        from streamlit.proto.ClientState_pb2 import ClientState  # noqa: F401
+
+        session = _active_session(session_id)
+        if session is None:
+            return False
+        for name in _SESSION_ATTRS:
+            getattr(session, name)
+        session._fragment_storage.contains
+    except (AttributeError, ImportError) as e:
+        _give_up(e)
+        return False
+    _internals["ok"] = True
+    return True
+
+
+def _request_fragment_rerun(key, due) -> bool:
+    """key=(session_id, fragment_id) 세션에 fragment 재실행을 넣는다. 세션/fragment 가 없으면 False."""
+    session_id, fragment_id = key
+    try:
+        from streamlit.proto.ClientState_pb2 import ClientState
+
+        session = _active_session(session_id)
+        if session is None:
+            return False
+        if not session._fragment_storage.contains(fragment_id):
+            return False  # 다른 페이지로 넘어가 fragment 가 사라짐
+        # 마지막 실행의 client state(페이지, 위젯 값, ?sid=)를 그대로 쓰고 fragment 만 지정
+        cs = ClientState()
+        cs.CopyFrom(session._client_state)
+        cs.fragment_id = fragment_id
+        cs.is_auto_rerun = True
+        session._event_loop.call_soon_threadsafe(session.request_rerun, cs)
+    except (AttributeError, ImportError) as e:
+        _give_up(e)
+        return False
+    return True
+
+
+_scheduler = []
+_scheduler_lock = threading.Lock()
+
+
+def scheduler() -> TickScheduler:
+    with _scheduler_lock:
+        if not _scheduler:
+            _scheduler.append(TickScheduler(_request_fragment_rerun))
+        return _scheduler[0]
+
+
+def available() -> bool:
+    """
+    서버(streamlit run) 안이고 streamlit 내부를 쓸 수 있을 때만 True.
+    AppTest / bare 실행이나 내부가 달라진 streamlit 은 run_every 로 돌린다.
+    """
+    if not ENABLED or _internals.get("ok") is False:
+        return False
+    try:
+        from streamlit import config
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+
+        if not Runtime.exists() or config.get_option("global.appTest"):
+            return False
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return False
+    return ctx is not None and _check_internals(ctx.session_id)
+
+
+def _current_key():
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ThreadState, get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    fragment_id = ThreadState.get().fragment_id
+    if ctx is None or not fragment_id:
+        return None
+    return ctx.session_id, fragment_id
+
+
+def keep_ticking(anchor: float, until: float):
+    """
+    지금 실행 중인 fragment 를 anchor + k초 경계마다(until 까지) 다시 실행하도록 등록한다.
+    anchor / until 은 time.time() 시각. fragment 본문에서 매 실행마다 부른다.
+    """
+    if not available():
+        return
+    key = _current_key()
+    if key is None:
+        return
+    s = scheduler()
+    lag = s.ran(key)
+    if lag is not None:
+        metrics.observe("tick_drift", lag)
+    s.schedule(key, _wall_to_mono(anchor), _wall_to_mono(until))
+
+
+def cancel_current_session():
+    """이 세션의 tick 을 모두 해제(타이머 정지 때)."""
+    if not _scheduler:
+        return
+    from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None:
+        _scheduler[0].cancel(lambda k: k[0] == ctx.session_id)
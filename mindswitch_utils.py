@@ -1,16 +1,50 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
 import time
 import os
-from datetime import datetime, date
+import csv
+import io
+import json
+import logging
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+
+# 데코레이터로 쓰므로 다른 mindswitch_* 모듈과 달리 처음에 import(MINDSWITCH_METRICS=0 이면 꺼짐)
+import mindswitch_metrics as metrics
+# fragment 가 초마다 부르므로 함께 처음에 import(streamlit 내부는 그 안에서 필요할 때만)
+import mindswitch_ticks
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 스레드 직렬화만
+    fcntl = None
+
+log = logging.getLogger(__name__)
 
 APP_TITLE = "MindSwitch - 멍때림 유도 프로그램"
 LOG_PATH = "mindwand_log.csv"
+# 로그 저장소: "csv"(기본, LOG_PATH), "sqlite"(LOG_DB_PATH, mindswitch_logdb.py)
+# 또는 "segments"(LOG_SEGMENTS_DIR 아래 날짜별 파일, mindswitch_segments.py)
+LOG_BACKEND = os.environ.get("MINDSWITCH_LOG_BACKEND", "csv")
+LOG_DB_PATH = "mindwand_log.sqlite"
+LOG_SEGMENTS_DIR = "mindwand_log"
+# 자극별 누적 통계(mindswitch_agg.py). 저장할 때 같이 갱신된다.
+LOG_AGG_DIR = "mindwand_log.agg"
+LOG_BATCH_MAX = 256
+# 세션 상태 저장소: "none"(기본, st.session_state 만), "sqlite"(STATE_DB_PATH) 또는
+# "redis"(STATE_REDIS_URL). 켜면 재접속/다른 워커에서도 URL 의 ?sid= 로 이어진다(mindswitch_state.py).
+STATE_BACKEND = os.environ.get("MINDSWITCH_STATE_BACKEND", "none")
+STATE_DB_PATH = "mindwand_state.sqlite"
+STATE_REDIS_URL = os.environ.get("MINDSWITCH_REDIS_URL", "redis://127.0.0.1:6379/0")
 
 STIMULI = {
     "S1_VisualPulse": "🟦 시각 유도(느린 파동)",
-    "S2_AudioNoise": "🌊 청각 유도(화이트노이즈)",
+    "S2_AudioNoise": "🌊 청각 유도(노이즈)",
     "S3_BreathGuide": "🫁 호흡 유도(4-4-6)",
     "S4_ThoughtPrompt": "📝 문장 유도(10초마다 변경)"
 }
@@ -24,6 +58,10 @@ PROMPTS = [
     "지금은 ‘아무 것도 해결하지 않아도 되는 시간’이라고 스스로 허락하세요."
 ]
 
+# 호흡 유도 단계(이름, 초)와 문장 유도 교체 주기
+BREATH_PHASES = [("들이쉬세요", 4), ("멈추세요", 4), ("내쉬세요", 6)]
+PROMPT_PERIOD_SEC = 10
+
 DEFAULT_REST_MIN = 3
 REST_CHOICES = [1, 2, 3, 4, 5]
 
@@ -36,7 +74,12 @@ W_IDEA = 0.2
 # ---------------------------
 # State init
 # ---------------------------
-def init_state():
+def init_state(page: str):
+    """page: 성능 지표에 쓰는 페이지 이름(예: "Home", "5_Results")."""
+    # 페이지 재실행 시간은 여기(페이지 첫 줄)부터 go() 또는 end_page() 까지
+    metrics.page_start(page)
+    metrics.serve()
+    _restore_session_state()
     if "running" not in st.session_state:
         st.session_state.running = False
     if "timer_start" not in st.session_state:
@@ -65,11 +108,11 @@ def init_state():
     if "last_result" not in st.session_state:
         st.session_state.last_result = None
 
-    # 밴딧 추천 상태(표시 + 학습)
-    if "bandit_q" not in st.session_state:
-        st.session_state.bandit_q = {k: 0.0 for k in STIMULI.keys()}
-    if "bandit_n" not in st.session_state:
-        st.session_state.bandit_n = {k: 0 for k in STIMULI.keys()}
+    # 밴딧 추천 상태(표시 + 학습). 세션끼리 공유하는 BANDIT_STATE_PATH 의 사본.
+    if "bandit_q" not in st.session_state or "bandit_n" not in st.session_state:
+        state = bandit_state()
+        st.session_state.bandit_q = state["q"]
+        st.session_state.bandit_n = state["n"]
 
     # anchors
     if "prompt_anchor" not in st.session_state:
@@ -78,12 +121,19 @@ def init_state():
         st.session_state.fixed_prompt = None
     if "breath_anchor" not in st.session_state:
         st.session_state.breath_anchor = None
+    if "visual_anchor" not in st.session_state:
+        st.session_state.visual_anchor = None
+    if "visual_variant" not in st.session_state:
+        st.session_state.visual_variant = "pulse"
+    if "noise_color" not in st.session_state:
+        st.session_state.noise_color = "white"
 
 
 def reset_mind_anchors():
     st.session_state.prompt_anchor = None
     st.session_state.fixed_prompt = None
     st.session_state.breath_anchor = None
+    st.session_state.visual_anchor = None
 
 
 # ---------------------------
@@ -96,7 +146,83 @@ def go(page_path: str):
       "pages/5_Results.py"
       "Home.py"
     """
-    st.switch_page(page_path)
+    metrics.page_end()
+    persist_session_state()
+    # switch_page 는 URL 쿼리를 지우므로 세션 id 를 다시 붙인다
+    st.switch_page(page_path, query_params=_sid_query())
+
+def end_page():
+    """페이지 스크립트 마지막 줄. 재실행 시간을 기록하고 바뀐 세션 값을 저장한다."""
+    metrics.page_end()
+    persist_session_state()
+
+
+# ---------------------------
+# Session state store
+# ---------------------------
+# 저장소에 두는 세션 값. 밴딧 q/n 은 BANDIT_STATE_PATH 로 따로 공유한다.
+PERSISTED_KEYS = [
+    "running", "timer_start", "timer_total", "work_remaining_sec",
+    "work_min", "rest_min", "chosen_stim", "recommended_stim", "recommend_reason",
+    "pre_metrics", "pre_easy", "last_result",
+    "prompt_anchor", "fixed_prompt", "breath_anchor", "visual_anchor", "visual_variant",
+    "noise_color",
+]
+_state_store = None
+_state_store_lock = threading.Lock()
+
+def _get_state_store():
+    """프로세스 공유 write-behind 저장소(처음 쓸 때 연다). 꺼져 있으면 None."""
+    global _state_store
+    if STATE_BACKEND == "none":
+        return None
+    with _state_store_lock:
+        if _state_store is None:
+            import mindswitch_state
+            _state_store = mindswitch_state.WriteBehind(
+                mindswitch_state.open_store(STATE_BACKEND, STATE_DB_PATH, STATE_REDIS_URL)
+            )
+            atexit.register(_state_store.close)
+        return _state_store
+
+def _session_id() -> str:
+    """URL 의 ?sid=. 없으면 새로 만들어 URL 에 붙인다(재접속해도 같은 값)."""
+    import uuid
+    sid = st.query_params.get("sid")
+    if not sid:
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    return sid
+
+def _sid_query():
+    return {"sid": _session_id()} if STATE_BACKEND != "none" else None
+
+def _restore_session_state():
+    """이 연결에서 처음이면(새 탭, 재접속, 다른 워커) 저장소의 값으로 session_state 를 채운다."""
+    store = _get_state_store()
+    if store is None:
+        return
+    sid = _session_id()
+    if st.session_state.get("_state_sid") == sid:
+        return
+    with metrics.timer("state_restore"):
+        data = store.get(sid) or {}
+    for k in PERSISTED_KEYS:
+        if k in data:
+            st.session_state[k] = data[k]
+    st.session_state._state_sid = sid
+    st.session_state._state_saved = None
+
+def persist_session_state():
+    """PERSISTED_KEYS 값이 지난 저장 때와 다르면 저장소 버퍼에 넣는다(쓰기는 백그라운드)."""
+    store = _get_state_store()
+    if store is None or "_state_sid" not in st.session_state:
+        return
+    import mindswitch_state
+    blob = mindswitch_state.dumps({k: st.session_state[k] for k in PERSISTED_KEYS if k in st.session_state})
+    if blob != st.session_state._state_saved:
+        store.put(st.session_state._state_sid, blob)
+        st.session_state._state_saved = blob
 
 
 # ---------------------------
@@ -106,6 +232,7 @@ def start_timer_seconds(seconds: int):
     st.session_state.timer_start = time.time()
     st.session_state.timer_total = int(seconds)
     st.session_state.running = True
+    persist_session_state()
 
 def start_timer_minutes(minutes: int):
     start_timer_seconds(int(minutes * 60))
@@ -118,12 +245,167 @@ def remaining_seconds() -> int:
 
 def stop_timer():
     st.session_state.running = False
+    mindswitch_ticks.cancel_current_session()
+    persist_session_state()
 
+def timer_deadline() -> float:
+    """타이머가 끝나는 시각(time.time() 기준). 돌고 있지 않으면 0."""
+    if not st.session_state.running or st.session_state.timer_start is None:
+        return 0.0
+    return st.session_state.timer_start + st.session_state.timer_total
+
+# Work/Mind 화면의 초 단위 표시 방식.
+# CLIENT_TIMER=True(기본): 브라우저 컴포넌트(components/mind_timer)가 기준 시각만 받아
+#   스스로 갱신하고, 타이머가 끝났을 때만 서버로 알린다(세션 중 서버 왕복 없음).
+# CLIENT_TIMER=False: fragment 영역만 서버에서 다시 그린다. streamlit run 안에서는
+#   프로세스 공용 tick 스케줄러(mindswitch_ticks)가 timer_start 기준 초 경계마다 깨우고,
+#   AppTest 처럼 런타임이 없으면 run_every=TICK_SEC(브라우저 주기)로 돈다.
+CLIENT_TIMER = os.environ.get("MINDSWITCH_CLIENT_TIMER", "1") != "0"
+TICK_SEC = 1
+
+_client_timer = components.declare_component(
+    "mindswitch_timer",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "mind_timer"),
+)
+
+def _epoch_ms(t: float) -> int:
+    return int(round(t * 1000))
+
+@metrics.timed("countdown_tick")
+def _countdown_tick(label: str, on_expire):
+    rem = remaining_seconds()
+    st.info(f"⏱️ {label}: **{rem//60:02d}:{rem%60:02d}**")
+    if rem == 0:
+        on_expire()
+    else:
+        mindswitch_ticks.keep_ticking(st.session_state.timer_start, timer_deadline())
+
+_countdown_fragment = st.fragment(run_every=TICK_SEC)(_countdown_tick)
+_countdown_scheduled = st.fragment(_countdown_tick)
+
+def render_countdown(label: str, on_expire, key: str = "countdown"):
+    """
+    남은 시간 표시. 0초가 되면 on_expire() 를 부른다(보통 stop_timer + go(...) 로 페이지 전환).
+    CLIENT_TIMER 면 브라우저가 카운트다운을 그리고 만료 때만 스크립트가 다시 실행된다.
+    """
+    if not CLIENT_TIMER:
+        if mindswitch_ticks.available():
+            _countdown_scheduled(label, on_expire)
+        else:
+            _countdown_fragment(label, on_expire)
+        return
+
+    rem = remaining_seconds()
+    if rem == 0:
+        on_expire()
+        return
+    deadline_ms = _epoch_ms(st.session_state.timer_start + st.session_state.timer_total)
+    event = _client_timer(
+        mode="countdown", label=label, deadline_ms=deadline_ms,
+        server_now_ms=_epoch_ms(time.time()), key=key, default=None,
+    )
+    # 브라우저 시계가 조금 빠를 수 있어 1초까지는 만료로 본다(늦으면 브라우저가 다시 알린다)
+    if event and event.get("event") == "expired" and event.get("deadline_ms") == deadline_ms \
+            and remaining_seconds() <= 1:
+        on_expire()
 
 # ---------------------------
 # Bandit recommend
 # ---------------------------
+# 세션/서버 재시작과 무관하게 이어지는 밴딧 상태 {"q": {stim: 평균보상}, "n": {stim: 횟수}}.
+# 없으면 로그(chosen_stim, mwi)로 한 번 만들고, 이후 bandit_update 가 한 건씩 더한다.
+BANDIT_STATE_PATH = "mindwand_bandit.json"
+
+def bandit_replay(stims, rewards) -> tuple:
+    """
+    로그를 처음부터 bandit_update 한 것과 같은 (q, n). 행마다 돌지 않고
+    자극 코드별 bincount 로 합/횟수를 구한다(증분 평균 = 산술 평균).
+    보상이 결측인 행은 bandit_update 처럼 건너뛴다.
+    """
+    keys = list(STIMULI.keys())
+    if isinstance(stims, pd.Series) and isinstance(stims.dtype, pd.CategoricalDtype):
+        # load_log 결과(category)는 코드만 다시 매기면 된다
+        codes = stims.cat.set_categories(keys).cat.codes.to_numpy()
+    else:
+        codes = pd.Categorical(stims, categories=keys).codes
+    r = np.asarray(rewards, dtype=np.float64)
+    ok = (codes >= 0) & np.isfinite(r)
+    n = np.bincount(codes[ok], minlength=len(keys))
+    total = np.bincount(codes[ok], weights=r[ok], minlength=len(keys))
+    q = total / np.maximum(n, 1)
+    return ({k: float(v) for k, v in zip(keys, q)}, {k: int(v) for k, v in zip(keys, n)})
+
+def _bandit_warm_start() -> dict:
+    """누적 통계(mwi)가 있으면 그대로 쓰고(O(#자극)), 없으면 로그를 replay 한다."""
+    import mindswitch_agg
+    if mindswitch_agg.exists(LOG_AGG_DIR):
+        cells = mindswitch_agg.load(LOG_AGG_DIR, mindswitch_agg.OVERALL).get("mwi", {})
+        q = {k: float(cells[k]["mean"]) if k in cells else 0.0 for k in STIMULI}
+        n = {k: int(cells[k]["n"]) if k in cells else 0 for k in STIMULI}
+        return {"q": q, "n": n}
+    df = load_log()
+    if df.empty or "chosen_stim" not in df.columns or "mwi" not in df.columns:
+        return {"q": {k: 0.0 for k in STIMULI}, "n": {k: 0 for k in STIMULI}}
+    q, n = bandit_replay(df["chosen_stim"], df["mwi"])
+    return {"q": q, "n": n}
+
+def _save_bandit_state(state: dict):
+    tmp = BANDIT_STATE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, BANDIT_STATE_PATH)
+
+def _load_bandit_state_locked() -> dict:
+    if os.path.exists(BANDIT_STATE_PATH):
+        with open(BANDIT_STATE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    else:
+        state = _bandit_warm_start()
+        _save_bandit_state(state)
+    # 새로 생긴 자극은 0 에서 시작
+    for k in STIMULI:
+        state["q"].setdefault(k, 0.0)
+        state["n"].setdefault(k, 0)
+    return state
+
+def bandit_state() -> dict:
+    """모든 세션이 같이 쓰는 밴딧 상태(처음이면 로그로 warm start)."""
+    with _file_lock(BANDIT_STATE_PATH):
+        return _load_bandit_state_locked()
+
+def bandit_add(stims, rewards) -> dict:
+    """여러 (자극, 보상)을 밴딧 상태에 한 번에 더한다(행마다 bandit_update 한 것과 같은 평균)."""
+    q_new, n_new = bandit_replay(stims, rewards)
+    with _file_lock(BANDIT_STATE_PATH):
+        if not os.path.exists(BANDIT_STATE_PATH):
+            # 처음이면 warm start 가 이미 로그(방금 쓴 행 포함)를 반영한다
+            return _load_bandit_state_locked()
+        state = _load_bandit_state_locked()
+        q, n = state["q"], state["n"]
+        for k, add in n_new.items():
+            if add:
+                total = n[k] + add
+                q[k] = (q[k] * n[k] + q_new[k] * add) / total
+                n[k] = total
+        _save_bandit_state(state)
+        return state
+
+def rebuild_bandit_state() -> dict:
+    """로그를 다시 replay 해 밴딧 상태를 덮어쓴다(로그를 직접 고친 뒤 등)."""
+    with _file_lock(BANDIT_STATE_PATH):
+        df = load_log()
+        if df.empty or "chosen_stim" not in df.columns or "mwi" not in df.columns:
+            q, n = bandit_replay([], [])
+        else:
+            q, n = bandit_replay(df["chosen_stim"], df["mwi"])
+        state = {"q": q, "n": n}
+        _save_bandit_state(state)
+        return state
+
+@metrics.timed("bandit_recommend")
 def bandit_recommend():
+    state = bandit_state()
+    st.session_state.bandit_q, st.session_state.bandit_n = state["q"], state["n"]
     q = st.session_state.bandit_q
     keys = list(STIMULI.keys())
     if np.random.rand() < EPSILON:
@@ -131,41 +413,956 @@ def bandit_recommend():
     best = max(keys, key=lambda x: q.get(x, 0.0))
     return best, "exploit(학습된 최선 추천)"
 
+@metrics.timed("bandit_update")
 def bandit_update(stim_key: str, reward: float):
-    n = st.session_state.bandit_n
-    q = st.session_state.bandit_q
-    n[stim_key] = n.get(stim_key, 0) + 1
-    cnt = n[stim_key]
-    old = q.get(stim_key, 0.0)
-    q[stim_key] = old + (reward - old) / cnt
+    with _file_lock(BANDIT_STATE_PATH):
+        state = _load_bandit_state_locked()
+        n, q = state["n"], state["q"]
+        n[stim_key] = n.get(stim_key, 0) + 1
+        cnt = n[stim_key]
+        old = q.get(stim_key, 0.0)
+        q[stim_key] = old + (reward - old) / cnt
+        _save_bandit_state(state)
+    st.session_state.bandit_q, st.session_state.bandit_n = q, n
 
 
 # ---------------------------
 # Logs
 # ---------------------------
-def load_log():
-    if os.path.exists(LOG_PATH):
+# 로그 컬럼 타입. ts 는 epoch 초(int64), 자극/추천 사유/자극 변형은 category,
+# 체크형 점수는 작은 정수(결측 허용), 측정값/지표는 float32.
+LOG_CATEGORY_COLS = ["recommended_stim", "recommend_reason", "chosen_stim", "visual_variant", "noise_color"]
+LOG_SCHEMA = {
+    "ts": "int64",
+    "work_min": "Int16",
+    "rest_min": "Int16",
+    "recommended_stim": "category",
+    "recommend_reason": "category",
+    "chosen_stim": "category",
+    "visual_variant": "category",
+    "noise_color": "category",
+    "pre_rt": "float32",
+    "post_rt": "float32",
+    "pre_err": "Int32",
+    "post_err": "Int32",
+    "pre_idea": "Int32",
+    "post_idea": "Int32",
+    "d_rt": "float32",
+    "d_err": "float32",
+    "d_idea": "float32",
+    "mwi": "float32",
+    "easy_pre_q1": "Int8",
+    "easy_q1": "Int8",
+    "easy_q2": "Int8",
+    "easy_q3": "Int8",
+    "easy_mwi": "float32",
+}
+# read_csv 에 바로 넘기는 dtype. ts 는 옛 ISO 문자열일 수 있어 따로 변환하고,
+# 결측 허용 정수(Int*)는 C 파서가 느리게 처리하므로 float32 로 읽은 뒤 바꾼다.
+_LOG_READ_DTYPES = {
+    k: ("float32" if v.startswith("Int") else v)
+    for k, v in LOG_SCHEMA.items() if k != "ts"
+}
+
+def _local_midnight_epoch(day: date) -> int:
+    return int(time.mktime(day.timetuple()))
+
+_local_tz_cache = {}
+
+def _local_tz():
+    """
+    DST 를 아는 로컬 시간대(zoneinfo). TZ, 없으면 /etc/localtime 이 가리키는 이름으로 찾는다.
+    찾지 못하면(Windows 등) 지금의 고정 UTC 오프셋.
+    """
+    env = os.environ.get("TZ", "")
+    tz = _local_tz_cache.get(env)
+    if tz is None:
+        import zoneinfo
+        key = env.lstrip(":")
+        if not key:
+            path = os.path.realpath("/etc/localtime")
+            key = path.split("/zoneinfo/", 1)[1] if "/zoneinfo/" in path else ""
+        try:
+            tz = zoneinfo.ZoneInfo(key) if key else None
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            tz = None
+        tz = tz or datetime.now().astimezone().tzinfo
+        _local_tz_cache[env] = tz
+    return tz
+
+def _ts_to_epoch(s: pd.Series) -> pd.Series:
+    """
+    ts 컬럼을 epoch 초(int64)로. 숫자는 그대로 쓰고, 옛 로그의 ISO 문자열
+    (datetime.now().isoformat(), 로컬 시각)은 그 시각의 로컬 UTC 오프셋(DST 포함)으로 변환한다.
+    DST 가 끝나 두 번 있는 시각은 앞(DST) 것으로, 없는 시각은 뒤로 민다.
+    변환할 수 없는 값은 0.
+    """
+    if pd.api.types.is_integer_dtype(s.dtype) and not s.isna().any():
+        return s.astype("int64")
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.fillna(0).astype("int64")
+
+    s = s.astype(str)
+    dt = pd.to_datetime(s, errors="coerce", format="ISO8601")
+    out = pd.Series(0, index=s.index, dtype="int64")
+    num_mask = dt.isna()
+    if num_mask.any():
+        num = pd.to_numeric(s[num_mask], errors="coerce")
+        out[num_mask] = num.fillna(0).astype("int64")
+    iso_mask = ~num_mask
+    if iso_mask.any():
+        iso = dt[iso_mask]
+        if getattr(iso.dt, "tz", None) is not None:
+            out[iso_mask] = (iso.dt.tz_convert("UTC").dt.tz_localize(None) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+        else:
+            local = iso.dt.tz_localize(_local_tz(), ambiguous=np.ones(len(iso), dtype=bool),
+                                       nonexistent="shift_forward")
+            out[iso_mask] = (local.dt.tz_convert("UTC").dt.tz_localize(None) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return out
+
+def _apply_log_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """LOG_SCHEMA 에 있는 컬럼만 선언된 타입으로 맞춘다(이미 맞으면 그대로)."""
+    for col, dtype in LOG_SCHEMA.items():
+        if col not in df.columns:
+            continue
+        if col == "ts":
+            if df["ts"].dtype != "int64":
+                df["ts"] = _ts_to_epoch(df["ts"])
+        elif str(df[col].dtype) != dtype:
+            if dtype.startswith("Int"):
+                df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+            elif dtype == "float32":
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+            else:
+                df[col] = df[col].astype(dtype)
+    return df
+
+def _concat_logs(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """category 컬럼의 범주를 합쳐서 이어 붙인다(object 로 풀리지 않게)."""
+    for col in LOG_CATEGORY_COLS:
+        if col in a.columns and col in b.columns:
+            cats = a[col].cat.categories.union(b[col].cat.categories)
+            if len(cats) != len(a[col].cat.categories):
+                a[col] = a[col].cat.set_categories(cats)
+            b[col] = b[col].cat.set_categories(a[col].cat.categories)
+    return _apply_log_schema(pd.concat([a, b], ignore_index=True))
+
+# 로그 내보내기는 버튼을 눌렀을 때만 만든다. 로그를 EXPORT_CHUNK_ROWS 행씩 CSV 로 바꿔
+# (gzip 이면 바로 압축해) 이어 붙이므로 전체 CSV 문자열이 한꺼번에 생기지 않는다.
+# 결과는 (log_version, 기간, 압축) 으로 최근 EXPORT_CACHE_SIZE 개만 들고 있다.
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_CACHE_SIZE = 2
+_export_cache = {}
+_export_cache_lock = threading.Lock()
+
+def _export_frame_csv(df: pd.DataFrame, header: bool = True) -> bytes:
+    """다운로드용 CSV 조각. ts 는 사람이 읽는 로컬 ISO 시각으로 되돌린다."""
+    out = df.drop(columns=["ts_dt"], errors="ignore")
+    if "ts" in out.columns:
+        out = out.assign(ts=_epoch_to_local(out["ts"]).dt.strftime("%Y-%m-%dT%H:%M:%S"))
+    return out.to_csv(index=False, header=header).encode("utf-8")
+
+def _iter_frame_csv(df: pd.DataFrame, chunksize: int = EXPORT_CHUNK_ROWS):
+    for i in range(0, len(df), chunksize):
+        yield _export_frame_csv(df.iloc[i:i + chunksize], header=(i == 0))
+
+def _export_bounds(first: date = None, last: date = None):
+    """[first, last] 로컬 날짜 → (start, end) epoch 초(end 는 다음 날 0시). 둘 다 None 이면 None."""
+    if first is None and last is None:
+        return None
+    start = _local_midnight_epoch(first) if first is not None else 0
+    end = _local_midnight_epoch(last + timedelta(days=1)) if last is not None else 2**62
+    return start, end
+
+def iter_segments_csv(chunksize: int = EXPORT_CHUNK_ROWS, first: date = None, last: date = None):
+    """
+    segments 백엔드의 로그([first, last] 날짜만, None 이면 전체)를 시간 순으로 CSV 조각(bytes)으로
+    흘려보낸다. 헤더는 모든 세그먼트 컬럼의 합집합이고, 세그먼트는 하나씩 chunk 단위로 읽는다.
+    """
+    import mindswitch_segments
+    cols = mindswitch_segments.columns(LOG_SEGMENTS_DIR)
+    if not cols:
+        return
+    bounds = _export_bounds(first, last)
+    # 목록과 파일 열기는 manifest 잠금 아래에서 한 번에: 연 파일은 compact 가 지워도 끝까지 읽힌다
+    os.makedirs(LOG_SEGMENTS_DIR, exist_ok=True)
+    with _file_lock(os.path.join(LOG_SEGMENTS_DIR, mindswitch_segments.MANIFEST)):
+        paths = mindswitch_segments.segment_paths(LOG_SEGMENTS_DIR, first, last)
+        files = [(open(p, "rb"), "gzip" if p.endswith(".gz") else None) for p in paths]
+    try:
+        yield _encode_csv_row(cols).encode("utf-8")
+        for f, compression in files:
+            yield from _iter_segment_csv(f, compression, cols, bounds, chunksize)
+    finally:
+        for f, _ in files:
+            f.close()
+
+def _iter_segment_csv(f, compression, cols: list, bounds, chunksize: int):
+    """세그먼트 파일 하나(열린 파일)를 cols 모양의 다운로드용 CSV 조각으로."""
+    for chunk in pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=chunksize,
+                             compression=compression):
+        chunk = chunk.reindex(columns=cols, fill_value="")
+        if "ts" in chunk.columns:
+            epoch = _ts_to_epoch(chunk["ts"].replace("", None))
+            if bounds is not None:
+                keep = ((epoch >= bounds[0]) & (epoch < bounds[1])).to_numpy()
+                chunk, epoch = chunk[keep], epoch[keep]
+                if chunk.empty:
+                    continue
+            chunk["ts"] = _epoch_to_local(epoch).dt.strftime("%Y-%m-%dT%H:%M:%S")
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+def iter_log_csv(first: date = None, last: date = None, chunksize: int = EXPORT_CHUNK_ROWS):
+    """로그([first, last] 날짜만, None 이면 전체)를 다운로드용 CSV 조각(bytes)으로 흘려보낸다."""
+    if _use_segments():
+        yield from iter_segments_csv(chunksize, first, last)
+        return
+    bounds = _export_bounds(first, last)
+    if _use_sqlite():
+        import mindswitch_logdb
+        start, end = bounds if bounds is not None else (None, None)
+        header = True
+        for chunk in mindswitch_logdb.iter_frames(LOG_DB_PATH, start, end, chunksize):
+            yield _export_frame_csv(_apply_log_schema(chunk), header)
+            header = False
+        return
+    df = load_log()
+    if df.empty:
+        return
+    if bounds is not None:
+        df = df[(df["ts"] >= bounds[0]) & (df["ts"] < bounds[1])]
+    yield from _iter_frame_csv(df, chunksize)
+
+@metrics.timed("log_export")
+def build_log_export(first: date = None, last: date = None, compress: bool = False) -> bytes:
+    """
+    내보내기 파일 내용. iter_log_csv 조각을 이어 붙이고 compress 면 gzip(.csv.gz) 으로 압축한다.
+    같은 로그 버전 / 기간 / 압축이면 만들어 둔 결과를 그대로 돌려준다.
+    """
+    key = (log_version(), first, last, compress)
+    with _export_cache_lock:
+        data = _export_cache.pop(key, None)
+        if data is not None:
+            _export_cache[key] = data  # 가장 최근으로
+            return data
+    buf = io.BytesIO()
+    if compress:
+        import gzip
+        # mtime=0: 같은 내용이면 같은 파일(캐시/재다운로드 비교용)
+        with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=6, mtime=0) as gz:
+            for chunk in iter_log_csv(first, last):
+                gz.write(chunk)
+    else:
+        for chunk in iter_log_csv(first, last):
+            buf.write(chunk)
+    data = buf.getvalue()
+    with _export_cache_lock:
+        _export_cache[key] = data
+        while len(_export_cache) > EXPORT_CACHE_SIZE:
+            del _export_cache[next(iter(_export_cache))]
+    return data
+
+def log_date_bounds():
+    """로그의 (첫 날짜, 마지막 날짜)(로컬). 로그가 없으면 None."""
+    if _use_segments():
+        import mindswitch_segments
+        segs = mindswitch_segments.segments(LOG_SEGMENTS_DIR)
+        if not segs:
+            return None
+        return date.fromisoformat(segs[0]["first_day"]), date.fromisoformat(segs[-1]["last_day"])
+    if _use_sqlite():
+        import mindswitch_logdb
+        if not os.path.exists(LOG_DB_PATH):
+            return None
+        bounds = mindswitch_logdb.ts_bounds(LOG_DB_PATH)
+    else:
+        df = load_log()
+        bounds = None if df.empty or "ts" not in df.columns else (int(df["ts"].min()), int(df["ts"].max()))
+    if bounds is None:
+        return None
+    return datetime.fromtimestamp(bounds[0]).date(), datetime.fromtimestamp(bounds[1]).date()
+
+def log_download_data(first: date = None, last: date = None, compress: bool = False):
+    """
+    "전체 로그 CSV 다운로드" 버튼의 data. 로그가 없으면 None.
+    버튼을 눌렀을 때만 build_log_export 를 부르는 callable 을 돌려준다(렌더 때는 만들지 않음).
+    """
+    if log_date_bounds() is None:
+        return None
+    return lambda: build_log_export(first, last, compress)
+
+def _epoch_to_local(ts: pd.Series) -> pd.Series:
+    """epoch 초 → 로컬 시각(naive). 지금이 아니라 그 시각의 오프셋(DST)을 쓴다."""
+    return pd.to_datetime(ts, unit="s", utc=True).dt.tz_convert(_local_tz()).dt.tz_localize(None)
+
+def _use_sqlite() -> bool:
+    return LOG_BACKEND == "sqlite"
+
+def _use_segments() -> bool:
+    return LOG_BACKEND == "segments"
+
+# 세그먼트 목록을 읽은 뒤 compact 가 하루 파일을 지우면(달이 바뀔 때) manifest 를 다시 읽는 횟수
+SEGMENT_READ_RETRIES = 3
+
+def _load_segments(first: date = None, last: date = None) -> pd.DataFrame:
+    """
+    [first, last] 와 겹치는 세그먼트만 읽어 이어 붙인다(파일별 캐시 사용).
+    manifest 잠금 없이 읽으므로, 읽는 사이에 compact 가 하루 파일을 달 파일로 합쳐 지웠으면
+    manifest 를 다시 읽어 처음부터 다시 모은다(이미 읽은 파일은 캐시에서 바로 나온다).
+    """
+    import mindswitch_segments
+    for attempt in range(SEGMENT_READ_RETRIES):
+        paths = mindswitch_segments.segment_paths(LOG_SEGMENTS_DIR, first, last)
+        out = pd.DataFrame()
         try:
-            return pd.read_csv(LOG_PATH)
-        except Exception:
+            for p in paths:
+                df = _cached_read_csv(p, missing_ok=False)
+                if df.empty:
+                    continue
+                out = df if out.empty else _concat_logs(out.copy(deep=False), df.copy(deep=False))
+        except FileNotFoundError:
+            if attempt + 1 == SEGMENT_READ_RETRIES:
+                raise
+            continue
+        if first is None and last is None:
+            _prune_log_cache(LOG_SEGMENTS_DIR, keep=set(paths))
+        return out
+
+@metrics.timed("load_log")
+def load_log():
+    if _use_sqlite():
+        import mindswitch_logdb
+        return _apply_log_schema(mindswitch_logdb.load_all(LOG_DB_PATH))
+    if _use_segments():
+        return _load_segments()
+    try:
+        return _cached_read_csv(LOG_PATH)
+    except Exception:
+        return pd.DataFrame()
+
+def _stat_key(path: str):
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    return (st_.st_ino, st_.st_size, st_.st_mtime_ns)
+
+def log_version():
+    """로그 내용이 바뀌면 달라지는 값(파생 캐시의 키). 로그가 없으면 None 들."""
+    if _use_sqlite():
+        return ("sqlite", _stat_key(LOG_DB_PATH), _stat_key(LOG_DB_PATH + "-wal"))
+    if _use_segments():
+        import mindswitch_segments
+        paths = mindswitch_segments.segment_paths(LOG_SEGMENTS_DIR)
+        return ("segments",) + tuple((p, _stat_key(p)) for p in paths)
+    return ("csv", _stat_key(LOG_PATH))
+
+# load_log 캐시: 파일(size, mtime)이 그대로면 재사용, 뒤에만 늘었으면 늘어난 꼬리만 파싱.
+_log_cache = {}
+_log_cache_lock = threading.Lock()
+LOG_CACHE_STATS = {"hit": 0, "tail": 0, "miss": 0, "rows_parsed": 0}
+
+def log_cache_stats() -> dict:
+    """hit: 그대로 재사용 / tail: 꼬리만 파싱 / miss: 전체 파싱 / rows_parsed: 파싱한 총 행 수"""
+    with _log_cache_lock:
+        return dict(LOG_CACHE_STATS)
+
+def _prune_log_cache(root: str, keep: set):
+    """root 아래에서 더 이상 없는 파일(compact 로 지워진 하루 파일 등)의 캐시를 버린다."""
+    prefix = os.path.join(root, "")
+    with _log_cache_lock:
+        for p in [p for p in _log_cache if p.startswith(prefix) and p not in keep]:
+            del _log_cache[p]
+
+def _parse_csv_bytes(data: bytes) -> pd.DataFrame:
+    df = pd.read_csv(io.BytesIO(data), dtype=_LOG_READ_DTYPES)
+    LOG_CACHE_STATS["rows_parsed"] += len(df)
+    return _apply_log_schema(df)
+
+def _cached_read_csv(path: str, missing_ok: bool = True) -> pd.DataFrame:
+    """
+    path 를 읽어 DataFrame 으로. 같은 파일(inode)이 append 로만 자랐으면
+    이전에 파싱한 위치(offset) 뒤의 완성된 줄만 읽어 붙인다.
+    파일이 교체/축소됐거나(헤더 확장 등) 헤더가 달라졌으면 전체를 다시 파싱한다.
+    .gz(압축된 세그먼트)는 꼬리 읽기 없이 통째로 읽고, 바뀌지 않으면 재사용한다.
+    파일이 없으면 빈 DataFrame(missing_ok=False 면 FileNotFoundError).
+    반환값은 캐시와 데이터를 공유하므로 호출 쪽에서 값을 고쳐 쓰지 않는다.
+    """
+    try:
+        stt = os.stat(path)
+    except FileNotFoundError:
+        if not missing_ok:
+            raise
+        return pd.DataFrame()
+    ident = (stt.st_dev, stt.st_ino)
+
+    with _log_cache_lock:
+        c = _log_cache.get(path)
+        if c is not None and c["ident"] == ident and c["size"] == stt.st_size \
+                and c["mtime"] == stt.st_mtime_ns:
+            LOG_CACHE_STATS["hit"] += 1
+            return c["df"].copy(deep=False)
+
+        gz = path.endswith(".gz")
+        with open(path, "rb") as f:
+            if not gz and c is not None and c["ident"] == ident and stt.st_size >= c["offset"] \
+                    and f.read(len(c["header"])) == c["header"]:
+                f.seek(c["offset"])
+                chunk = f.read(stt.st_size - c["offset"])
+                cut = chunk.rfind(b"\n")
+                if cut >= 0:
+                    tail = _parse_csv_bytes(c["header"] + chunk[:cut + 1])
+                    if len(tail):
+                        c["df"] = _concat_logs(c["df"], tail)
+                    c["offset"] += cut + 1
+                c["size"], c["mtime"] = stt.st_size, stt.st_mtime_ns
+                LOG_CACHE_STATS["tail"] += 1
+                return c["df"].copy(deep=False)
+
+            data = f.read()
+        if gz:
+            import gzip
+            data = gzip.decompress(data)
+        LOG_CACHE_STATS["miss"] += 1
+        end = data.rfind(b"\n") + 1
+        nl = data.find(b"\n")
+        if nl < 0:
             return pd.DataFrame()
-    return pd.DataFrame()
+        df = _parse_csv_bytes(data[:end])
+        _log_cache[path] = {
+            "ident": ident, "size": stt.st_size, "mtime": stt.st_mtime_ns,
+            "offset": end, "header": data[:nl + 1], "df": df,
+        }
+        return df.copy(deep=False)
+
+def _read_csv_header(path: str):
+    """LOG_PATH 첫 줄(헤더)만 읽는다. 파일이 없거나 비어 있으면 None."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        first = f.readline()
+    row = next(csv.reader([first]), None)
+    return row or None
+
+def _encode_csv_row(values) -> str:
+    """pandas.to_csv 와 같은 표기로 한 줄을 만든다(None/NaN → 빈 칸)."""
+    buf = io.StringIO()
+    out = []
+    for v in values:
+        if v is None or (isinstance(v, float) and np.isnan(v)):
+            out.append("")
+        else:
+            out.append(v)
+    csv.writer(buf, lineterminator="\n").writerow(out)
+    return buf.getvalue()
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+def _widen_csv(path: str, header: list, new_cols: list):
+    """
+    새 컬럼이 생겼을 때(예: easy_* 필드) 헤더를 넓힌다.
+    pandas 로 다시 파싱하지 않고 줄 단위로 빈 칸만 덧붙여 복사한다.
+    스키마가 바뀔 때만 한 번 일어난다.
+    """
+    pad = "," * len(new_cols)
+    tmp_path = path + ".tmp"
+    with open(path, "r", encoding="utf-8", newline="") as src, \
+            open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+        src.readline()
+        dst.write(_encode_csv_row(header + new_cols))
+        for line in src:
+            body = line.rstrip("\r\n")
+            if body:
+                dst.write(body + pad + "\n")
+    os.replace(tmp_path, path)
+
+@contextmanager
+def _file_lock(path: str):
+    """path + ".lock" 에 대한 배타 잠금(같은 로그를 쓰는 다른 프로세스와 직렬화)."""
+    with open(path + ".lock", "a") as lf:
+        if fcntl is not None:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+def _append_csv_rows(path: str, rows: list) -> list:
+    """
+    여러 행을 path 끝에 한 번에 덧붙인다(append-only). 최종 헤더를 돌려준다.
+    - 파일이 없으면 헤더를 먼저 쓴다.
+    - 새 컬럼이 있으면 기존 파일의 헤더를 넓힌 뒤 덧붙인다.
+    """
+    keys = list(dict.fromkeys(k for row in rows for k in row.keys()))
+    header = _ensure_csv_header(path, keys)
+    data = "".join(_encode_csv_row([row.get(c) for c in header]) for row in rows)
+    _append_csv_text(path, data)
+    return header
+
+def _ensure_csv_header(path: str, keys: list) -> list:
+    """파일이 없으면 keys 로 헤더를 쓰고, keys 에 새 컬럼이 있으면 헤더를 넓힌다. 최종 헤더."""
+    header = _read_csv_header(path)
+    if header is None:
+        header = list(keys)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(_encode_csv_row(header))
+        return header
+    new_cols = [c for c in keys if c not in header]
+    if new_cols:
+        _widen_csv(path, header, new_cols)
+        header = header + new_cols
+    return header
+
+def _append_csv_text(path: str, data: str):
+    if not _ends_with_newline(path):
+        data = "\n" + data
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _append_csv_frame(path: str, df: pd.DataFrame) -> list:
+    """_append_csv_rows 의 DataFrame 판(행마다 문자열을 만들지 않고 to_csv 한 번)."""
+    header = _ensure_csv_header(path, list(df.columns))
+    _append_csv_text(path, df.reindex(columns=header).to_csv(index=False, header=False))
+    return header
+
+def _commit_rows(rows: list):
+    _commit_log_rows(rows)
+    # 여기까지 오면 행은 저장됐다. 누적 통계가 실패해도 저장 실패로 알리지 않는다(다시 제출하면 행이 겹친다).
+    try:
+        _update_aggregates(rows)
+    except Exception:
+        _mark_aggregates_stale("append_log")
+
+@metrics.timed("log_commit")
+def _commit_log_rows(rows: list):
+    if _use_sqlite():
+        import mindswitch_logdb
+        mindswitch_logdb.append_rows(LOG_DB_PATH, rows)
+        return
+    if _use_segments():
+        _commit_segment_rows(rows)
+        return
+    with _file_lock(LOG_PATH):
+        _append_csv_rows(LOG_PATH, rows)
+
+def _row_day(row: dict) -> date:
+    ts = row.get("ts")
+    return date.fromtimestamp(int(ts)) if ts is not None else date.today()
+
+def _commit_segment_rows(rows: list, root: str = None, compact: bool = True):
+    """행을 ts 의 로컬 날짜별 파일에 나눠 쓰고, 새 날짜가 시작되면 지난 달을 압축한다."""
+    import mindswitch_segments
+    root = root or LOG_SEGMENTS_DIR
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(_row_day(row), []).append(row)
+
+    os.makedirs(root, exist_ok=True)
+    with _file_lock(os.path.join(root, mindswitch_segments.MANIFEST)):
+        new_day = False
+        for day, day_rows in sorted(by_day.items()):
+            path = mindswitch_segments.day_segment_path(root, day)
+            header = _append_csv_rows(path, day_rows)
+            new_day |= mindswitch_segments.record_append(root, day, len(day_rows), header)
+        if new_day and compact:
+            mindswitch_segments.compact(root)
+
+def _commit_segment_frame(df: pd.DataFrame, root: str = None):
+    """
+    _commit_segment_rows 의 DataFrame 판. 이번 달 행은 날짜마다 한 번씩 덧붙이고,
+    지난 달 행은 하루 파일을 거치지 않고 달마다 한 번에 달 파일(compact)로 합친다.
+    """
+    import mindswitch_segments
+    root = root or LOG_SEGMENTS_DIR
+    os.makedirs(root, exist_ok=True)
+    days = _epoch_to_day(df["ts"]).to_numpy()
+    this_month = date.today().isoformat()[:7]
+    months = np.array([d.isoformat()[:7] for d in days])
+    past = months < this_month
+    with _file_lock(os.path.join(root, mindswitch_segments.MANIFEST)):
+        extra = {}
+        header = mindswitch_segments.columns(root)
+        header = header + [c for c in df.columns if c not in header]
+        for month, idx in pd.Series(np.flatnonzero(past)).groupby(months[past], sort=True):
+            idx = idx.to_numpy()
+            part = df.iloc[idx].reindex(columns=header)
+            extra[month] = (part.to_csv(index=False), days[idx].min(), days[idx].max())
+        appends = []
+        cur = np.flatnonzero(~past)
+        for day, idx in pd.Series(cur).groupby(days[cur], sort=True):
+            path = mindswitch_segments.day_segment_path(root, day)
+            part = df.iloc[idx.to_numpy()]
+            appends.append((day, len(part), _append_csv_frame(path, part)))
+        # manifest 는 날짜마다가 아니라 한 번만 다시 쓴다
+        if appends:
+            mindswitch_segments.record_appends(root, appends)
+        mindswitch_segments.compact(root, extra=extra)
+
+@metrics.timed("log_bulk_commit")
+def append_log_frame(df: pd.DataFrame):
+    """
+    여러 행(DataFrame, LOG_SCHEMA 타입)을 한 번에 로그에 덧붙인다(가져오기용).
+    append_log 처럼 행마다 큐를 거치지 않고 백엔드에 한 번 쓴 뒤,
+    누적 통계와 밴딧 상태에는 scope / 자극 별로 합쳐 더한다.
+    """
+    if df.empty:
+        return
+    flush_log()  # 대기 중인 append_log 행을 먼저 커밋
+    df = df.drop(columns=["ts_dt"], errors="ignore")
+    if _use_sqlite():
+        import mindswitch_logdb
+        mindswitch_logdb.append_frame(LOG_DB_PATH, df)
+    elif _use_segments():
+        _commit_segment_frame(df)
+    else:
+        with _file_lock(LOG_PATH):
+            _append_csv_frame(LOG_PATH, df)
+    try:
+        _add_frame_to_aggregates(df)
+    except Exception:
+        _mark_aggregates_stale("append_log_frame")
+    if "chosen_stim" in df.columns and "mwi" in df.columns:
+        bandit_add(df["chosen_stim"], df["mwi"])
+
+def split_csv_into_segments(csv_path: str, root: str = None, chunksize: int = 100_000) -> int:
+    """기존 단일 CSV 로그를 날짜별 세그먼트로 옮긴다(한 번만 실행). 옮긴 행 수."""
+    import mindswitch_segments
+    root = root or LOG_SEGMENTS_DIR
+    n = 0
+    for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunksize):
+        chunk["ts"] = _ts_to_epoch(chunk["ts"].replace("", None))
+        rows = [{k: (None if v == "" else v) for k, v in rec.items()}
+                for rec in chunk.to_dict("records")]
+        _commit_segment_rows(rows, root=root, compact=False)
+        n += len(rows)
+    mindswitch_segments.compact(root)
+    return n
+
+
+class _LogWriter:
+    """
+    프로세스 전체가 공유하는 group-commit 로그 작성기.
+    append_log 는 행을 큐에 넣고 커밋될 때까지 기다린다.
+    백그라운드 스레드가 쌓인 행을 최대 LOG_BATCH_MAX 개씩 묶어
+    파일 잠금 아래에서 한 번에 쓰고 fsync 한다.
+    """
+
+    _STOP = object()
+
+    def __init__(self):
+        self._q = queue.Queue()
+        # 큐에 넣기와 닫기를 직렬화한다: 행은 _STOP 앞에 들어가거나(커밋됨) 아예 안 들어간다
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mindswitch-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: dict) -> bool:
+        """
+        row 가 커밋될 때까지 기다린다. 이미 닫힌 작성기면 넣지 않고 False
+        (호출 쪽이 새 작성기로 다시 낸다).
+        """
+        done = threading.Event()
+        ticket = {"row": row, "done": done, "error": None}
+        with self._lock:
+            if self._closed:
+                return False
+            self._q.put(ticket)
+        done.wait()
+        if ticket["error"] is not None:
+            raise ticket["error"]
+        return True
+
+    def close(self):
+        """남은 행을 모두 커밋하고 스레드를 끝낸다. 이후 submit 은 False."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._q.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is self._STOP:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < LOG_BATCH_MAX:
+                try:
+                    nxt = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is self._STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            try:
+                _commit_rows([t["row"] for t in batch])
+            except Exception as e:
+                for t in batch:
+                    t["error"] = e
+            for t in batch:
+                t["done"].set()
+            if stop:
+                return
+
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+def _get_log_writer() -> _LogWriter:
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = _LogWriter()
+        return _log_writer
 
+def flush_log():
+    """대기 중인 행을 모두 커밋한다(종료 시 atexit 로 자동 호출)."""
+    global _log_writer
+    with _log_writer_lock:
+        w, _log_writer = _log_writer, None
+    if w is not None:
+        w.close()
+
+# 작성기는 flush_log 마다 새로 생기므로 작성기별이 아니라 flush_log 를 한 번만 등록한다
+atexit.register(flush_log)
+
+@metrics.timed("append_log")
 def append_log(row: dict):
-    df = load_log()
-    df2 = pd.DataFrame([row])
-    out = pd.concat([df, df2], ignore_index=True)
-    out.to_csv(LOG_PATH, index=False)
+    """
+    한 행을 로그 끝에 덧붙인다(append-only). 커밋이 끝난 뒤 반환하므로
+    바로 이어지는 load_log 에서 보인다. 여러 사용자가 동시에 저장해도
+    행이 사라지지 않고, 동시 저장은 한 번의 쓰기로 묶인다.
+    ts 는 epoch 초로 저장한다(ISO 문자열이 오면 변환).
+    """
+    if isinstance(row.get("ts"), str):
+        row = {**row, "ts": int(_ts_to_epoch(pd.Series([row["ts"]])).iloc[0])}
+    # flush_log 가 작성기를 바꾸는 사이에 집은 예전 작성기는 행을 받지 않는다 → 새 작성기로
+    while not _get_log_writer().submit(row):
+        pass
+
+def _today_bounds():
+    """오늘 로컬 자정과 내일 로컬 자정의 epoch 초."""
+    today = date.today()
+    return _local_midnight_epoch(today), _local_midnight_epoch(today + timedelta(days=1))
 
+@metrics.timed("today_df")
 def today_df(df: pd.DataFrame):
+    """오늘(로컬 자정~다음 자정) 행만. ts 정수 비교라 날짜 파싱이 없다. ts_dt 는 표시용."""
     if df.empty or "ts" not in df.columns:
         return pd.DataFrame()
-    tmp = df.copy()
-    tmp["ts_dt"] = pd.to_datetime(tmp["ts"], errors="coerce")
-    tmp = tmp[tmp["ts_dt"].dt.date == date.today()]
+    ts = df["ts"] if df["ts"].dtype == "int64" else _ts_to_epoch(df["ts"])
+    start, end = _today_bounds()
+    tmp = df[(ts >= start).to_numpy() & (ts < end).to_numpy()].copy()
+    tmp["ts_dt"] = _epoch_to_local(tmp["ts"] if tmp["ts"].dtype == "int64" else _ts_to_epoch(tmp["ts"]))
     return tmp
 
 
+@metrics.timed("load_today")
+def load_today():
+    """
+    오늘 행만. sqlite 백엔드는 ts 인덱스 범위 조회로, segments 백엔드는
+    오늘 세그먼트만 읽어서 전체 로그를 읽지 않는다.
+    """
+    if _use_sqlite():
+        import mindswitch_logdb
+        df = _apply_log_schema(mindswitch_logdb.load_range(LOG_DB_PATH, *_today_bounds()))
+        if not df.empty:
+            df["ts_dt"] = _epoch_to_local(df["ts"])
+        return df
+    if _use_segments():
+        return today_df(_load_segments(date.today(), date.today()))
+    return today_df(load_log())
+
+# ---------------------------
+# Aggregates (자극별 누적 통계)
+# ---------------------------
+def _update_aggregates(rows: list):
+    """커밋된 행을 전체/날짜별/주별/달별 누적 통계에 더한다."""
+    import mindswitch_agg
+    os.makedirs(LOG_AGG_DIR, exist_ok=True)
+    by_scope = {}
+    for row in rows:
+        for scope in mindswitch_agg.row_scopes(_row_day(row)):
+            by_scope.setdefault(scope, []).append(row)
+    with _file_lock(os.path.join(LOG_AGG_DIR, mindswitch_agg.OVERALL)):
+        if not mindswitch_agg.exists(LOG_AGG_DIR):
+            # 처음이면(또는 AGG_VERSION 이 바뀌었으면) 지금까지의 로그(방금 커밋한 행 포함)로 만든다
+            _rebuild_aggregates_locked(check=False)
+            return
+        for scope, part in [(mindswitch_agg.OVERALL, rows)] + list(by_scope.items()):
+            agg = mindswitch_agg.load(LOG_AGG_DIR, scope)
+            mindswitch_agg.save(LOG_AGG_DIR, scope, mindswitch_agg.update(agg, part))
+
+def _add_frame_to_aggregates(df: pd.DataFrame):
+    """여러 행을 누적 통계에 한 번에 더한다(append_log_frame)."""
+    import mindswitch_agg
+    os.makedirs(LOG_AGG_DIR, exist_ok=True)
+    with _file_lock(os.path.join(LOG_AGG_DIR, mindswitch_agg.OVERALL)):
+        if not mindswitch_agg.exists(LOG_AGG_DIR):
+            _rebuild_aggregates_locked(check=False)  # 방금 쓴 행 포함
+            return
+        mindswitch_agg.add_frame(LOG_AGG_DIR, df, _epoch_to_day)
+
+def _mark_aggregates_stale(where: str):
+    """
+    누적 통계 갱신이 실패했을 때(로그는 이미 저장됨). 예외를 남기고 누적 통계를 낡은 것으로 표시해
+    다음 저장이나 읽기(stim_stats 등)에서 로그로 다시 만들게 한다.
+    """
+    import mindswitch_agg
+    log.exception("누적 통계 갱신 실패(%s). 다음에 로그로 다시 만든다", where)
+    metrics.count("agg_update_failed")
+    try:
+        mindswitch_agg.invalidate(LOG_AGG_DIR)
+    except OSError:
+        log.exception("누적 통계를 낡은 것으로 표시하지 못했다: %s", LOG_AGG_DIR)
+
+def _epoch_to_day(ts: pd.Series) -> pd.Series:
+    return _epoch_to_local(ts).dt.date
+
+def _rebuild_aggregates_locked(check: bool) -> list:
+    import mindswitch_agg
+    return mindswitch_agg.rebuild(LOG_AGG_DIR, load_log(), _epoch_to_day, check=check)
+
+def rebuild_aggregates(check: bool = False) -> list:
+    """
+    원본 로그로 누적 통계를 다시 계산해 저장한다.
+    check=True 면 기존 값과 다른 항목 목록을 돌려준다(빈 목록 = 일치).
+    """
+    import mindswitch_agg
+    os.makedirs(LOG_AGG_DIR, exist_ok=True)
+    with _file_lock(os.path.join(LOG_AGG_DIR, mindswitch_agg.OVERALL)):
+        return _rebuild_aggregates_locked(check)
+
+def stim_stats(metric: str, day: date = None) -> pd.DataFrame:
+    """
+    chosen_stim 별 n / mean / var (day=None 이면 전체 기간).
+    누적 통계 파일 하나만 읽으므로 로그 크기와 무관하다.
+    """
+    import mindswitch_agg
+    if not mindswitch_agg.exists(LOG_AGG_DIR):
+        rebuild_aggregates()
+    scope = mindswitch_agg.OVERALL if day is None else mindswitch_agg.day_scope(day)
+    agg = mindswitch_agg.load(LOG_AGG_DIR, scope).get(metric, {})
+    return pd.DataFrame(
+        {"n": [v["n"] for v in agg.values()],
+         "mean": [v["mean"] for v in agg.values()],
+         "var": [v["m2"] / v["n"] if v["n"] else 0.0 for v in agg.values()]},
+        index=list(agg.keys()),
+    )
+
+def today_stim_means(metric: str) -> pd.Series:
+    """오늘 chosen_stim 별 metric 평균(결측 제외). 누적 통계에서 바로 읽는다."""
+    return stim_stats(metric, date.today())["mean"]
+
+# 기록 추이(History 페이지). 날짜/주/달별 누적 통계 파일에서 바로 만들고,
+# overall.json 이 그대로면(새로 저장된 행이 없으면) 만들어 둔 표를 다시 쓴다.
+# 차트에는 CHART_MAX_POINTS 개 이하로 줄여서 넘긴다.
+CHART_MAX_POINTS = 300
+_history_cache = {}
+_history_cache_lock = threading.Lock()
+
+def _ensure_aggregates():
+    import mindswitch_agg
+    if not mindswitch_agg.exists(LOG_AGG_DIR):
+        rebuild_aggregates()
+
+def _history_cached(key, build):
+    """누적 통계가 그대로면 build() 결과를 재사용한다."""
+    import mindswitch_agg
+    _ensure_aggregates()
+    version = _stat_key(os.path.join(LOG_AGG_DIR, f"{mindswitch_agg.OVERALL}.json"))
+    with _history_cache_lock:
+        hit = _history_cache.get(key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    value = build()
+    with _history_cache_lock:
+        _history_cache[key] = (version, value)
+    return value
+
+def agg_history(period: str) -> pd.DataFrame:
+    """period("day" / "week" / "month") 별 누적 통계 긴 표(start, name, group, n, sum, mean, m2)."""
+    import mindswitch_agg
+    return _history_cached(("history", period), lambda: mindswitch_agg.history(LOG_AGG_DIR, period))
+
+def period_trend(metric: str, period: str) -> pd.DataFrame:
+    """기간(주/달) 시작일 × 자극별 metric 평균. 그 기간에 기록이 없는 자극은 NaN."""
+    def build():
+        h = agg_history(period)
+        h = h[h["name"] == metric]
+        if h.empty:
+            return pd.DataFrame()
+        out = h.pivot_table(index="start", columns="group", values="mean")
+        out.index = pd.to_datetime(out.index)
+        return out.sort_index()
+    return _history_cached(("trend", metric, period), build)
+
+def rolling_trend(metric: str, window_days: int) -> pd.DataFrame:
+    """
+    날짜 × 자극별 window_days 일 이동 평균. 날짜별 (합, 개수)를 창 안에서 더해 나누므로
+    기록이 많은 날이 더 큰 비중을 갖는다(원본 행 평균과 같음). 창 안에 기록이 없으면 NaN.
+    """
+    def build():
+        h = agg_history("day")
+        h = h[h["name"] == metric]
+        if h.empty:
+            return pd.DataFrame()
+        n = h.pivot_table(index="start", columns="group", values="n", aggfunc="sum", fill_value=0)
+        total = h.pivot_table(index="start", columns="group", values="sum", aggfunc="sum", fill_value=0.0)
+        days = pd.date_range(min(n.index), max(n.index), freq="D")
+        n.index, total.index = pd.to_datetime(n.index), pd.to_datetime(total.index)
+        n, total = n.reindex(days, fill_value=0), total.reindex(days, fill_value=0.0)
+        roll_n = n.rolling(window_days, min_periods=1).sum()
+        return total.rolling(window_days, min_periods=1).sum() / roll_n.where(roll_n > 0)
+    return _history_cached(("rolling", metric, window_days), build)
+
+def minutes_breakdown(period: str) -> pd.DataFrame:
+    """기간 시작일별 세션 수와 작업/휴식 시간 합(분)."""
+    def build():
+        h = agg_history(period)
+        work = h[h["name"] == "work_min"].groupby("start")[["n", "sum"]].sum()
+        rest = h[h["name"] == "rest_min"].groupby("start")["sum"].sum()
+        out = pd.DataFrame({"sessions": work["n"], "work_min": work["sum"], "rest_min": rest})
+        out.index = pd.to_datetime(out.index)
+        return out.fillna(0).sort_index()
+    return _history_cached(("minutes", period), build)
+
+def mwi_by_setting(by: str) -> pd.DataFrame:
+    """전체 기간 정량 MWI 의 설정값(by = "work_min" / "rest_min")별 n, mean, std."""
+    import mindswitch_agg
+    _ensure_aggregates()
+    cells = mindswitch_agg.load_cached(LOG_AGG_DIR, mindswitch_agg.OVERALL) \
+        .get(mindswitch_agg.spec_name("mwi", by), {})
+    out = pd.DataFrame(
+        {"n": [c["n"] for c in cells.values()],
+         "mean": [c["mean"] for c in cells.values()],
+         "std": [np.sqrt(c["m2"] / c["n"]) if c["n"] else 0.0 for c in cells.values()]},
+        index=pd.Index([int(float(k)) for k in cells], name=by),
+    )
+    return out.sort_index()
+
+def downsample(df: pd.DataFrame, max_points: int = CHART_MAX_POINTS) -> pd.DataFrame:
+    """
+    차트용으로 행 수를 max_points 이하로. 연속한 행을 같은 크기 구간으로 묶어
+    구간 평균(결측 제외)을 쓰고, 인덱스는 구간의 첫 값으로 둔다.
+    """
+    if len(df) <= max_points:
+        return df
+    step = -(-len(df) // max_points)
+    out = df.groupby(np.arange(len(df)) // step).mean()
+    out.index = df.index[::step]
+    return out
+
 # ---------------------------
 # MWI
 # ---------------------------
@@ -191,10 +1388,69 @@ def compute_mwi(pre_rt, post_rt, pre_err, post_err, pre_idea, post_idea, rest_mi
     mwi = safe_div(core, max(1, rest_min))
     return float(mwi), float(d_rt), float(d_err), float(d_idea)
 
+def compute_mwi_batch(pre_rt, post_rt, pre_err, post_err, pre_idea, post_idea, rest_min,
+                      w_rt: float = W_RT, w_err: float = W_ERR, w_idea: float = W_IDEA):
+    """
+    compute_mwi 의 배열 버전(같은 길이의 배열/Series, 결측은 NaN = None).
+    값이 없거나 분모가 0 인 항은 compute_mwi 처럼 0 이 된다. 결과는 float64 배열 4개.
+    """
+    pre_rt, post_rt, pre_err, post_err, pre_idea, post_idea, rest_min = (
+        np.asarray(x, dtype=np.float64)
+        for x in (pre_rt, post_rt, pre_err, post_err, pre_idea, post_idea, rest_min)
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ok = ~np.isnan(pre_rt) & ~np.isnan(post_rt) & (pre_rt > 0)
+        d_rt = np.where(ok, (pre_rt - post_rt) / pre_rt, 0.0)
+        ok = ~np.isnan(pre_err) & ~np.isnan(post_err)
+        d_err = np.where(ok, (pre_err - post_err) / np.fmax(1, pre_err), 0.0)
+        ok = ~np.isnan(pre_idea) & ~np.isnan(post_idea)
+        d_idea = np.where(ok, (post_idea - pre_idea) / np.fmax(1, pre_idea), 0.0)
+
+    core = (w_rt * d_rt) + (w_err * d_err) + (w_idea * d_idea)
+    mwi = core / np.fmax(1, rest_min)
+    return mwi, d_rt, d_err, d_idea
+
+def _mwi_stim_terms() -> dict:
+    """
+    {"n": 자극별 행 수, "sums": (자극 수, 3) 항별 합}. MWI 는 가중치에 대해 선형이라
+    (mwi = w · (d_rt, d_err, d_idea) / rest) 자극별 세 항의 합만 있으면 된다.
+    저장할 때 같이 갱신되는 누적 통계(mindswitch_agg.MWI_TERMS)에서 읽으므로 로그를 읽지 않는다.
+    정량 MWI 를 계산했던 행만 들어 있다(측정을 건너뛴 행은 what-if 에서도 빠진다).
+    """
+    import mindswitch_agg
+    _ensure_aggregates()
+    agg = mindswitch_agg.load_cached(LOG_AGG_DIR, mindswitch_agg.OVERALL)
+    cells = [agg.get(t, {}) for t in mindswitch_agg.MWI_TERMS]
+    n = np.array([cells[0].get(k, {}).get("n", 0) for k in STIMULI], dtype=np.int64)
+    sums = np.array([[c.get(k, {}).get("sum", 0.0) for c in cells] for k in STIMULI], dtype=np.float64)
+    return {"n": n, "sums": sums.reshape(len(STIMULI), len(cells))}
+
+def mwi_what_if(w_rt: float, w_err: float, w_idea: float) -> pd.DataFrame:
+    """
+    전체 기록의 정량 MWI 를 가중치 (w_rt, w_err, w_idea)로 다시 계산한 자극별 평균과 순위.
+    now 는 지금 가중치(W_RT, W_ERR, W_IDEA)로 계산한 값. 기록이 없는 자극은 빠진다.
+    """
+    t = _mwi_stim_terms()
+    ok = t["n"] > 0
+    n, sums = t["n"][ok], t["sums"][ok]
+    out = pd.DataFrame({
+        "n": n,
+        "now": sums @ np.array([W_RT, W_ERR, W_IDEA]) / n,
+        "what_if": sums @ np.array([w_rt, w_err, w_idea], dtype=np.float64) / n,
+    }, index=np.array(list(STIMULI))[ok])
+    # 합 순서에 따른 끝자리 오차로 동점이 갈리지 않게 반올림해서 순위를 매긴다
+    out["rank_now"] = out["now"].round(12).rank(ascending=False, method="min").astype(int)
+    out["rank_what_if"] = out["what_if"].round(12).rank(ascending=False, method="min").astype(int)
+    return out.sort_values("rank_what_if", kind="stable")
+
 
 # ---------------------------
 # Sidebar
 # ---------------------------
+# 사이드바에 성능 지표 같은 관리자용 영역을 보여줄지
+ADMIN = os.environ.get("MINDSWITCH_ADMIN", "0") == "1"
+
 def render_sidebar():
     with st.sidebar:
         st.markdown("## ⛔ 종료")
@@ -207,78 +1463,248 @@ def render_sidebar():
         st.write("Q(평균보상):", st.session_state.bandit_q)
         st.write("N(선택횟수):", st.session_state.bandit_n)
 
+        if ADMIN and metrics.ENABLED:
+            _render_metrics_admin()
+
+def _render_metrics_admin():
+    st.markdown("---")
+    with st.expander("📈 성능 지표(관리자)", expanded=False):
+        rows = metrics.snapshot()
+        if not rows:
+            st.caption("아직 기록이 없습니다.")
+            return
+        st.dataframe(pd.DataFrame(rows).round(2), hide_index=True)
+        st.download_button("Prometheus 텍스트", data=metrics.prometheus_text(),
+                           file_name="mindswitch_metrics.prom", mime="text/plain")
+        if metrics.serve() is not None:
+            st.caption(f"엔드포인트: http://127.0.0.1:{metrics.serve().server_port}/metrics")
+
 
 # ---------------------------
 # Stimuli
 # ---------------------------
-@st.cache_data(show_spinner=False)
-def make_white_noise_wav(seconds: int, sr: int = 16000, amp: float = 0.12):
-    import struct
-    n = int(sr * seconds)
-    noise = (np.random.randn(n) * amp).clip(-1, 1)
-    pcm = (noise * 32767).astype(np.int16).tobytes()
+# 화이트노이즈는 짧은 루프 하나를 반복 재생한다(휴식 길이와 무관한 크기).
+NOISE_LOOP_SEC = 8
+NOISE_FADE_SEC = 0.5
+NOISE_CHUNK = 1 << 16
 
-    num_channels = 1
-    bits_per_sample = 16
+def _wav_header(n_samples: int, sr: int, num_channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    import struct
     byte_rate = sr * num_channels * (bits_per_sample // 8)
     block_align = num_channels * (bits_per_sample // 8)
-    subchunk2_size = len(pcm)
+    subchunk2_size = n_samples * block_align
     chunk_size = 36 + subchunk2_size
 
     header = b"RIFF" + struct.pack("<I", chunk_size) + b"WAVE"
     fmt = b"fmt " + struct.pack("<IHHIIHH", 16, 1, num_channels, sr, byte_rate, block_align, bits_per_sample)
     data = b"data" + struct.pack("<I", subchunk2_size)
-    return header + fmt + data + pcm
+    return header + fmt + data
+
+def _to_int16(x: np.ndarray, out: np.ndarray):
+    """float32 [-1, 1] → int16, x 를 제자리에서 바꾼다."""
+    np.clip(x, -1, 1, out=x)
+    x *= 32767
+    out[:] = x
+
+def make_noise_loop_pcm(seconds: float = NOISE_LOOP_SEC, sr: int = 16000, amp: float = 0.12,
+                        fade_sec: float = NOISE_FADE_SEC, seed: int = 0) -> np.ndarray:
+    """
+    반복 재생용 int16 노이즈 루프. 끝에 이어질 fade 구간을 미리 만들어 앞부분과
+    equal-power 크로스페이드하므로 끝 → 처음으로 넘어가는 이음매가 들리지 않는다.
+    float32 로 NOISE_CHUNK 씩 만들어 전체 길이의 임시 배열이 생기지 않는다.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(sr * seconds)
+    fade = min(int(sr * fade_sec), n)
+    pcm = np.empty(n, dtype=np.int16)
+
+    # 루프 끝 바로 뒤에 올 소리 = 처음 fade 구간과 섞일 꼬리
+    tail = rng.standard_normal(fade, dtype=np.float32)
+    w = np.linspace(0, np.pi / 2, fade, dtype=np.float32)
+    fade_in, fade_out = np.sin(w), np.cos(w)
+
+    for i in range(0, n, NOISE_CHUNK):
+        j = min(i + NOISE_CHUNK, n)
+        x = rng.standard_normal(j - i, dtype=np.float32)
+        if i < fade:
+            k = min(j, fade)
+            x[:k - i] *= fade_in[i:k]
+            x[:k - i] += tail[i:k] * fade_out[i:k]
+        x *= amp
+        _to_int16(x, pcm[i:j])
+    return pcm
+
+# 노이즈 색: 키 → (이름, 1/f^alpha 의 alpha). 모두 NOISE_BANK_DIR 에 미리 만들어 둔다.
+NOISE_COLORS = {
+    "white": ("화이트노이즈", 0.0),
+    "pink": ("핑크노이즈", 1.0),
+    "brown": ("브라운노이즈", 2.0),
+}
+NOISE_SR = 16000
+NOISE_AMP = 0.12
+# Streamlit 정적 파일 폴더(static/) 아래에 두어 /app/static/noise/<파일> 로 바로 내려준다.
+# (.streamlit/config.toml 의 server.enableStaticServing)
+NOISE_BANK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "noise")
+# 프록시 뒤 등 브라우저가 보는 주소를 서버가 알 수 없을 때 지정(예: https://host/mindswitch/)
+NOISE_STATIC_URL = os.environ.get("MINDSWITCH_STATIC_URL")
+
+def _noise_params() -> dict:
+    return {"sr": NOISE_SR, "seconds": NOISE_LOOP_SEC, "amp": NOISE_AMP,
+            "fade_sec": NOISE_FADE_SEC, "colors": {c: a for c, (_, a) in NOISE_COLORS.items()}}
+
+@metrics.timed("render_noise_loop")
+def render_noise_loop(color: str) -> np.ndarray:
+    """color 의 int16 루프. 화이트는 크로스페이드 루프, 핑크/브라운은 FFT 모양내기."""
+    if color == "white":
+        return make_noise_loop_pcm(NOISE_LOOP_SEC, NOISE_SR, NOISE_AMP)
+    import mindswitch_noise
+    return mindswitch_noise.colored_loop(
+        NOISE_COLORS[color][1], int(NOISE_SR * NOISE_LOOP_SEC), NOISE_SR, NOISE_AMP
+    )
+
+def build_noise_bank(root: str = None) -> dict:
+    """모든 색의 루프를 root 에 WAV 로 쓰고 manifest 를 돌려준다(빌드 단계)."""
+    import mindswitch_noise
+    root = root or NOISE_BANK_DIR
+    files = {}
+    for color in NOISE_COLORS:
+        pcm = render_noise_loop(color)
+        files[color] = [_wav_header(len(pcm), NOISE_SR), pcm]
+    return mindswitch_noise.write_bank(root, files, _noise_params())
+
+# 프로세스마다 한 번 연 memmap(내용은 페이지 캐시에서 프로세스끼리 공유)
+_noise_bank = {}  # color → (manifest 항목, memoryview)
+_noise_bank_lock = threading.Lock()
+
+def _load_noise_bank() -> dict:
+    """묶음이 없거나 파라미터가 바뀌었으면 한 프로세스만 다시 만든다."""
+    import mindswitch_noise
+    with _noise_bank_lock:
+        if not _noise_bank:
+            root = NOISE_BANK_DIR
+            manifest = mindswitch_noise.load_manifest(root)
+            if manifest.get("params") != _noise_params():
+                os.makedirs(root, exist_ok=True)
+                with _file_lock(os.path.join(root, mindswitch_noise.MANIFEST)):
+                    manifest = mindswitch_noise.load_manifest(root)
+                    if manifest.get("params") != _noise_params():
+                        manifest = build_noise_bank(root)
+            for c, entry in manifest["files"].items():
+                _noise_bank[c] = (entry, memoryview(mindswitch_noise.open_wav(root, entry)))
+        return _noise_bank
+
+@metrics.timed("noise_wav")
+def noise_wav(color: str = "white") -> memoryview:
+    """color 노이즈 루프 WAV 전체의 읽기 전용 memoryview(복사 없음)."""
+    return _load_noise_bank()[color][1]
+
+def noise_url(color: str = "white"):
+    """
+    color 노이즈 루프의 정적 URL(파일 이름에 내용 해시가 들어 있다).
+    정적 서빙이 꺼져 있거나 브라우저 주소를 모르면 None → 호출 쪽이 bytes 로 보낸다.
+    """
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    base = NOISE_STATIC_URL
+    if not base:
+        from urllib.parse import urlparse
+        url = st.context.url
+        if not url:
+            return None
+        u = urlparse(url)
+        prefix = st.get_option("server.baseUrlPath").strip("/")
+        base = f"{u.scheme}://{u.netloc}/" + (f"{prefix}/" if prefix else "")
+    entry = _load_noise_bank()[color][0]
+    return base.rstrip("/") + "/app/static/noise/" + entry["name"]
+
+# 시각 자극(S1_VisualPulse)의 모양: canvas 모드 → (이름, 제목, 안내 문구).
+# 노이즈 색처럼 한 자극 안의 보기 방식이라 밴딧 팔(STIMULI)은 늘지 않는다.
+VISUAL_VARIANTS = {
+    "pulse": ("느린 파동", "### 🟦 시각 유도: 느린 파동",
+              "단순한 움직임만 바라보며 생각을 붙잡지 말고 흘려보내세요."),
+    "wave": ("느린 물결", "### 〰️ 시각 유도: 느린 물결",
+             "물결이 흘러가는 모양만 따라가고, 떠오르는 생각은 그대로 두세요."),
+    "gradient": ("색 흐름", "### 🌈 시각 유도: 색 흐름",
+                 "천천히 바뀌는 색만 바라보며 생각을 흘려보내세요."),
+}
+
+# 정적 파일(components/visual_stimulus)로 한 번 받아 두고 같은 key 로 계속 쓴다.
+# 다시 실행돼도 인자가 같으면 iframe 을 다시 만들지 않고, 위상은 visual_anchor 기준.
+_visual_stimulus = components.declare_component(
+    "mindswitch_visual",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "visual_stimulus"),
+)
+
+def stimulus_visual():
+    def on_pick():
+        st.session_state.visual_variant = st.session_state.visual_variant_pick
+
+    if st.session_state.get("visual_anchor") is None:
+        st.session_state.visual_anchor = time.time()
+
+    # 위젯 상태는 페이지를 떠나면 지워지므로 선택은 visual_variant 에 따로 남긴다
+    mode = st.session_state.get("visual_variant", "pulse")
+    _, title, caption = VISUAL_VARIANTS[mode]
+    st.markdown(title)
+    st.radio(
+        "모양", list(VISUAL_VARIANTS.keys()), index=list(VISUAL_VARIANTS.keys()).index(mode),
+        key="visual_variant_pick", on_change=on_pick, horizontal=True,
+        format_func=lambda m: VISUAL_VARIANTS[m][0],
+    )
+    st.caption(caption)
+    _visual_stimulus(
+        mode=mode, height=280, anchor_ms=_epoch_ms(st.session_state.visual_anchor),
+        server_now_ms=_epoch_ms(time.time()), key=f"visual_{mode}", default=None,
+    )
 
 def stimulus_visual_pulse():
-    st.markdown("### 🟦 시각 유도: 느린 파동")
-    st.caption("단순한 움직임만 바라보며 생각을 붙잡지 말고 흘려보내세요.")
-    html = """
-    <div style="display:flex; justify-content:center; align-items:center; height:240px;">
-      <div style="
-        width:60px; height:60px;
-        border-radius:999px;
-        background:#4b86ff;
-        animation:pulse 4s ease-in-out infinite;
-      "></div>
-    </div>
-    <style>
-      @keyframes pulse {
-        0%   { transform: scale(1.0); opacity: 0.55; }
-        50%  { transform: scale(3.2); opacity: 0.20; }
-        100% { transform: scale(1.0); opacity: 0.55; }
-      }
-    </style>
-    """
-    st.components.v1.html(html, height=280)
+    stimulus_visual()
 
 def stimulus_audio_noise(rest_min: int):
-    st.markdown("### 🌊 청각 유도: 화이트노이즈")
-    st.caption("멍때림 시간 동안 계속 재생됩니다. (볼륨은 낮게 추천)")
-    wav = make_white_noise_wav(seconds=rest_min * 60)
-    st.audio(wav, format="audio/wav")
+    def on_pick():
+        st.session_state.noise_color = st.session_state.noise_color_pick
 
-def stimulus_breath_guided_446():
-    if st.session_state.breath_anchor is None:
-        st.session_state.breath_anchor = time.time()
-
-    t = int(time.time() - st.session_state.breath_anchor)
-    phases = [("들이쉬세요", 4), ("멈추세요", 4), ("내쉬세요", 6)]
-    cycle = sum(d for _, d in phases)  # 14
+    # 위젯 상태는 페이지를 떠나면 지워지므로 선택은 noise_color 에 따로 남긴다
+    color = st.session_state.noise_color
+    st.markdown(f"### 🌊 청각 유도: {NOISE_COLORS[color][0]}")
+    st.radio(
+        "소리 종류", list(NOISE_COLORS.keys()), index=list(NOISE_COLORS.keys()).index(color),
+        key="noise_color_pick", on_change=on_pick, horizontal=True,
+        format_func=lambda c: NOISE_COLORS[c][0],
+    )
+    st.caption("멍때림 시간 동안 계속 재생됩니다. (볼륨은 낮게 추천)")
+    # 짧은 루프를 반복 재생하므로 rest_min 과 관계없이 같은 파일 하나를 쓴다.
+    # URL 이면 브라우저가 한 번 받아 캐시하고, 서버는 다시 실행돼도 내용을 건드리지 않는다.
+    src = noise_url(color) or noise_wav(color).tobytes()
+    st.audio(src, format="audio/wav", loop=True)
 
+def _breath_phase(t: int):
+    """anchor 로부터 t 초 지난 시점의 (단계 이름, 그 단계 남은 초)."""
+    cycle = sum(d for _, d in BREATH_PHASES)  # 14
     x = t % cycle
     acc = 0
-    cur_name, cur_rem = phases[0][0], phases[0][1]
-    for name, dur in phases:
+    for name, dur in BREATH_PHASES:
         if x < acc + dur:
-            cur_name = name
-            cur_rem = (acc + dur) - x
-            break
+            return name, (acc + dur) - x
         acc += dur
+    return BREATH_PHASES[0]
+
+def stimulus_breath_guided_446():
+    if st.session_state.breath_anchor is None:
+        st.session_state.breath_anchor = time.time()
 
     st.markdown("### 🫁 호흡 유도: 4-4-6 (자동 가이드)")
-    st.success(f"## {cur_name}")
-    st.markdown(f"### ⏳ {cur_rem}초")
+    if CLIENT_TIMER:
+        _client_timer(
+            mode="breath", anchor_ms=_epoch_ms(st.session_state.breath_anchor),
+            phases=BREATH_PHASES, server_now_ms=_epoch_ms(time.time()),
+            key="breath_guide", default=None,
+        )
+    else:
+        cur_name, cur_rem = _breath_phase(int(time.time() - st.session_state.breath_anchor))
+        st.success(f"## {cur_name}")
+        st.markdown(f"### ⏳ {cur_rem}초")
+        mindswitch_ticks.keep_ticking(st.session_state.breath_anchor, timer_deadline())
     st.caption("패턴: 4초 들이쉬기 → 4초 멈춤 → 6초 내쉬기 (반복)")
 
 def stimulus_prompt_auto_10s():
@@ -288,24 +1714,57 @@ def stimulus_prompt_auto_10s():
         st.session_state.prompt_anchor = time.time()
         st.session_state.fixed_prompt = str(np.random.choice(PROMPTS))
 
-    elapsed = int(time.time() - st.session_state.prompt_anchor)
+    if CLIENT_TIMER:
+        # 이후 문장은 브라우저가 (seed, 구간 번호)로 골라 바꾼다
+        _client_timer(
+            mode="prompt", anchor_ms=_epoch_ms(st.session_state.prompt_anchor),
+            prompts=PROMPTS, period=PROMPT_PERIOD_SEC,
+            first_index=PROMPTS.index(st.session_state.fixed_prompt),
+            seed=_epoch_ms(st.session_state.prompt_anchor) & 0x7FFFFFFF,
+            server_now_ms=_epoch_ms(time.time()), key="thought_prompt", default=None,
+        )
+    else:
+        elapsed = int(time.time() - st.session_state.prompt_anchor)
 
-    if elapsed >= 10:
-        st.session_state.prompt_anchor = time.time()
-        st.session_state.fixed_prompt = str(np.random.choice(PROMPTS))
-        elapsed = 0
+        if elapsed >= PROMPT_PERIOD_SEC:
+            # 기준 시각을 지금이 아니라 주기 단위로 옮겨 초 경계가 밀리지 않게 한다
+            st.session_state.prompt_anchor += elapsed - elapsed % PROMPT_PERIOD_SEC
+            st.session_state.fixed_prompt = str(np.random.choice(PROMPTS))
+            elapsed %= PROMPT_PERIOD_SEC
 
-    remain = 10 - elapsed
-    st.markdown(f"## “{st.session_state.fixed_prompt}”")
-    st.caption(f"⏳ 다음 문장까지 {remain}초")
+        remain = PROMPT_PERIOD_SEC - elapsed
+        st.markdown(f"## “{st.session_state.fixed_prompt}”")
+        st.caption(f"⏳ 다음 문장까지 {remain}초")
+        mindswitch_ticks.keep_ticking(st.session_state.prompt_anchor, timer_deadline())
     st.info("천천히 한 번 읽고, 떠오르는 생각은 잡지 말고 흘려보내세요.")
 
+# 시간에 따라 내용이 바뀌는 자극(초 단위로 다시 그려야 하는 것)
+TIMED_STIMULI = {"S3_BreathGuide", "S4_ThoughtPrompt"}
+
+def _render_timed(stim_key: str):
+    if stim_key == "S3_BreathGuide":
+        stimulus_breath_guided_446()
+    elif stim_key == "S4_ThoughtPrompt":
+        stimulus_prompt_auto_10s()
+
+_timed_stimulus_fragment = st.fragment(run_every=TICK_SEC)(_render_timed)
+_timed_stimulus_scheduled = st.fragment(_render_timed)
+
+def render_timed_stimulus(stim_key: str):
+    """호흡/문장 자극. CLIENT_TIMER 면 브라우저가, 아니면 초 경계마다 fragment 가 갱신한다."""
+    if CLIENT_TIMER:
+        _render_timed(stim_key)
+    elif mindswitch_ticks.available():
+        _timed_stimulus_scheduled(stim_key)
+    else:
+        _timed_stimulus_fragment(stim_key)
+
+@metrics.timed("render_stimulus")
 def render_stimulus(stim_key: str, rest_min: int):
+    """시각/청각 자극은 한 번만 그리고, 시간형 자극은 fragment 로 초마다 갱신한다."""
     if stim_key == "S1_VisualPulse":
-        stimulus_visual_pulse()
+        stimulus_visual()
     elif stim_key == "S2_AudioNoise":
         stimulus_audio_noise(rest_min)
-    elif stim_key == "S3_BreathGuide":
-        stimulus_breath_guided_446()
-    elif stim_key == "S4_ThoughtPrompt":
-        stimulus_prompt_auto_10s()
+    elif stim_key in TIMED_STIMULI:
+        render_timed_stimulus(stim_key)
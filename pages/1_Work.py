@@ -1,24 +1,30 @@
 import streamlit as st
-import time
 from mindswitch_utils import (
     APP_TITLE, init_state, render_sidebar,
-    remaining_seconds, stop_timer, reset_mind_anchors, go
+    remaining_seconds, stop_timer, reset_mind_anchors,
+    render_countdown, go, end_page
 )
 
 st.set_page_config(page_title=APP_TITLE, layout="centered")
-init_state()
+init_state("1_Work")
 render_sidebar()
 
 st.title(APP_TITLE)
 st.subheader("🧩 Work 모드")
 
-rem = remaining_seconds()
-st.info(f"⏱️ 남은 작업 시간: **{rem//60:02d}:{rem%60:02d}**")
+def on_work_expired():
+    st.session_state.work_remaining_sec = 0
+    stop_timer()
+    reset_mind_anchors()
+    go("pages/2_Choose.py")
+
+# 남은 시간은 1초마다 이 영역만 갱신, 0초가 되면 Choose 로 전환
+render_countdown("남은 작업 시간", on_work_expired)
 
 colA, colB, colC = st.columns(3)
 with colA:
     if st.button("😶‍🌫️ 지금 멍때리기(바로 전환)"):
-        st.session_state.work_remaining_sec = rem
+        st.session_state.work_remaining_sec = remaining_seconds()
         stop_timer()
         reset_mind_anchors()
         go("pages/2_Choose.py")
@@ -30,11 +36,4 @@ with colC:
     if st.button("🔄 새로고침"):
         st.rerun()
 
-if rem == 0:
-    st.session_state.work_remaining_sec = 0
-    stop_timer()
-    reset_mind_anchors()
-    go("pages/2_Choose.py")
-
-time.sleep(1)
-st.rerun()
+end_page()
@@ -3,11 +3,11 @@ from mindswitch_utils import (
     APP_TITLE, init_state, render_sidebar,
     STIMULI, REST_CHOICES, DEFAULT_REST_MIN,
     bandit_recommend, reset_mind_anchors,
-    start_timer_minutes, start_timer_seconds, go
+    start_timer_minutes, start_timer_seconds, go, end_page
 )
 
 st.set_page_config(page_title=APP_TITLE, layout="centered")
-init_state()
+init_state("2_Choose")
 render_sidebar()
 
 st.title(APP_TITLE)
@@ -51,3 +51,5 @@ with col2:
 with col3:
     if st.button("⛔ 종료(결과로)"):
         go("pages/5_Results.py")
+
+end_page()
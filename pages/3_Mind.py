@@ -1,21 +1,24 @@
 import streamlit as st
-import time
 from mindswitch_utils import (
     APP_TITLE, init_state, render_sidebar,
-    remaining_seconds, stop_timer,
+    stop_timer,
     start_timer_minutes, start_timer_seconds,
-    render_stimulus, go
+    render_countdown, render_stimulus, go, end_page
 )
 
 st.set_page_config(page_title=APP_TITLE, layout="centered")
-init_state()
+init_state("3_Mind")
 render_sidebar()
 
 st.title(APP_TITLE)
 st.subheader("😶‍🌫️ Mind-wander 모드")
 
-rem = remaining_seconds()
-st.info(f"⏱️ 남은 멍때림 시간: **{rem//60:02d}:{rem%60:02d}**")
+def on_rest_expired():
+    stop_timer()
+    go("pages/4_Post.py")
+
+# 남은 시간은 1초마다 이 영역만 갱신, 0초가 되면 Post 로 전환
+render_countdown("남은 멍때림 시간", on_rest_expired)
 
 # ✅ 버튼을 자극 렌더링보다 먼저 처리 → 페이지 전환이 “확실”
 colA, colB, colC = st.columns(3)
@@ -43,12 +46,7 @@ if exit_to_results:
     stop_timer()
     go("pages/5_Results.py")
 
-if rem == 0:
-    stop_timer()
-    go("pages/4_Post.py")
-
-# 버튼 처리 후 자극 렌더링
+# 버튼 처리 후 자극 렌더링(호흡/문장 자극은 자체 fragment 로 1초마다 갱신)
 render_stimulus(st.session_state.chosen_stim, int(st.session_state.rest_min))
 
-time.sleep(1)
-st.rerun()
+end_page()
@@ -1,14 +1,14 @@
 import streamlit as st
-from datetime import datetime
+import time
 import numpy as np
 from mindswitch_utils import (
     APP_TITLE, init_state, render_sidebar,
     compute_mwi, bandit_update,
-    append_log, go
+    append_log, go, end_page
 )
 
 st.set_page_config(page_title=APP_TITLE, layout="centered")
-init_state()
+init_state("4_Post")
 render_sidebar()
 
 st.title(APP_TITLE)
@@ -125,12 +125,16 @@ if st.button("💾 저장하고 결과 보기"):
 
     # ✅ 기존 필드 유지 + Easy-MWI 필드만 추가
     row = {
-        "ts": datetime.now().isoformat(timespec="seconds"),
+        "ts": int(time.time()),
         "work_min": work_min,
         "rest_min": rest_min,
         "recommended_stim": rec,
         "recommend_reason": reason,
         "chosen_stim": stim,
+        # S1 모양(pulse/wave/gradient)과 S2 소리(white/pink/brown)별로 비교할 수 있게
+        # 함께 남긴다(그 자극이 아니면 비움)
+        "visual_variant": st.session_state.visual_variant if stim == "S1_VisualPulse" else None,
+        "noise_color": st.session_state.noise_color if stim == "S2_AudioNoise" else None,
 
         # 기존 정량 필드
         "pre_rt": pre_rt,
@@ -155,3 +159,5 @@ if st.button("💾 저장하고 결과 보기"):
     append_log(row)
     st.session_state.last_result = row
     go("pages/5_Results.py")
+
+end_page()
@@ -2,18 +2,18 @@ import streamlit as st
 import numpy as np
 from mindswitch_utils import (
     APP_TITLE, init_state, render_sidebar,
-    load_log, today_df, STIMULI, go
+    load_today, today_stim_means, log_download_data, log_date_bounds, STIMULI, go,
+    mwi_what_if, W_RT, W_ERR, W_IDEA, end_page
 )
 
 st.set_page_config(page_title=APP_TITLE, layout="centered")
-init_state()
+init_state("5_Results")
 render_sidebar()
 
 st.title(APP_TITLE)
 st.subheader("📊 오늘 결과")
 
-df_all = load_log()
-df_today = today_df(df_all)
+df_today = load_today()
 
 last = st.session_state.last_result
 if last is not None:
@@ -51,6 +51,7 @@ else:
     ]
     show_cols = [c for c in base_cols if c in df_today.columns]
     df_view = df_today[show_cols].copy()
+    df_view["ts"] = df_today["ts_dt"]
 
     if "recommended_stim" in df_view.columns:
         df_view["recommended_stim"] = df_view["recommended_stim"].map(lambda x: STIMULI.get(x, x))
@@ -62,20 +63,41 @@ else:
     # ✅ 기존: 자극별 평균 정량 MWI (그대로)
     if "mwi" in df_today.columns and df_today["mwi"].notna().any():
         st.markdown("### 📈 자극별 평균 정량 MWI(오늘)")
-        tmp = df_today.copy()
-        tmp = tmp[tmp["mwi"].notna()]
-        tmp["chosen_name"] = tmp["chosen_stim"].map(lambda x: STIMULI.get(x, x))
-        by_stim = tmp.groupby("chosen_name")["mwi"].mean().sort_values(ascending=False)
-        st.bar_chart(by_stim)
+        by_stim = today_stim_means("mwi")
+        by_stim.index = by_stim.index.map(lambda x: STIMULI.get(x, x))
+        st.bar_chart(by_stim.sort_values(ascending=False))
 
     # ✅ 추가: 자극별 평균 Easy-MWI
     if "easy_mwi" in df_today.columns and df_today["easy_mwi"].notna().any():
         st.markdown("### 📈 자극별 평균 Easy-MWI(오늘)")
-        tmp2 = df_today.copy()
-        tmp2 = tmp2[tmp2["easy_mwi"].notna()]
-        tmp2["chosen_name"] = tmp2["chosen_stim"].map(lambda x: STIMULI.get(x, x))
-        by_stim2 = tmp2.groupby("chosen_name")["easy_mwi"].mean().sort_values(ascending=False)
-        st.bar_chart(by_stim2)
+        by_stim2 = today_stim_means("easy_mwi")
+        by_stim2.index = by_stim2.index.map(lambda x: STIMULI.get(x, x))
+        st.bar_chart(by_stim2.sort_values(ascending=False))
+
+# ✅ 가중치 바꿔보기: 전체 기록의 정량 MWI 를 다른 가중치로 다시 계산(슬라이더만 다시 그림)
+@st.fragment
+def what_if_panel():
+    st.markdown("### 🔧 가중치 바꿔보기(전체 기록)")
+    c1, c2, c3 = st.columns(3)
+    w_rt = c1.slider("반응속도(RT)", 0.0, 1.0, float(W_RT), 0.05, key="what_if_w_rt")
+    w_err = c2.slider("오류", 0.0, 1.0, float(W_ERR), 0.05, key="what_if_w_err")
+    w_idea = c3.slider("아이디어", 0.0, 1.0, float(W_IDEA), 0.05, key="what_if_w_idea")
+
+    table = mwi_what_if(w_rt, w_err, w_idea)
+    table.index = table.index.map(lambda x: STIMULI.get(x, x))
+    st.bar_chart(table[["now", "what_if"]], stack=False)
+    st.dataframe(
+        table.rename(columns={
+            "n": "기록 수", "now": "현재 가중치", "what_if": "바꾼 가중치",
+            "rank_now": "현재 순위", "rank_what_if": "바꾼 순위",
+        }),
+        use_container_width=True,
+    )
+    st.caption(f"현재 가중치: RT {W_RT} / 오류 {W_ERR} / 아이디어 {W_IDEA} · 정량 MWI 가 계산된 세션만 포함")
+
+if not mwi_what_if(W_RT, W_ERR, W_IDEA).empty:
+    st.markdown("---")
+    what_if_panel()
 
 st.markdown("---")
 colA, colB = st.columns(2)
@@ -87,7 +109,7 @@ with colA:
             "pre_metrics", "last_result",
             "recommended_stim", "recommend_reason", "chosen_stim",
             "rest_min", "work_remaining_sec",
-            "prompt_anchor", "fixed_prompt", "breath_anchor",
+            "prompt_anchor", "fixed_prompt", "breath_anchor", "visual_anchor",
             "pre_easy"
         ]:
             if k in st.session_state:
@@ -95,10 +117,25 @@ with colA:
         go("Home.py")
 
 with colB:
-    if not df_all.empty:
+    # 파일은 버튼을 눌렀을 때만 만든다(기간을 좁히거나 gzip 으로 받으면 더 작고 빠르다)
+    bounds = log_date_bounds()
+    if bounds is not None:
+        picked = st.date_input("기간", value=bounds, min_value=bounds[0], max_value=bounds[1], key="export_range")
+        compress = st.checkbox("gzip 압축(.csv.gz)", key="export_gzip")
+        first, last = (picked[0], picked[-1]) if picked else bounds
+        file_name = "mindwand_log"
+        if (first, last) == bounds:
+            first = last = None
+        else:
+            file_name += f"_{first:%Y%m%d}_{last:%Y%m%d}"
         st.download_button(
             "⬇️ 전체 로그 CSV 다운로드",
-            data=df_all.to_csv(index=False).encode("utf-8"),
-            file_name="mindwand_log.csv",
-            mime="text/csv"
+            data=log_download_data(first, last, compress),
+            file_name=file_name + (".csv.gz" if compress else ".csv"),
+            mime="application/gzip" if compress else "text/csv"
         )
+
+if st.button("📅 기록 추이 보기"):
+    go("pages/6_History.py")
+
+end_page()
@@ -0,0 +1,73 @@
+import streamlit as st
+from mindswitch_utils import (
+    APP_TITLE, init_state, render_sidebar, STIMULI, go, end_page,
+    period_trend, rolling_trend, minutes_breakdown, mwi_by_setting, downsample,
+    CHART_MAX_POINTS
+)
+
+st.set_page_config(page_title=APP_TITLE, layout="centered")
+init_state("6_History")
+render_sidebar()
+
+st.title(APP_TITLE)
+st.subheader("📅 기록 추이")
+
+METRICS = {"mwi": "정량 MWI", "easy_mwi": "Easy-MWI"}
+PERIODS = {"week": "주별", "month": "달별"}
+
+def stim_names(df):
+    return df.rename(columns=lambda x: STIMULI.get(x, x))
+
+# 날짜/주/달별 누적 통계(저장할 때 갱신)에서 바로 그린다. 로그 전체를 읽지 않는다.
+if minutes_breakdown("month").empty:
+    st.info("저장된 기록이 없습니다.")
+else:
+    # ✅ 자극별 추이: 옵션만 바꿀 때는 이 영역만 다시 그림
+    @st.fragment
+    def trend_panel():
+        c1, c2 = st.columns(2)
+        metric = c1.radio("지표", list(METRICS), format_func=METRICS.get, horizontal=True, key="history_metric")
+        period = c2.radio("기간", list(PERIODS), format_func=PERIODS.get, horizontal=True, key="history_period")
+
+        st.markdown(f"### 📈 자극별 평균 {METRICS[metric]}({PERIODS[period]})")
+        trend = period_trend(metric, period)
+        if trend.empty:
+            st.info(f"{METRICS[metric]} 기록이 없습니다.")
+            return
+        st.line_chart(stim_names(downsample(trend)))
+
+        window = st.slider("이동 평균(일)", 3, 90, 14, key="history_window")
+        st.markdown(f"### 〰️ {window}일 이동 평균")
+        rolling = rolling_trend(metric, window)
+        shown = downsample(rolling)
+        st.line_chart(stim_names(shown))
+        st.caption(f"{len(rolling)}일 → 차트 점 {len(shown)}개(최대 {CHART_MAX_POINTS}) · 구간 평균으로 줄임")
+
+    trend_panel()
+
+    st.markdown("---")
+    st.markdown("### ⏱️ 작업/휴식 시간")
+    period = st.radio("기간", list(PERIODS), format_func=PERIODS.get, horizontal=True, key="history_minutes_period")
+    minutes = minutes_breakdown(period)
+    st.bar_chart(downsample(minutes[["work_min", "rest_min"]]).rename(
+        columns={"work_min": "작업(분)", "rest_min": "휴식(분)"}
+    ))
+
+    c1, c2 = st.columns(2)
+    for col, by, label in [(c1, "work_min", "작업 시간(분)"), (c2, "rest_min", "휴식 시간(분)")]:
+        with col:
+            st.markdown(f"#### {label}별 정량 MWI")
+            table = mwi_by_setting(by)
+            if table.empty:
+                st.info("정량 MWI 기록이 없습니다.")
+            else:
+                st.dataframe(
+                    table.rename(columns={"n": "기록 수", "mean": "평균", "std": "표준편차"}),
+                    use_container_width=True,
+                )
+
+st.markdown("---")
+if st.button("📊 오늘 결과로"):
+    go("pages/5_Results.py")
+
+end_page()
@@ -0,0 +1,22 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("MINDSWITCH_METRICS", "0")
+
+import mindswitch_utils as mu  # noqa: E402
+
+
+@pytest.fixture
+def csv_log(tmp_path, monkeypatch):
+    """빈 임시 디렉터리의 CSV 로그(누적 통계와 밴딧 상태도 그 안에)."""
+    monkeypatch.setattr(mu, "LOG_BACKEND", "csv")
+    monkeypatch.setattr(mu, "LOG_PATH", str(tmp_path / "mindwand_log.csv"))
+    monkeypatch.setattr(mu, "LOG_AGG_DIR", str(tmp_path / "mindwand_log.agg"))
+    monkeypatch.setattr(mu, "BANDIT_STATE_PATH", str(tmp_path / "mindwand_bandit.json"))
+    yield mu.LOG_PATH
+    mu.flush_log()
@@ -0,0 +1,74 @@
+"""
+로그 가져오기(mindswitch_import.import_logs): 내려받은 CSV(ISO ts), 서버 원본(epoch ts),
+easy_* 가 없는 예전 파일을 이미 행이 있는 저장소에 합친다. 겹치는 행은 빠지고,
+더해진 누적 통계와 밴딧 상태는 로그로 다시 만든 것과 같아야 한다.
+"""
+import numpy as np
+import pandas as pd
+
+import mindswitch_import
+import mindswitch_utils as mu
+
+STIMS = ["S1_VisualPulse", "S2_AudioNoise", "S3_BreathGuide", "S4_ThoughtPrompt"]
+EASY = ["easy_pre_q1", "easy_q1", "easy_q2", "easy_q3", "easy_mwi"]
+
+
+def make_row(i: int, easy: bool = True) -> dict:
+    stim = STIMS[i % len(STIMS)]
+    row = {
+        "ts": 1_760_000_000 + 600 * i, "work_min": 25, "rest_min": 5,
+        "recommended_stim": STIMS[(i + 1) % len(STIMS)], "recommend_reason": "exploit(학습된 최선 추천)",
+        "chosen_stim": stim,
+        "visual_variant": "wave" if stim == "S1_VisualPulse" else None,
+        "noise_color": "pink" if stim == "S2_AudioNoise" else None,
+        "pre_rt": 0.8, "post_rt": 0.7, "pre_err": 2, "post_err": i % 3, "pre_idea": 3, "post_idea": 4,
+        "d_rt": 0.125, "d_err": 0.5, "d_idea": 0.25, "mwi": 0.01 * (i % 40),
+    }
+    if easy:
+        row.update({"easy_pre_q1": 1, "easy_q1": i % 5, "easy_q2": 1, "easy_q3": 0, "easy_mwi": 0.5 * (i % 7)})
+    return row
+
+
+def test_import_into_populated_store(csv_log, tmp_path):
+    store = [make_row(i) for i in range(30)]
+    for row in store:
+        mu.append_log(row)
+    mu.rebuild_bandit_state()
+
+    # 내려받은 CSV: 저장소 앞 10 행 + 새 10 행(A)
+    a = [make_row(i) for i in range(100, 110)]
+    export = tmp_path / "export.csv"
+    export.write_bytes(mu._export_frame_csv(pd.DataFrame(store[:10] + a)))
+    # 서버 원본: 새 8 행(B) + A 의 3 행(파일끼리 겹침)
+    b = [make_row(i) for i in range(200, 208)]
+    raw = tmp_path / "raw.csv"
+    pd.DataFrame(b + a[:3]).to_csv(raw, index=False)
+    # 예전 파일: easy_* 가 없는 새 5 행(C), 첫 행이 두 번
+    c = [make_row(i, easy=False) for i in range(300, 305)]
+    old = tmp_path / "old.csv"
+    pd.DataFrame(c + c[:1]).drop(columns=["visual_variant", "noise_color"]).to_csv(old, index=False)
+
+    r = mindswitch_import.import_logs([str(export), str(raw), str(old)], workers=1)
+    assert r["failed"] == []
+    assert r["rows_read"] == 20 + 11 + 6
+    assert r["rows_added"] == len(a) + len(b) + len(c)
+    assert r["duplicates"] == 10 + 3 + 1
+
+    df = mu.load_log()
+    assert len(df) == len(store) + len(a) + len(b) + len(c)
+    expected = sorted(row["ts"] for row in store + a + b + c)
+    assert sorted(df["ts"].tolist()) == expected
+    assert df.loc[df["ts"].isin([row["ts"] for row in c]), "easy_mwi"].isna().all()
+    assert isinstance(df["chosen_stim"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["visual_variant"].dtype, pd.CategoricalDtype)
+
+    # 다시 가져오면 모두 중복
+    again = mindswitch_import.import_logs([str(export), str(raw), str(old)], workers=1)
+    assert again["rows_added"] == 0
+
+    assert mu.rebuild_aggregates(check=True) == []
+    state = mu.bandit_state()
+    rebuilt = mu.rebuild_bandit_state()
+    assert state["n"] == rebuilt["n"]
+    np.testing.assert_allclose([state["q"][k] for k in STIMS], [rebuilt["q"][k] for k in STIMS],
+                               rtol=1e-6, atol=1e-9)
@@ -0,0 +1,45 @@
+"""
+load_log 캐시(_cached_read_csv): 한 행을 덧붙인 뒤에는 늘어난 꼬리(그 한 행)만 파싱해야 한다.
+
+    python -m pytest -q tests
+"""
+import time
+
+import mindswitch_utils as mu
+
+N = 500
+
+
+def make_row(i: int) -> dict:
+    return {
+        "ts": int(time.time()) - N + i, "work_min": 25, "rest_min": 5,
+        "recommended_stim": "S1_VisualPulse", "recommend_reason": "exploit(학습된 최선 추천)",
+        "chosen_stim": "S1_VisualPulse",
+        "pre_rt": 0.8, "post_rt": 0.7, "pre_err": 2, "post_err": 1, "pre_idea": 3, "post_idea": 4,
+        "d_rt": 0.125, "d_err": 0.5, "d_idea": 0.3333, "mwi": 0.3, "easy_mwi": 3.0,
+    }
+
+
+def test_append_parses_only_new_row(csv_log):
+    mu._append_csv_rows(csv_log, [make_row(i) for i in range(N)])
+    # 누적 통계를 미리 만들어 둔다(없으면 append_log 가 로그 전체로 다시 만들면서 load_log 를 부른다)
+    mu.rebuild_aggregates()
+
+    before = mu.log_cache_stats()
+    assert len(mu.load_log()) == N
+    after_first = mu.log_cache_stats()
+    assert len(mu.load_log()) == N
+    after_repeat = mu.log_cache_stats()
+    assert after_repeat["hit"] == after_first["hit"] + 1
+    assert after_repeat["rows_parsed"] == after_first["rows_parsed"]
+
+    mu.append_log(make_row(N))
+    df = mu.load_log()
+    after_append = mu.log_cache_stats()
+    assert len(df) == N + 1
+    assert df["ts"].iloc[-1] == make_row(N)["ts"]
+    assert after_append["rows_parsed"] == after_repeat["rows_parsed"] + 1
+    assert after_append["tail"] == after_repeat["tail"] + 1
+    assert after_append["miss"] == after_repeat["miss"]
+    # 처음 읽은 것만 전체 파싱
+    assert after_first["miss"] - before["miss"] <= 1
@@ -0,0 +1,58 @@
+"""
+group-commit 로그 작성기(_LogWriter): 여러 스레드의 append_log 와 flush_log 가 겹쳐도
+행이 사라지거나 append_log 가 멈추지 않아야 한다.
+"""
+import threading
+import time
+
+import mindswitch_utils as mu
+
+THREADS = 8
+PER_THREAD = 40
+TIMEOUT_SEC = 60
+
+
+def make_row(i: int) -> dict:
+    return {"ts": 1_700_000_000 + i, "work_min": 25, "rest_min": 5,
+            "chosen_stim": "S2_AudioNoise", "mwi": 0.01 * (i % 50)}
+
+
+def test_concurrent_append_and_flush(csv_log):
+    errors = []
+    stop = threading.Event()
+
+    def writer(t: int):
+        try:
+            for j in range(PER_THREAD):
+                mu.append_log(make_row(t * PER_THREAD + j))
+        except Exception as e:  # pragma: no cover - 실패 시 메시지용
+            errors.append(e)
+
+    def flusher():
+        while not stop.is_set():
+            mu.flush_log()
+            time.sleep(0.001)
+
+    f = threading.Thread(target=flusher, daemon=True)
+    f.start()
+    threads = [threading.Thread(target=writer, args=(t,), daemon=True) for t in range(THREADS)]
+    for th in threads:
+        th.start()
+    deadline = time.monotonic() + TIMEOUT_SEC
+    for th in threads:
+        th.join(max(0.0, deadline - time.monotonic()))
+    stop.set()
+    f.join(TIMEOUT_SEC)
+
+    assert not [th for th in threads if th.is_alive()], "append_log 가 멈췄다"
+    assert not errors
+    df = mu.load_log()
+    assert sorted(df["ts"].tolist()) == [make_row(i)["ts"] for i in range(THREADS * PER_THREAD)]
+
+
+def test_submit_after_close_is_rejected(csv_log):
+    w = mu._LogWriter()
+    w.close()
+    assert w.submit(make_row(0)) is False
+    mu.append_log(make_row(1))
+    assert mu.load_log()["ts"].tolist() == [make_row(1)["ts"]]
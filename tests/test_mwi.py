@@ -0,0 +1,28 @@
+"""
+compute_mwi_batch(배열) 가 행마다 compute_mwi(스칼라)와 같은 값을 내야 한다.
+결측(None = NaN)과 분모가 0 인 입력(pre_rt 0, pre_err/pre_idea 0, rest_min 0)을 포함한다.
+"""
+import numpy as np
+
+import mindswitch_utils as mu
+
+# (pre_rt, post_rt, pre_err, post_err, pre_idea, post_idea, rest_min)
+CASES = [
+    (0.8, 0.7, 2, 1, 3, 4, 5),
+    (None, 0.7, 2, 1, 3, 4, 5),
+    (0.8, None, None, 1, 3, None, 5),
+    (None, None, None, None, None, None, 5),
+    (0.0, 0.7, 2, 1, 3, 4, 5),
+    (0.8, 0.9, 0, 3, 0, 2, 5),
+    (0.8, 0.7, 2, 1, 3, 4, 0),
+    (0.0, 0.0, 0, 0, 0, 0, 0),
+    (1.2, 0.6, 5, 0, 1, 1, 10),
+]
+
+
+def test_batch_matches_scalar():
+    cols = [np.array([np.nan if v is None else v for v in col], dtype=np.float64) for col in zip(*CASES)]
+    batch = np.column_stack(mu.compute_mwi_batch(*cols))
+    scalar = np.array([mu.compute_mwi(*case) for case in CASES])
+    assert np.isfinite(batch).all()
+    np.testing.assert_allclose(batch, scalar, rtol=1e-12, atol=0)
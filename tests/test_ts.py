@@ -0,0 +1,39 @@
+"""
+ts 변환: 옛 ISO 로컬 시각 ↔ epoch 초가 DST 가 바뀐 날에도 그 시각의 오프셋을 쓴다.
+"""
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pytest
+
+import mindswitch_utils as mu
+
+ZONE = "America/New_York"
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv("TZ", ZONE)
+    time.tzset()
+    yield ZoneInfo(ZONE)
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_iso_round_trip_across_dst(new_york):
+    # DST 가 끝난 날(11/1) 03:30 EST, 시작한 날(3/8) 01:59 EST, 여름
+    events = [datetime(2026, 11, 1, 3, 30, tzinfo=new_york), datetime(2026, 3, 8, 1, 59, tzinfo=new_york),
+              datetime(2026, 7, 13, 23, 33, tzinfo=new_york)]
+    epoch = pd.Series([int(e.timestamp()) for e in events])
+    iso = mu._epoch_to_local(epoch).dt.strftime("%Y-%m-%dT%H:%M:%S")
+    assert iso.tolist() == [e.strftime("%Y-%m-%dT%H:%M:%S") for e in events]
+    assert mu._ts_to_epoch(iso).tolist() == epoch.tolist()
+
+
+def test_nonexistent_and_ambiguous_local_times(new_york):
+    out = mu._ts_to_epoch(pd.Series(["2026-03-08T02:30:00", "2026-11-01T01:30:00"])).tolist()
+    # 없는 시각은 DST 시작 시각(03:00 EDT)으로, 두 번 있는 시각은 앞(EDT) 것으로
+    assert out[0] == int(datetime(2026, 3, 8, 3, 0, tzinfo=new_york).timestamp())
+    assert out[1] == int(datetime(2026, 11, 1, 1, 30, tzinfo=new_york, fold=0).timestamp())